@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MiniOS Installer - Archive Utilities
+Streaming access to compressed tar archives of the MiniOS tree.
+
+Copyright (C) 2025 MiniOS Linux
+Author: crims0n <crims0n@minios.dev>
+"""
+
+import os
+import shutil
+import gettext
+import subprocess
+import tarfile
+import threading
+from typing import Optional, Callable, List, Iterator, Tuple, IO
+
+# Set up gettext for localization
+gettext.bindtextdomain('minios-installer', '/usr/share/locale')
+gettext.textdomain('minios-installer')
+_ = gettext.gettext
+
+# Decompressor command per archive suffix; the data is piped through stdin/stdout
+ARCHIVE_DECOMPRESSORS = {
+    '.tar.zst': ['zstd', '-d', '-c', '-q'],
+    '.tar.zstd': ['zstd', '-d', '-c', '-q'],
+    '.tzst': ['zstd', '-d', '-c', '-q'],
+    '.tar.xz': ['xz', '-d', '-c', '-T0'],
+    '.txz': ['xz', '-d', '-c', '-T0'],
+}
+
+# Amount of compressed data handed to the decompressor at a time
+FEED_CHUNK_SIZE = 1024 * 1024
+
+
+def decompressor_command(path: str) -> Optional[List[str]]:
+    """
+    Return the decompressor command for an archive path, or None if the
+    suffix is not a supported archive type.
+    """
+    name = path.lower()
+    for suffix, command in ARCHIVE_DECOMPRESSORS.items():
+        if name.endswith(suffix):
+            return list(command)
+    return None
+
+
+def is_archive(path: str) -> bool:
+    """
+    True if path is a file with a supported compressed tar suffix.
+    """
+    return decompressor_command(path) is not None and os.path.isfile(path)
+
+
+class ArchiveReader:
+    """
+    Reads a compressed tar archive as a stream. The decompressor runs as a
+    child process; a feeder thread pipes the compressed file into it and
+    reports every chunk it hands over to progress, so progress follows the
+    compressed bytes consumed. members() parses the decompressed output
+    with tarfile in stream mode while the caller writes the data out, so
+    reading, decompressing and writing overlap and nothing is staged on
+    disk. Use as a context manager; leaving it early stops the pipeline.
+    """
+
+    def __init__(self, path: str, progress: Optional[Callable[[int], None]] = None):
+        command = decompressor_command(path)
+        if command is None:
+            raise RuntimeError(_("Unsupported archive type: ") + path)
+        if shutil.which(command[0]) is None:
+            raise RuntimeError(_("{tool} is required to read {archive}.").format(
+                tool=command[0], archive=path))
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.progress = progress
+        self._stop = threading.Event()
+        self._feed_error = None
+        self._proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE)
+        self._thread = threading.Thread(target=self._feed, name='minios-archive-feed', daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _feed(self) -> None:
+        try:
+            with open(self.path, 'rb') as f:
+                while not self._stop.is_set():
+                    data = f.read(FEED_CHUNK_SIZE)
+                    if not data:
+                        break
+                    self._proc.stdin.write(data)
+                    if self.progress:
+                        self.progress(len(data))
+        except BrokenPipeError:
+            # The decompressor exited; its status tells why
+            pass
+        except Exception as e:
+            self._feed_error = e
+        finally:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+
+    def members(self) -> Iterator[Tuple[tarfile.TarInfo, Optional[IO[bytes]]]]:
+        """
+        Yield (member, data) for every archive member in archive order.
+        data is a file object for regular files and None otherwise; it is
+        only valid until the next member is requested.
+        """
+        try:
+            with tarfile.open(fileobj=self._proc.stdout, mode='r|') as tar:
+                for member in tar:
+                    yield member, tar.extractfile(member) if member.isfile() else None
+        except tarfile.TarError as e:
+            self._check()
+            raise RuntimeError(_("Failed to read archive {archive}: {error}").format(
+                archive=self.path, error=e))
+        self._check()
+
+    def _check(self) -> None:
+        # Raise if the feeder or the decompressor failed. tarfile stops at
+        # the end-of-archive marker, so drain the padding after it first.
+        while self._proc.stdout.read(FEED_CHUNK_SIZE):
+            pass
+        self._thread.join()
+        if self._feed_error is not None:
+            raise RuntimeError(_("Failed to read archive {archive}: {error}").format(
+                archive=self.path, error=self._feed_error))
+        if self._proc.wait() != 0:
+            error = self._proc.stderr.read().decode(errors='replace').strip()
+            raise RuntimeError(_("Failed to decompress {archive}: {error}").format(
+                archive=self.path, error=error))
+
+    def close(self) -> None:
+        """
+        Stop feeding and decompressing, and wait for both to end.
+        """
+        self._stop.set()
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._thread.join()
+        self._proc.wait()
+        for stream in (self._proc.stdout, self._proc.stderr):
+            stream.close()
@@ -73,8 +73,10 @@ def install_bootloader(device: str, primary: str, efi: Optional[str],
     if owner and owner.cancel_requested:
         raise RuntimeError(_("Installation canceled by user."))
     
-    # Detect bootloader type from live system source
-    bootloader_type = detect_bootloader_type()
+    # Detect bootloader type from the tree just installed to primary, which
+    # may come from an archive, ISO or mirror of a different build
+    installed = os.path.join("/mnt/install", os.path.basename(primary), "minios")
+    bootloader_type = detect_bootloader_type(installed)
     
     log_cb(_("Detected bootloader type: {type}").format(type=bootloader_type))
     
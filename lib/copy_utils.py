@@ -12,67 +12,869 @@ import os
 import shutil
 import gettext
 import re
-from typing import Optional, Callable, Dict
+import json
+import fnmatch
+import functools
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Callable, Dict, List, NamedTuple, Tuple
+from archive_utils import ArchiveReader, is_archive
+from iso_utils import IsoImage, is_iso_image
+from mirror_utils import MirrorSource, is_mirror_url
+from module_utils import (find_live_changes, pack_directory, squashfs_compression,
+                          DEFAULT_COMPRESSION, LIVE_CHANGES_EXCLUDE)
+from io_utils import (copy_file, copy_extents, copy_prefetched, copy_small_files, delta_update, fanout_copy, hash_fd,
+                      physical_offset, extent_count, preallocate, CopyResult, PrefetchReader,
+                      COPY_CHUNK_SIZE, PREALLOCATE_MIN_SIZE, METHOD_BATCHED, METHOD_DELTA, METHOD_FANOUT)
 
 # Set up gettext for localization
 gettext.bindtextdomain('minios-installer', '/usr/share/locale')
 gettext.textdomain('minios-installer')
 _ = gettext.gettext
 
+# Number of files copied concurrently by copy_minios_files
+DEFAULT_COPY_WORKERS = 4
 
-def copy_minios_files(src: str, dst: str, progress_cb: Callable, log_cb: Callable, 
-                     config_override: Optional[str] = None, boot_config_type: str = "multilang") -> None:
+# Starting chunk size and number of parallel copies per target transport,
+# as reported by find_available_disks(); the autotuner refines them
+TRANSPORT_IO_DEFAULTS = {
+    'usb': (4 * 1024 * 1024, 2),
+    'mmc': (1024 * 1024, 1),
+    'ata': (8 * 1024 * 1024, 2),
+    'sata': (8 * 1024 * 1024, 4),
+    'rotational': (8 * 1024 * 1024, 2),
+    'nvme': (16 * 1024 * 1024, 8),
+}
+
+# Autotuner limits: chunk size range, most parallel copies, seconds each
+# setting is measured for and the throughput gain needed to keep a change
+TUNE_MIN_CHUNK = 256 * 1024
+TUNE_MAX_CHUNK = 32 * 1024 * 1024
+TUNE_MAX_WORKERS = 16
+TUNE_PERIOD = 2.0
+TUNE_GAIN = 0.1
+
+# Suggested read-ahead buffer memory for the prefetching copy pipeline
+DEFAULT_PREFETCH_MEMORY = 64 * 1024 * 1024
+
+# Most file data allowed to sit dirty in the page cache during a copy,
+# shared between the workers; 0 leaves writeback to the kernel
+DEFAULT_WRITEBACK_LIMIT = 128 * 1024 * 1024
+
+# Share of the overall install progress bar covered by the file copy
+COPY_PROGRESS_START = 18
+COPY_PROGRESS_SPAN = 78
+
+# How often the copy loop wakes up to check for cancellation (seconds)
+CANCEL_POLL_INTERVAL = 0.2
+
+# Minimum delay between two progress updates while a file is being copied (seconds)
+PROGRESS_INTERVAL = 0.25
+
+# Time span the copy throughput is averaged over (seconds)
+THROUGHPUT_WINDOW = 5.0
+
+# Top-level source directories that are never copied to the target
+EXCLUDED_SOURCE_DIRS = ('changes',)
+
+# Module the live session changes are packed into, relative to the target
+LIVE_CHANGES_MODULE = 'minios/modules/99-live-changes.sb'
+
+# Copy journal kept in the root of the target partition for resumed installs
+JOURNAL_NAME = '.minios-installer.journal'
+
+# Files smaller than this are cheaper to copy again than to flush and journal
+JOURNAL_MIN_SIZE = 1024 * 1024
+
+# Files below this size are copied in batches of up to SMALL_FILE_BATCH
+# files per worker task, with one log line per batch
+SMALL_FILE_SIZE = 256 * 1024
+SMALL_FILE_BATCH = 64
+
+# FAT stores modification times with a 2 second resolution
+MTIME_TOLERANCE_NS = 2 * 10**9
+
+
+class ManifestEntry(NamedTuple):
+    """
+    A file to copy: destination path relative to the target root (absolute
+    for files going to another partition), source path and its stat.
+    Files inside an ISO image have the image as path and the
+    (offset, length) extents of their data in it.
+    """
+    rel: str
+    path: str
+    stat: os.stat_result
+    extents: Optional[List[Tuple[int, int]]] = None
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+    @property
+    def allocated(self) -> int:
+        """
+        Bytes of data actually stored, smaller than size for sparse files.
+        Files reporting no blocks at all (inline data, some filesystems)
+        count with their full size.
+        """
+        blocks = self.stat.st_blocks * 512
+        return min(self.size, blocks) if blocks else self.size
+
+
+class SourceManifest:
     """
-    Copy MiniOS files from src to dst with progress reporting.
+    List of files to copy from a MiniOS source tree, collected in a single
+    os.scandir pass. The stat result of every file is kept, so the total
+    size, copy order and per-file sizes never require another walk.
+    """
+
+    def __init__(self):
+        self.entries: List[ManifestEntry] = []
+        self.total_size = 0
+        self.total_allocated = 0
+
+    @classmethod
+    def scan(cls, src: str, prefix: str = 'minios',
+             exclude: tuple = EXCLUDED_SOURCE_DIRS) -> 'SourceManifest':
+        """
+        Build a manifest for every regular file under src, mapped to
+        prefix/<relative path>. Top-level directories listed in exclude
+        are skipped. Symlinked directories are not followed, like os.walk.
+        """
+        manifest = cls()
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            subdirs = []
+            with os.scandir(os.path.join(src, rel_dir)) as it:
+                for entry in it:
+                    rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if rel_dir or entry.name not in exclude:
+                                subdirs.append(rel)
+                        elif entry.is_file():
+                            manifest.add(os.path.join(prefix, rel), entry.path, entry.stat())
+                    except OSError:
+                        # Broken symlink or unreadable entry
+                        continue
+            # Keep directory order: first subdirectory is visited first
+            stack.extend(reversed(subdirs))
+        return manifest
+
+    @classmethod
+    def scan_iso(cls, image: str, directory: str = 'minios', prefix: str = 'minios',
+                 exclude: tuple = EXCLUDED_SOURCE_DIRS) -> 'SourceManifest':
+        """
+        Build a manifest for every file below directory in an ISO image,
+        mapped like scan() and ordered by the position of its data in the
+        image, so the image is read front to back. A missing directory
+        gives an empty manifest.
+        """
+        manifest = cls()
+        with IsoImage(image) as iso:
+            if not iso.isdir(directory):
+                return manifest
+            files = iso.walk(directory)
+        for entry in sorted(files, key=lambda entry: entry.extents[0][0] if entry.extents else 0):
+            if '/' in entry.path and entry.path.split('/')[0] in exclude:
+                continue
+            manifest.add(os.path.join(prefix, entry.path), image, entry.stat(), entry.extents)
+        return manifest
+
+    @classmethod
+    def scan_mirror(cls, mirror: MirrorSource, directory: str = '', prefix: str = 'minios',
+                    exclude: tuple = EXCLUDED_SOURCE_DIRS) -> 'SourceManifest':
+        """
+        Build a manifest for every file below directory of a mirror, mapped
+        like scan(). Entries have the file URL as path.
+        """
+        manifest = cls()
+        base = directory + '/' if directory else ''
+        for f in mirror.files:
+            if not f.path.startswith(base):
+                continue
+            rel = f.path[len(base):]
+            if '/' in rel and rel.split('/')[0] in exclude:
+                continue
+            manifest.add(os.path.join(prefix, rel), mirror.file_url(f), f.stat())
+        return manifest
+
+    def filtered(self, predicate: Callable[[ManifestEntry], bool]) -> 'SourceManifest':
+        """
+        Return a new manifest holding only the entries accepted by predicate.
+        """
+        manifest = SourceManifest()
+        for entry in self.entries:
+            if predicate(entry):
+                manifest.entries.append(entry)
+                manifest.total_size += entry.size
+                manifest.total_allocated += entry.allocated
+        return manifest
+
+    def sort_by_layout(self) -> None:
+        """
+        Reorder the entries by where their data starts on the source device,
+        so a rotational or optical source is read in one sweep. Files whose
+        position FIEMAP cannot report go first, ordered by inode number,
+        which on ISO9660 also follows the on-disk layout. Files inside an
+        ISO image are ordered by their offset in the image.
+        """
+        def layout_key(entry: ManifestEntry):
+            if entry.extents:
+                return (entry.extents[0][0], 0)
+            offset = physical_offset(entry.path)
+            return (-1 if offset is None else offset, entry.stat.st_ino)
+
+        self.entries.sort(key=layout_key)
+
+    def extend(self, other: 'SourceManifest') -> None:
+        """
+        Append the entries of another manifest.
+        """
+        self.entries.extend(other.entries)
+        self.total_size += other.total_size
+        self.total_allocated += other.total_allocated
+
+    def add(self, rel: str, path: str, st: Optional[os.stat_result] = None,
+            extents: Optional[List[Tuple[int, int]]] = None) -> None:
+        """
+        Append a single file to the manifest, stat-ing it if needed.
+        """
+        if st is None:
+            st = os.stat(path)
+        entry = ManifestEntry(rel, path, st, extents)
+        self.entries.append(entry)
+        self.total_size += entry.size
+        self.total_allocated += entry.allocated
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+# Filename prefixes of kernel and initramfs images in boot/
+BOOT_IMAGE_PREFIXES = ('vmlinuz', 'initrfs', 'initrd')
+
+
+def _boot_image_version(name: str) -> Optional[str]:
     """
-    # Calculate total size for progress reporting
-    total = _calculate_copy_size(src)
-    copied = 0
+    Version suffix shared by a kernel and its initramfs: "-6.1.0-amd64" for
+    vmlinuz-6.1.0-amd64, initrfs-6.1.0-amd64.img or initrd.img-6.1.0-amd64,
+    "" for the generic vmlinuz/initrfs.img. None for other files.
+    """
+    for prefix in BOOT_IMAGE_PREFIXES:
+        if name.startswith(prefix):
+            return name[len(prefix):].replace('.img', '')
+    return None
+
+
+class CopyRules:
+    """
+    Selects which source files copy_minios_files installs. Patterns are
+    globs matched against paths relative to the MiniOS source, such as
+    "boot/vmlinuz-*" or "modules/*.sb". A file is skipped if it matches an
+    exclude pattern, is one of the skip_modules (.sb names, extension
+    optional) or, with current_kernel_only=True, is a kernel or initramfs
+    image in boot/ that does not belong to the running kernel. Files
+    matching an include pattern are always copied, so includes can take
+    files back from a broader rule.
+    """
+
+    def __init__(self, include: tuple = (), exclude: tuple = (), skip_modules: tuple = (),
+                 current_kernel_only: bool = False):
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.skip_modules = {name if name.endswith('.sb') else name + '.sb' for name in skip_modules}
+        self.current_kernel_only = current_kernel_only
+        self.kernel_version = None
+        if current_kernel_only:
+            vmlinuz, _initramfs = get_boot_files_from_cmdline()
+            if vmlinuz:
+                self.kernel_version = _boot_image_version(vmlinuz)
+
+    def selects(self, rel: str) -> bool:
+        """
+        True if the file at rel (relative to the source root) should be copied.
+        """
+        if any(fnmatch.fnmatchcase(rel, pattern) for pattern in self.include):
+            return True
+        if any(fnmatch.fnmatchcase(rel, pattern) for pattern in self.exclude):
+            return False
+        name = os.path.basename(rel)
+        if name in self.skip_modules:
+            return False
+        if self.kernel_version is not None and os.path.dirname(rel) == 'boot':
+            version = _boot_image_version(name)
+            if version is not None and version != self.kernel_version:
+                return False
+        return True
+
+    def apply(self, manifest: SourceManifest, log_cb: Callable,
+              prefix: str = 'minios') -> SourceManifest:
+        """
+        Return the entries of manifest (scanned with prefix) selected by the rules.
+        """
+        def source_rel(entry: ManifestEntry) -> str:
+            return os.path.relpath(entry.rel, prefix)
+
+        if self.current_kernel_only:
+            kernels = [source_rel(entry) for entry in manifest
+                       if source_rel(entry).startswith('boot/vmlinuz')]
+            running = 'boot/vmlinuz' + (self.kernel_version or '')
+            if self.kernel_version is None or running not in kernels:
+                # Never install a system without a kernel it can boot
+                log_cb(_("Running kernel not found in the source, copying all kernels."))
+                self.kernel_version = None
+
+        selected = manifest.filtered(lambda entry: self.selects(source_rel(entry)))
+        log_cb(_("Selected {count} of {total} files ({size} MiB)").format(
+            count=len(selected), total=len(manifest), size=selected.total_size // (1024 * 1024)))
+        return selected
+
+
+class CopyJournal:
+    """
+    Append-only list of files, kept on the target partition, whose data is
+    known to be on disk. Each line records the relative path together with
+    the source size and mtime, so a resumed install can skip files that
+    were completely copied by an earlier attempt from the same source.
+    """
+
+    def __init__(self, dst: str):
+        self.dst = dst
+        self.path = os.path.join(dst, JOURNAL_NAME)
+        self.done: Dict[str, tuple] = {}
+        self._file = None
+
+    def load(self) -> None:
+        """
+        Read the journal left by a previous attempt. A torn last line
+        (power loss, USB reset) is ignored.
+        """
+        self.done = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.done[record['rel']] = (record['size'], record['mtime'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except (OSError, IOError):
+            pass
+
+    def is_complete(self, entry: ManifestEntry) -> bool:
+        """
+        True if entry was journaled with the same size and mtime and the
+        target file still has the full size.
+        """
+        if self.done.get(entry.rel) != (entry.size, entry.stat.st_mtime_ns):
+            return False
+        try:
+            return os.path.getsize(os.path.join(self.dst, entry.rel)) == entry.size
+        except OSError:
+            return False
+
+    def record(self, entry: ManifestEntry) -> None:
+        """
+        Append entry to the journal and flush it. The caller must make sure
+        the file data itself has been synced first.
+        """
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({'rel': entry.rel, 'size': entry.size,
+                                     'mtime': entry.stat.st_mtime_ns}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def has_copy_journal(dst: str) -> bool:
+    """
+    True if dst holds the copy journal of an interrupted installation.
+    """
+    return os.path.isfile(os.path.join(dst, JOURNAL_NAME))
+
+
+def remove_copy_journal(dst: str) -> None:
+    """
+    Delete the copy journal once the installation has fully succeeded.
+    """
+    try:
+        os.remove(os.path.join(dst, JOURNAL_NAME))
+    except FileNotFoundError:
+        pass
+
 
+def copy_minios_files(src: str, dst: str, progress_cb: Callable, log_cb: Callable, 
+                     config_override: Optional[str] = None, boot_config_type: str = "multilang",
+                     workers: int = DEFAULT_COPY_WORKERS, resume: bool = False,
+                     verify: bool = False, prefetch_memory: int = 0,
+                     direct_io: bool = False,
+                     writeback_limit: int = DEFAULT_WRITEBACK_LIMIT,
+                     order_by_layout: bool = False,
+                     rules: Optional[CopyRules] = None,
+                     efi_dst: Optional[str] = None,
+                     chunk_size: int = COPY_CHUNK_SIZE, autotune: bool = False,
+                     pack_changes: bool = False) -> None:
+    """
+    Copy MiniOS files from src (a directory, .tar.zst/.tar.xz archive, ISO
+    image or mirror URL) to dst with progress reporting, then process the
+    boot configs. progress_cb is called as progress_cb(percent, message, stats).
+    """
     # Get reference to the owner object for cancellation checking
     owner = getattr(progress_cb, "__self__", None)
 
-    entries = []
+    if is_archive(src):
+        written = _copy_archive(src, dst, progress_cb, log_cb, owner, rules, efi_dst)
+        extras = _extra_entries(config_override)
+        for entry in extras:
+            os.makedirs(os.path.dirname(os.path.join(dst, entry.rel)), exist_ok=True)
+        copy_small_files([(entry.path, os.path.join(dst, entry.rel), entry.stat) for entry in extras])
+        _finish_install(written, dst, boot_config_type, pack_changes, progress_cb, log_cb, owner)
+        return
+
+    mirror = MirrorSource(src) if is_mirror_url(src) else None
+    if mirror is not None and not mirror.caching:
+        log_cb(_("Mirror: not caching downloads in {path} (RAM-backed storage)").format(
+            path=mirror.cache_dir))
+    manifest = _build_manifest(src, log_cb, config_override, rules, order_by_layout, mirror)
+
+    # 4) EFI files, queued first so they are done early and the ESP can
+    #    be written while the main partition is busy
+    if efi_dst is not None:
+        efi_prefix = 'EFI' if efi_dst == dst else os.path.join(os.path.abspath(efi_dst), 'EFI')
+        efi = _scan_source(src, 'boot/EFI', efi_prefix, (), mirror)
+        efi.extend(manifest)
+        manifest = efi
+
+    journal = CopyJournal(dst)
+    if resume:
+        journal.load()
+    try:
+        _copy_entries(manifest, dst, progress_cb, log_cb, owner, workers, journal, verify,
+                      prefetch_memory, direct_io, writeback_limit, chunk_size, autotune,
+                      mirror=mirror, sequential=order_by_layout)
+    finally:
+        journal.close()
+    if mirror is not None:
+        log_cb(_("Mirror: {cached} files from the local cache, {size} MiB downloaded").format(
+            cached=mirror.cached, size=mirror.downloaded // (1024 * 1024)))
+
+    _finish_install(manifest, dst, boot_config_type, pack_changes, progress_cb, log_cb, owner)
+
+
+def _finish_install(manifest: SourceManifest, dst: str, boot_config_type: str, pack_changes: bool,
+                    progress_cb: Callable, log_cb: Callable, owner) -> None:
+    """
+    Steps shared by every fresh install once the files are on dst.
+    """
+    _report_extents(manifest, dst, log_cb)
+    if pack_changes:
+        _pack_live_changes(dst, progress_cb, log_cb, owner)
+    _finalize_target(dst, boot_config_type, log_cb)
+
+
+def _pack_live_changes(dst: str, progress_cb: Callable, log_cb: Callable, owner) -> None:
+    """
+    Pack the live session's changes directory into LIVE_CHANGES_MODULE on
+    dst, so they are written as one sequential file instead of thousands
+    of small ones and loaded at boot like any other module. The module
+    uses the compressor of the installed core modules, which the target
+    kernel is known to support.
+    """
+    changes = find_live_changes()
+    if changes is None:
+        log_cb(_("No live session changes to pack."))
+        return
+    compression = _installed_compression(dst) or DEFAULT_COMPRESSION
+    module = os.path.join(dst, LIVE_CHANGES_MODULE)
+    os.makedirs(os.path.dirname(module), exist_ok=True)
+    percent = COPY_PROGRESS_START + COPY_PROGRESS_SPAN
+    log_cb(_("Packing live session changes from {path} ({compression})").format(
+        path=changes, compression=compression))
+
+    def on_progress(done: int) -> None:
+        progress_cb(percent, _("Packing live session changes... {done}%").format(done=done), None)
+
+    size = pack_directory(changes, module, compression, LIVE_CHANGES_EXCLUDE, on_progress,
+                          lambda: bool(owner and owner.cancel_requested))
+    log_cb(_("Packed live session changes into {module} ({size} MiB)").format(
+        module=LIVE_CHANGES_MODULE, size=size // (1024 * 1024)))
+
+
+def _installed_compression(dst: str) -> Optional[str]:
+    """
+    Return the compressor of the first SquashFS module in dst/minios or,
+    failing that, dst/minios/modules.
+    """
+    for directory in (os.path.join(dst, 'minios'), os.path.join(dst, 'minios', 'modules')):
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            compression = squashfs_compression(os.path.join(directory, name)) if name.endswith('.sb') else None
+            if compression:
+                return compression
+    return None
 
+
+def _scan_source(src: str, directory: str = '', prefix: str = 'minios',
+                 exclude: tuple = EXCLUDED_SOURCE_DIRS,
+                 mirror: Optional[MirrorSource] = None) -> SourceManifest:
+    """
+    Scan directory (relative to the MiniOS tree) of a source directory,
+    ISO image or mirror. A missing directory gives an empty manifest.
+    """
+    if mirror is not None:
+        return SourceManifest.scan_mirror(mirror, directory, prefix, exclude)
+    if is_iso_image(src):
+        return SourceManifest.scan_iso(src, os.path.join('minios', directory).rstrip('/'),
+                                       prefix, exclude)
+    path = os.path.join(src, directory)
+    if not os.path.isdir(path):
+        return SourceManifest()
+    return SourceManifest.scan(path, prefix, exclude)
+
+
+def _build_manifest(src: str, log_cb: Callable, config_override: Optional[str] = None,
+                    rules: Optional[CopyRules] = None,
+                    order_by_layout: bool = False,
+                    mirror: Optional[MirrorSource] = None) -> SourceManifest:
+    """
+    Collect everything a fresh install writes to the data partition.
+    """
     # 1) Main tree → minios/
-    for root, dirs, files in os.walk(src):
-        for fn in files:
-            rel = os.path.relpath(os.path.join(root, fn), src)
-            if rel.startswith('changes/'):
-                continue
-            entries.append((os.path.join('minios', rel), os.path.join(root, fn)))
+    if is_iso_image(src) or mirror is not None:
+        manifest = _scan_source(src, mirror=mirror)
+        if not manifest.entries:
+            raise RuntimeError(_("No MiniOS files found in ") + src)
+    else:
+        manifest = SourceManifest.scan(src)
+    if rules is not None:
+        manifest = rules.apply(manifest, log_cb)
+    if order_by_layout:
+        manifest.sort_by_layout()
+    manifest.extend(_extra_entries(config_override))
+    return manifest
+
+
+def _extra_entries(config_override: Optional[str] = None) -> SourceManifest:
+    """
+    Collect the files a fresh install writes next to the MiniOS tree.
+    """
+    manifest = SourceManifest()
 
     # 2) .disk/info
     with open('/tmp/info', 'w', encoding='utf-8') as f:
         f.write('MiniOS')
-    entries.append(('.disk/info', '/tmp/info'))
+    manifest.add('.disk/info', '/tmp/info')
 
     # 3) config.conf
     config_dst = 'minios/config.conf'
     if config_override and os.path.exists(config_override):
-        entries.append((config_dst, config_override))
+        manifest.add(config_dst, config_override)
     else:
         config_src = '/etc/live/config.conf'
         if os.path.exists(config_src):
-            entries.append((config_dst, config_src))
+            manifest.add(config_dst, config_src)
+    return manifest
+
 
-    for rel, path in entries:
+def _archive_source_rel(name: str) -> Optional[str]:
+    """
+    Map an archive member name to a path relative to the MiniOS source
+    root. Archives may hold the tree with or without a leading minios/
+    directory. Returns None for the root itself and for unsafe paths.
+    """
+    rel = os.path.normpath(name.lstrip('/'))
+    if rel == '..' or rel.startswith('../'):
+        return None
+    if rel == 'minios' or rel.startswith('minios/'):
+        rel = rel[len('minios/'):]
+    if rel in ('', '.'):
+        return None
+    return rel
+
+
+def _copy_archive(archive: str, dst: str, progress_cb: Callable, log_cb: Callable, owner,
+                  rules: Optional[CopyRules] = None,
+                  efi_dst: Optional[str] = None) -> SourceManifest:
+    """
+    Extract the MiniOS tree from a compressed tar archive straight onto
+    dst/minios while an ArchiveReader decompresses it in another process.
+    Progress counts compressed bytes consumed. Directories listed in
+    EXCLUDED_SOURCE_DIRS and files not selected by rules are skipped, as
+    are links and special files, which FAT targets cannot hold. With
+    efi_dst set, boot/EFI is also written to efi_dst/EFI. Returns a
+    manifest of the written files (pointing at their target paths).
+    """
+    tracker = _CopyProgress(os.path.getsize(archive), progress_cb, PROGRESS_INTERVAL)
+    if rules is not None and rules.kernel_version is not None:
+        # The kernels in the archive are only known once it has been read
+        log_cb(_("Kernel selection is not available for archives, copying all kernels."))
+        rules.kernel_version = None
+    written = SourceManifest()
+    skipped = 0
+    log_cb(_("Extracting MiniOS archive: ") + archive)
+
+    def check_canceled() -> None:
         if owner and owner.cancel_requested:
             log_cb(_("Installation canceled by user."))
             raise RuntimeError(_("Installation canceled by user."))
 
-        dest = os.path.join(dst, rel)
-        os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with ArchiveReader(archive, progress=tracker.advance) as reader:
+        for member, data in reader.members():
+            check_canceled()
+            source_rel = _archive_source_rel(member.name)
+            if source_rel is None or source_rel.split('/')[0] in EXCLUDED_SOURCE_DIRS:
+                continue
+            rel = os.path.join('minios', source_rel)
+            if member.isdir():
+                os.makedirs(os.path.join(dst, rel), exist_ok=True)
+                continue
+            if data is None:
+                log_cb(_("Skipped archive member: ") + member.name)
+                continue
+            if rules is not None and not rules.selects(source_rel):
+                skipped += 1
+                continue
+
+            targets = [os.path.join(dst, rel)]
+            if efi_dst is not None and source_rel.startswith('boot/EFI/'):
+                targets.append(os.path.join(efi_dst, 'EFI', source_rel[len('boot/EFI/'):]))
+            tracker.start_file(rel)
+            _write_archive_member(data, member, targets, check_canceled)
+            written.add(rel, targets[0])
+    tracker.flush()
 
-        # Report copying start, then perform copy, then log completion
-        size = os.path.getsize(path)
-        # Calculate progress including this file
-        percent = int(18 + (78 * (copied + size) / total))
-        progress_cb(percent, _("Copying MiniOS files: ") + rel)
-        shutil.copy2(path, dest)
-        log_cb(_("Copied file: ") + path)
-        copied += size
+    if skipped:
+        log_cb(_("Skipped {count} files not selected for installation").format(count=skipped))
+    log_cb(_("Extracted {count} files ({size} MiB) from {archive}").format(
+        count=len(written), size=written.total_size // (1024 * 1024), archive=archive))
+    return written
 
+
+def _write_archive_member(data, member, targets: List[str], on_chunk: Callable) -> None:
+    """
+    Write one regular archive member to every path in targets, then apply
+    its permissions and modification time. on_chunk is called before
+    every chunk and may raise to abort the write.
+    """
+    files = []
+    try:
+        for target in targets:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            files.append(open(target, 'wb'))
+            if member.size >= PREALLOCATE_MIN_SIZE:
+                preallocate(files[-1].fileno(), member.size)
+        while True:
+            on_chunk()
+            chunk = data.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            for f in files:
+                f.write(chunk)
+    finally:
+        for f in files:
+            f.close()
+    for target in targets:
+        os.chmod(target, member.mode & 0o7777)
+        os.utime(target, (member.mtime, member.mtime))
+
+
+def copy_minios_files_fanout(src: str, dsts: List[str], progress_cb: Callable, log_cb: Callable,
+                             config_override: Optional[str] = None,
+                             boot_config_type: str = "multilang",
+                             rules: Optional[CopyRules] = None,
+                             efi_dsts: Optional[List[Optional[str]]] = None,
+                             order_by_layout: bool = False) -> Dict[str, Exception]:
+    """
+    Install MiniOS from src to several targets at once, reading every source
+    file a single time and writing each chunk to all targets in parallel.
+    progress_cb is called as progress_cb(dst, percent, message, stats) for
+    each target. efi_dsts gives, per target, where EFI files go (None to
+    skip them). order_by_layout reads the source in on-disk order, as in
+    copy_minios_files().
+    A target that fails is dropped and the others carry on; the failures
+    are returned as a dict of dst → exception. Raises RuntimeError on
+    cancellation or when every target has failed.
+    """
+    owner = getattr(progress_cb, "__self__", None)
+    if is_archive(src) or is_iso_image(src) or is_mirror_url(src):
+        raise RuntimeError(_("Installing to several disks needs an unpacked MiniOS source."))
+    manifest = _build_manifest(src, log_cb, config_override, rules, order_by_layout)
+    trackers = {dst: _CopyProgress(manifest.total_size, functools.partial(progress_cb, dst),
+                                   PROGRESS_INTERVAL)
+                for dst in dsts}
+    failed: Dict[str, Exception] = {}
+
+    def fail(dst: str, error: Exception) -> None:
+        failed[dst] = error
+        log_cb(_("Target {target} failed: {error}").format(target=dst, error=error))
+
+    def live_targets() -> List[str]:
+        return [dst for dst in dsts if dst not in failed]
+
+    def on_chunk(dst: str, nbytes: int) -> None:
+        if owner and owner.cancel_requested:
+            raise _CopyCanceled()
+        trackers[dst].advance(nbytes)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, len(dsts)), thread_name_prefix='minios-fanout')
+    try:
+        for entry in manifest:
+            if owner and owner.cancel_requested:
+                raise _CopyCanceled()
+            targets = []
+            for dst in live_targets():
+                try:
+                    os.makedirs(os.path.dirname(os.path.join(dst, entry.rel)), exist_ok=True)
+                except OSError as e:
+                    fail(dst, e)
+                    continue
+                trackers[dst].start_file(entry.rel)
+                targets.append(dst)
+            if not targets:
+                break
+            errors = fanout_copy(entry.path, [os.path.join(dst, entry.rel) for dst in targets],
+                                 size=entry.size, pool=pool,
+                                 progress=lambda index, nbytes: on_chunk(targets[index], nbytes))
+            for dst, error in zip(targets, errors):
+                if error is not None:
+                    fail(dst, error)
+            log_cb(_("Copied file: ") + entry.path + f" ({METHOD_FANOUT}, {len(targets)} targets)")
+    except _CopyCanceled:
+        log_cb(_("Installation canceled by user."))
+        raise RuntimeError(_("Installation canceled by user."))
+    finally:
+        pool.shutdown(wait=True)
+
+    for index, dst in enumerate(dsts):
+        if dst in failed:
+            continue
+        trackers[dst].flush()
+        try:
+            if efi_dsts and efi_dsts[index]:
+                copy_efi_files(src, efi_dsts[index], log_cb)
+            _finalize_target(dst, boot_config_type, log_cb)
+        except (OSError, RuntimeError) as e:
+            fail(dst, e)
+
+    if len(failed) == len(dsts):
+        raise RuntimeError(_("Installation failed on every target."))
+    return failed
+
+
+def update_minios_files(src: str, dst: str, progress_cb: Callable, log_cb: Callable,
+                        boot_config_type: str = "multilang", workers: int = DEFAULT_COPY_WORKERS,
+                        compare_hash: bool = False, verify: bool = False,
+                        writeback_limit: int = DEFAULT_WRITEBACK_LIMIT,
+                        delta: bool = True) -> None:
+    """
+    Bring an existing MiniOS installation mounted at dst up to date with src.
+    Only files whose size or mtime differ (or whose content differs, with
+    compare_hash=True) are copied. With delta=True (the default) modules
+    already on the target are updated in place by delta_update(), which
+    only rewrites the blocks that changed. System modules and boot files that are
+    no longer shipped are removed; user modules in modules/, changes/ and
+    the installed config.conf are left untouched. Boot configs are then
+    processed again.
+    """
+    owner = getattr(progress_cb, "__self__", None)
+
+    if is_archive(src) or is_iso_image(src) or is_mirror_url(src):
+        raise RuntimeError(_("Updating needs an unpacked MiniOS source."))
+    if not os.path.isdir(os.path.join(dst, 'minios')):
+        raise RuntimeError(_("No MiniOS installation found on the target."))
+
+    # The installed config.conf holds the user's settings, not the source's
+    manifest = SourceManifest.scan(src).filtered(lambda entry: entry.rel != 'minios/config.conf')
+    changed = manifest.filtered(lambda entry: _target_differs(entry, dst, compare_hash))
+    log_cb(_("Update: {changed} of {total} files changed ({size} MiB to copy)").format(
+        changed=len(changed), total=len(manifest), size=changed.total_size // (1024 * 1024)))
+
+    _copy_entries(changed, dst, progress_cb, log_cb, owner, workers, verify=verify,
+                  writeback_limit=writeback_limit, delta=delta)
+    _remove_stale_files(manifest, dst, log_cb)
+    _finalize_target(dst, boot_config_type, log_cb)
+
+
+def _target_differs(entry: ManifestEntry, dst: str, compare_hash: bool) -> bool:
+    """
+    True if the installed copy of entry is missing or not identical to the source.
+    """
+    target = os.path.join(dst, entry.rel)
+    try:
+        st = os.stat(target)
+    except OSError:
+        return True
+    if st.st_size != entry.size:
+        return True
+    if compare_hash:
+        return _hash_file(target) != _hash_file(entry.path)
+    return abs(st.st_mtime_ns - entry.stat.st_mtime_ns) > MTIME_TOLERANCE_NS
+
+
+def _hash_file(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hash_fd(f.fileno(), os.fstat(f.fileno()).st_size)
+
+
+def _remove_stale_files(manifest: SourceManifest, dst: str, log_cb: Callable) -> None:
+    """
+    Delete system modules (top-level minios/*.sb) and kernel/initramfs
+    images that the new source no longer ships, so old kernels or renamed
+    modules are not picked up at boot. Files written by the bootloader
+    installer (ldlinux.sys etc.) are never touched.
+    """
+    shipped = {entry.rel for entry in manifest}
+    minios_dir = os.path.join(dst, 'minios')
+    candidates = [os.path.join('minios', fn) for fn in os.listdir(minios_dir) if fn.endswith('.sb')]
+    boot_dir = os.path.join(minios_dir, 'boot')
+    if os.path.isdir(boot_dir):
+        candidates += [os.path.join('minios', 'boot', fn) for fn in os.listdir(boot_dir)
+                       if fn.startswith(('vmlinuz', 'initrfs', 'initrd'))]
+
+    for rel in candidates:
+        if rel not in shipped and os.path.isfile(os.path.join(dst, rel)):
+            os.remove(os.path.join(dst, rel))
+            log_cb(_("Removed obsolete file: ") + rel)
+
+
+def _report_extents(manifest: SourceManifest, dst: str, log_cb: Callable) -> None:
+    """
+    Log how many extents every installed .sb module occupies on the target.
+    """
+    modules = [entry for entry in manifest if entry.rel.endswith('.sb')]
+    contiguous = 0
+    for entry in modules:
+        count = extent_count(os.path.join(dst, entry.rel))
+        if count is None:
+            log_cb(_("Extent counts are not available on this filesystem."))
+            return
+        if count <= 1:
+            contiguous += 1
+        log_cb(_("Module {name}: {count} extents").format(name=entry.rel, count=count))
+    if modules:
+        log_cb(_("{contiguous} of {total} modules are contiguous on the target").format(
+            contiguous=contiguous, total=len(modules)))
+
+
+def _finalize_target(dst: str, boot_config_type: str, log_cb: Callable) -> None:
+    """
+    Create the standard MiniOS directories and apply the boot menu configuration.
+    """
     # Create required directories
     for sub in ('boot', 'modules', 'changes', 'scripts'):
         p = os.path.join(dst, 'minios', sub)
@@ -86,6 +888,462 @@ def copy_minios_files(src: str, dst: str, progress_cb: Callable, log_cb: Callabl
     _process_syslinux_config(dst, boot_config_type, log_cb)
 
 
+class _CopyCanceled(Exception):
+    """Raised inside a worker to abort a file copy that is in progress."""
+
+
+class CopyStats(NamedTuple):
+    """
+    Copy statistics passed as the third argument of progress callbacks.
+    rate is the moving-average throughput in bytes per second and eta the
+    estimated seconds left; both are None until they can be measured.
+    """
+    copied: int
+    total: int
+    rate: Optional[float] = None
+    eta: Optional[float] = None
+
+
+def io_defaults_for_transport(transport: str) -> Tuple[int, int]:
+    """
+    Return the starting (chunk_size, workers) for a target disk transport.
+    """
+    return TRANSPORT_IO_DEFAULTS.get(transport, (COPY_CHUNK_SIZE, DEFAULT_COPY_WORKERS))
+
+
+class _IOTuner:
+    """
+    Adjusts the copy chunk size and the number of files copied at once
+    during the first seconds of a copy. Every setting is measured for
+    `period` seconds; first the worker count, then the chunk size is
+    doubled while that raises throughput by at least TUNE_GAIN, or halved
+    if doubling did not help. Changes that do not pay off are reverted.
+    Workers call acquire()/release() around each copy so that lowering
+    the worker count takes effect without resizing the thread pool.
+    Copies are admitted in submission order, so none waits behind a
+    later one; the prefetch reader serves files in that same order.
+    """
+
+    def __init__(self, chunk_size: int, workers: int, max_workers: int, log_cb: Callable,
+                 period: float = TUNE_PERIOD):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.max_workers = max_workers
+        self.log_cb = log_cb
+        self.period = period
+        self.settled = False
+        self._limits = {'workers': (1, max_workers), 'chunk_size': (TUNE_MIN_CHUNK, TUNE_MAX_CHUNK)}
+        self._dims = ['workers', 'chunk_size']
+        self._factor = 2.0
+        self._improved = False
+        self._trial = None
+        self._best = None
+        self._mark = None
+        self._active = 0
+        self._next_ticket = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, ticket: int) -> bool:
+        """
+        Wait until copy number ticket may start; False once closed.
+        """
+        with self._cond:
+            while not self._closed and (ticket != self._next_ticket or self._active >= self.workers):
+                self._cond.wait()
+            if self._closed:
+                return False
+            self._next_ticket += 1
+            self._active += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """
+        Turn away every copy still waiting in acquire().
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def update(self, now: float, transferred: int) -> None:
+        """
+        Feed the current byte count; switches settings once a period is over.
+        """
+        if self.settled:
+            return
+        if self._mark is None:
+            self._mark = (now, transferred)
+            return
+        start, start_bytes = self._mark
+        if now - start < self.period:
+            return
+        rate = (transferred - start_bytes) / (now - start)
+        self._mark = (now, transferred)
+
+        if self._trial is None:
+            self._best = rate
+        elif rate >= self._best * (1 + TUNE_GAIN):
+            self._best = rate
+            self._improved = True
+        else:
+            dim, old = self._trial
+            self._set(dim, old)
+            if self._factor > 1 and not self._improved:
+                self._factor = 0.5
+            else:
+                self._next_dim()
+        self._trial = None
+        self._propose()
+
+    def _propose(self) -> None:
+        # Try the next setting of the current dimension that fits its limits
+        while not self.settled:
+            dim = self._dims[0]
+            low, high = self._limits[dim]
+            old = getattr(self, dim)
+            new = max(low, min(high, int(old * self._factor)))
+            if new != old:
+                self._set(dim, new)
+                self._trial = (dim, old)
+                return
+            if self._factor > 1 and not self._improved:
+                self._factor = 0.5
+            else:
+                self._next_dim()
+
+    def _next_dim(self) -> None:
+        self._dims.pop(0)
+        self._factor = 2.0
+        self._improved = False
+        if not self._dims:
+            self.finish()
+
+    def _set(self, dim: str, value: int) -> None:
+        with self._cond:
+            setattr(self, dim, value)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        """
+        Stop tuning and log the settings in use.
+        """
+        if self.settled:
+            return
+        self.settled = True
+        self.log_cb(_("I/O settings: {chunk} KiB chunks, {workers} files at a time").format(
+            chunk=self.chunk_size // 1024, workers=self.workers))
+
+
+def format_copy_stats(stats: CopyStats) -> str:
+    """
+    Format throughput and ETA for display, e.g. "38.2 MB/s, 4:05 remaining".
+    """
+    if stats.rate is None:
+        return _("measuring speed...")
+    text = _("{rate:.1f} MB/s").format(rate=stats.rate / 1e6)
+    if stats.eta is not None:
+        minutes, seconds = divmod(int(stats.eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        remaining = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+        text += ", " + _("{time} remaining").format(time=remaining)
+    return text
+
+
+class _CopyProgress:
+    """
+    Thread-safe byte counter shared by the copy workers. Forwards progress
+    to progress_cb when a file starts and, while data is being written,
+    at most once every PROGRESS_INTERVAL seconds. Every update carries a
+    CopyStats with the throughput averaged over the last `window` seconds.
+    """
+
+    def __init__(self, total: int, progress_cb: Callable, interval: float = PROGRESS_INTERVAL,
+                 window: float = THROUGHPUT_WINDOW):
+        self.total = max(total, 1)
+        self.progress_cb = progress_cb
+        self.interval = interval
+        self.window = window
+        self.copied = 0
+        self.message = ""
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        # (time, bytes transferred) samples; bytes skipped on resume do
+        # not count towards the throughput
+        self.transferred = 0
+        self._samples = deque([(time.monotonic(), 0)])
+
+    def start_file(self, rel: str) -> None:
+        with self._lock:
+            self.message = _("Copying MiniOS files: ") + rel
+            self._emit(time.monotonic())
+
+    def advance(self, nbytes: int) -> None:
+        with self._lock:
+            self.copied += nbytes
+            self.transferred += nbytes
+            now = time.monotonic()
+            if now - self._last_emit >= self.interval:
+                self._emit(now)
+
+    def skip(self, nbytes: int) -> None:
+        """
+        Count bytes that are already on the target without copying them.
+        """
+        with self._lock:
+            self.copied += nbytes
+
+    def flush(self) -> None:
+        with self._lock:
+            self._emit(time.monotonic())
+
+    def percent(self) -> float:
+        fraction = min(self.copied / self.total, 1.0)
+        return COPY_PROGRESS_START + COPY_PROGRESS_SPAN * fraction
+
+    def stats(self, now: float) -> CopyStats:
+        samples = self._samples
+        samples.append((now, self.transferred))
+        # Keep one sample older than the window as the starting point
+        while len(samples) > 2 and now - samples[1][0] >= self.window:
+            samples.popleft()
+        start_time, start_bytes = samples[0]
+        if now <= start_time:
+            return CopyStats(self.copied, self.total)
+        rate = (self.transferred - start_bytes) / (now - start_time)
+        eta = max(self.total - self.copied, 0) / rate if rate > 0 else None
+        return CopyStats(self.copied, self.total, rate, eta)
+
+    def _emit(self, now: float) -> None:
+        self._last_emit = now
+        self.progress_cb(self.percent(), self.message, self.stats(now))
+
+
+def _copy_entries(manifest: SourceManifest, dst: str, progress_cb: Callable,
+                  log_cb: Callable, owner, workers: int,
+                  journal: Optional[CopyJournal] = None, verify: bool = False,
+                  prefetch_memory: int = 0, direct_io: bool = False,
+                  writeback_limit: int = 0, chunk_size: int = COPY_CHUNK_SIZE,
+                  autotune: bool = False, delta: bool = False,
+                  mirror: Optional[MirrorSource] = None, sequential: bool = False) -> None:
+    """
+    Copy the manifest entries into dst using a pool of worker threads.
+    Raises RuntimeError on cancellation and re-raises the first copy error;
+    the options are those of copy_minios_files() and update_minios_files().
+    """
+    stop = threading.Event()
+    started = time.monotonic()
+    # Holes in sparse files are not copied, so progress counts allocated bytes
+    tracker = _CopyProgress(manifest.total_allocated, progress_cb, PROGRESS_INTERVAL)
+    methods = {}
+    verified = []
+    mismatched = []
+
+    todo = manifest.entries
+    if journal is not None and journal.done:
+        todo = [entry for entry in manifest if not journal.is_complete(entry)]
+        skipped = len(manifest) - len(todo)
+        if skipped:
+            skipped_size = manifest.total_size - sum(entry.size for entry in todo)
+            tracker.skip(manifest.total_allocated - sum(entry.allocated for entry in todo))
+            log_cb(_("Resuming installation: {count} files ({size} MiB) already on target").format(
+                count=skipped, size=skipped_size // (1024 * 1024)))
+
+    # Create every target directory once instead of once per file
+    for directory in sorted({os.path.dirname(os.path.join(dst, entry.rel)) for entry in todo}):
+        os.makedirs(directory, exist_ok=True)
+
+    # Held by every thread reading a seek-bound source
+    source_lock = threading.Lock() if sequential else None
+
+    def is_small(entry: ManifestEntry) -> bool:
+        return (not verify and entry.size < SMALL_FILE_SIZE and entry.allocated == entry.size
+                and entry.extents is None and not is_mirror_url(entry.path))
+
+    def is_sparse(entry: ManifestEntry) -> bool:
+        return entry.allocated < entry.size
+
+    # Modules updated in place by delta_update()
+    updated = set()
+    if delta:
+        updated = {entry.rel for entry in todo if not is_small(entry) and entry.rel.endswith('.sb')
+                   and os.path.isfile(os.path.join(dst, entry.rel))}
+
+    def reads_itself(entry: ManifestEntry) -> bool:
+        # Sparse files skip the prefetch reader so their holes are not read;
+        # delta updates, files inside images and mirror files read the
+        # source themselves
+        return (is_sparse(entry) or entry.rel in updated or entry.extents is not None
+                or is_mirror_url(entry.path))
+
+    prefetched = [entry for entry in todo if not is_small(entry) and not reads_itself(entry)]
+    workers = max(1, workers)
+    tuner = None
+    if autotune:
+        tuner = _IOTuner(chunk_size, workers, max(workers, TUNE_MAX_WORKERS), log_cb)
+        log_cb(_("Starting I/O settings: {chunk} KiB chunks, {workers} files at a time").format(
+            chunk=chunk_size // 1024, workers=workers))
+
+    def journaled(entry: ManifestEntry) -> bool:
+        return journal is not None and entry.size >= JOURNAL_MIN_SIZE
+
+    reader = None
+    if prefetch_memory > 0:
+        reader = PrefetchReader([(entry.path, entry.size) for entry in prefetched], prefetch_memory,
+                                lock=source_lock)
+        reader.start()
+
+    def on_chunk(nbytes: int) -> None:
+        if stop.is_set():
+            raise _CopyCanceled()
+        tracker.advance(nbytes)
+
+    def copy_one(index: Optional[int], entry: ManifestEntry) -> Optional[CopyResult]:
+        dest = os.path.join(dst, entry.rel)
+        window = writeback_limit // (tuner.workers if tuner else workers)
+        tracker.start_file(entry.rel)
+        if entry.rel in updated:
+            return delta_update(entry.path, dest, size=entry.size, progress=on_chunk,
+                                sync=journaled(entry), verify=verify)
+        if mirror is not None and is_mirror_url(entry.path):
+            return mirror.copy(entry.path, dest,
+                               chunk_size=tuner.chunk_size if tuner else chunk_size,
+                               progress=on_chunk, sync=journaled(entry), verify=verify,
+                               writeback_window=window)
+        if entry.extents is not None:
+            return copy_extents(entry.path, entry.extents, dest, entry.stat,
+                                chunk_size=tuner.chunk_size if tuner else chunk_size,
+                                progress=on_chunk, sync=journaled(entry), verify=verify,
+                                writeback_window=window, read_lock=source_lock)
+        if reader is not None and index is not None:
+            return copy_prefetched(reader, index, entry.path, dest, progress=on_chunk,
+                                   sync=journaled(entry), verify=verify,
+                                   writeback_window=window)
+        return copy_file(entry.path, dest, size=entry.size,
+                         chunk_size=tuner.chunk_size if tuner else chunk_size, progress=on_chunk,
+                         sync=journaled(entry), verify=verify, direct=direct_io,
+                         writeback_window=window, read_lock=source_lock)
+
+    def copy_batch(batch: List[ManifestEntry]) -> Optional[CopyResult]:
+        tracker.start_file(os.path.dirname(batch[0].rel))
+        return copy_small_files([(entry.path, os.path.join(dst, entry.rel), entry.stat)
+                                 for entry in batch], progress=on_chunk, read_lock=source_lock)
+
+    def run(ticket: int, copy: Callable, *args) -> Optional[CopyResult]:
+        # Files still queued when the install is aborted are never started
+        if stop.is_set():
+            return None
+        if tuner is None:
+            return copy(*args)
+        if not tuner.acquire(ticket):
+            return None
+        try:
+            if stop.is_set():
+                return None
+            return copy(*args)
+        finally:
+            tuner.release()
+
+    # Workers pick files up in submission order, which is also the order
+    # the prefetch reader reads them in
+    pool = ThreadPoolExecutor(max_workers=tuner.max_workers if tuner else workers,
+                              thread_name_prefix='minios-copy')
+    pending = {}
+    tickets = itertools.count()
+
+    def submit(entries: List[ManifestEntry], copy: Callable, *args) -> None:
+        pending[pool.submit(run, next(tickets), copy, *args)] = entries
+
+    batch = []
+    index = 0
+    for entry in todo:
+        if is_small(entry):
+            batch.append(entry)
+            if len(batch) == SMALL_FILE_BATCH:
+                submit(batch, copy_batch, batch)
+                batch = []
+        elif reads_itself(entry):
+            submit([entry], copy_one, None, entry)
+        else:
+            # index is the position in `prefetched`, as used by the prefetch reader
+            submit([entry], copy_one, index, entry)
+            index += 1
+    if batch:
+        submit(batch, copy_batch, batch)
+    try:
+        while pending:
+            if owner and owner.cancel_requested:
+                log_cb(_("Installation canceled by user."))
+                raise RuntimeError(_("Installation canceled by user."))
+
+            done, _still_running = wait(pending, timeout=CANCEL_POLL_INTERVAL,
+                                        return_when=FIRST_COMPLETED)
+            if tuner is not None:
+                tuner.update(time.monotonic(), tracker.transferred)
+            for future in done:
+                entries = pending.pop(future)
+                result = future.result()
+                methods[result.method] = methods.get(result.method, 0) + len(entries)
+                if result.method == METHOD_BATCHED:
+                    log_cb(_("Copied {count} small files ({size} KiB)").format(
+                        count=len(entries), size=result.size // 1024))
+                    continue
+                entry = entries[0]
+                if verify:
+                    (verified if result.verified else mismatched).append(entry)
+                # Never let a resumed install trust a corrupted file
+                if journaled(entry) and (result.verified or not verify):
+                    journal.record(entry)
+                if result.method == METHOD_DELTA:
+                    log_cb(_("Updated file: {path} ({written} of {size} KiB rewritten)").format(
+                        path=entry.path, written=result.size // 1024, size=entry.size // 1024))
+                else:
+                    log_cb(_("Copied file: ") + entry.path + f" ({result.method})")
+    finally:
+        # Drop queued work and wait for in-flight copies so nothing is still
+        # writing to the target when the caller moves on or unmounts
+        stop.set()
+        for future in pending:
+            future.cancel()
+        if tuner is not None:
+            tuner.close()
+        if reader is not None:
+            reader.close()
+        pool.shutdown(wait=True)
+
+    if tuner is not None:
+        tuner.finish()
+    tracker.flush()
+    elapsed = time.monotonic() - started
+    if tracker.transferred and elapsed > 0:
+        log_cb(_("Copied {size} MiB in {seconds:.0f} s ({rate:.1f} MB/s average)").format(
+            size=tracker.transferred // (1024 * 1024), seconds=elapsed,
+            rate=tracker.transferred / elapsed / 1e6))
+    if methods:
+        log_cb(_("Transfer methods used: ") +
+               ", ".join(f"{method}: {count}" for method, count in sorted(methods.items())))
+    if verify:
+        _report_verification(verified, mismatched, log_cb)
+
+
+def _report_verification(verified: List[ManifestEntry], mismatched: List[ManifestEntry],
+                         log_cb: Callable) -> None:
+    """
+    Log the checksum verification report; raise if any file differs.
+    """
+    log_cb(_("Verification report: {ok} files verified, {bad} mismatched").format(
+        ok=len(verified), bad=len(mismatched)))
+    for entry in mismatched:
+        log_cb(_("Checksum mismatch: ") + entry.rel)
+    if mismatched:
+        raise RuntimeError(_("Verification failed for {count} files; the target media may be faulty.").format(
+            count=len(mismatched)))
+
+
 def copy_efi_files(src: str, dst: str, log_cb: Callable) -> None:
     """
     Copy EFI files from src/boot/EFI → dst/EFI/...
@@ -100,15 +1358,84 @@ def copy_efi_files(src: str, dst: str, log_cb: Callable) -> None:
             src_path = os.path.join(root, fn)
             dest_path = os.path.join(dst, 'EFI', rel)
             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-            shutil.copy2(src_path, dest_path)
-            log_cb(_("Copied EFI file: ") + src_path)
+            result = copy_file(src_path, dest_path)
+            log_cb(_("Copied EFI file: ") + src_path + f" ({result.method})")
 
 
-def find_minios_source() -> Optional[str]:
+def is_copy_to_ram() -> bool:
+    """
+    True if the live system was booted with the 'toram' option, i.e. it runs
+    from the page cache and must not have it evicted by a large copy.
+    """
+    try:
+        with open('/proc/cmdline', 'r') as f:
+            params = f.read().split()
+    except (IOError, OSError):
+        return False
+    return any(param == 'toram' or param.startswith('toram=') for param in params)
+
+
+def get_boot_files_from_cmdline() -> tuple:
+    """
+    Extract the running kernel and initramfs filenames from /proc/cmdline.
+    Returns (vmlinuz, initramfs); either may be None.
+    """
+    try:
+        with open('/proc/cmdline', 'r') as f:
+            cmdline = f.read().strip()
+
+        vmlinuz_file = None
+        initramfs_file = None
+
+        # Parse boot parameters (support multiple formats)
+        for param in cmdline.split():
+            # GRUB: BOOT_IMAGE= parameter contains kernel path
+            if param.startswith('BOOT_IMAGE='):
+                boot_path = param.split('=', 1)[1]
+                # Extract filename from path like /minios/boot/vmlinuz-version
+                vmlinuz_file = os.path.basename(boot_path)
+            # SYSLINUX: linux= parameter
+            elif param.startswith('linux='):
+                boot_path = param.split('=', 1)[1]
+                vmlinuz_file = os.path.basename(boot_path)
+            # initrd parameter
+            elif param.startswith('initrd='):
+                initrd_path = param.split('=', 1)[1]
+                # Extract filename from path like /minios/boot/initrfs-version.img
+                initramfs_file = os.path.basename(initrd_path)
+
+        # If we found kernel but no initramfs, try to guess initramfs name
+        if vmlinuz_file and not initramfs_file:
+            # Convert vmlinuz-version to initrfs-version.img
+            if vmlinuz_file.startswith('vmlinuz-'):
+                version = vmlinuz_file[8:]  # Remove 'vmlinuz-' prefix
+                initramfs_file = f'initrfs-{version}.img'
+            elif vmlinuz_file.startswith('vmlinuz'):
+                # Handle generic vmlinuz case
+                initramfs_file = 'initrd.img'
+
+        return vmlinuz_file, initramfs_file
+    except (IOError, OSError):
+        return None, None
+
+
+def find_minios_source(source: Optional[str] = None) -> Optional[str]:
     """
     Find the MiniOS source directory from common locations.
+    With source given (from the command line), only that is checked: a
+    MiniOS directory, a directory holding minios/, a .tar.zst/.tar.xz
+    archive of the tree, a MiniOS ISO image, which is read without
+    mounting it, or the http(s) URL of a mirror (see MirrorSource).
     Returns the path if found, None otherwise.
     """
+    if source:
+        if is_mirror_url(source) or is_archive(source) or is_iso_image(source):
+            return source
+        for candidate in (os.path.join(source, 'minios'), source):
+            if os.path.isdir(os.path.join(candidate, 'boot')):
+                return candidate
+        return None
+
     # Check both livekit and dracut initramfs paths
     candidates = [
         "/run/initramfs/memory/data/minios",
@@ -117,46 +1444,6 @@ def find_minios_source() -> Optional[str]:
         "/lib/live/mount/iso/minios"
     ]
 
-    def get_boot_files_from_cmdline():
-        """Extract vmlinuz and initramfs filenames from /proc/cmdline"""
-        try:
-            with open('/proc/cmdline', 'r') as f:
-                cmdline = f.read().strip()
-
-            vmlinuz_file = None
-            initramfs_file = None
-
-            # Parse boot parameters (support multiple formats)
-            for param in cmdline.split():
-                # GRUB: BOOT_IMAGE= parameter contains kernel path
-                if param.startswith('BOOT_IMAGE='):
-                    boot_path = param.split('=', 1)[1]
-                    # Extract filename from path like /minios/boot/vmlinuz-version
-                    vmlinuz_file = os.path.basename(boot_path)
-                # SYSLINUX: linux= parameter
-                elif param.startswith('linux='):
-                    boot_path = param.split('=', 1)[1]
-                    vmlinuz_file = os.path.basename(boot_path)
-                # initrd parameter
-                elif param.startswith('initrd='):
-                    initrd_path = param.split('=', 1)[1]
-                    # Extract filename from path like /minios/boot/initrfs-version.img
-                    initramfs_file = os.path.basename(initrd_path)
-
-            # If we found kernel but no initramfs, try to guess initramfs name
-            if vmlinuz_file and not initramfs_file:
-                # Convert vmlinuz-version to initrfs-version.img
-                if vmlinuz_file.startswith('vmlinuz-'):
-                    version = vmlinuz_file[8:]  # Remove 'vmlinuz-' prefix
-                    initramfs_file = f'initrfs-{version}.img'
-                elif vmlinuz_file.startswith('vmlinuz'):
-                    # Handle generic vmlinuz case
-                    initramfs_file = 'initrd.img'
-
-            return vmlinuz_file, initramfs_file
-        except (IOError, OSError):
-            return None, None
-
     for candidate in candidates:
         if os.path.isdir(candidate):
             boot_dir = os.path.join(candidate, "boot")
@@ -187,23 +1474,6 @@ def find_minios_source() -> Optional[str]:
     return None
 
 
-def _calculate_copy_size(src: str) -> int:
-    """
-    Calculate total size of files to be copied.
-    """
-    total = 0
-    for root, dirs, files in os.walk(src):
-        for fn in files:
-            rel = os.path.relpath(os.path.join(root, fn), src)
-            if rel.startswith('changes/'):
-                continue
-            try:
-                total += os.path.getsize(os.path.join(root, fn))
-            except (OSError, IOError):
-                pass
-    return total
-
-
 def _remove_live_config_params(content: str) -> str:
     """
     Remove live-config parameters (locales, timezone, keyboard-layouts) from boot config.
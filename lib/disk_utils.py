@@ -184,6 +184,26 @@ def get_disk_size_mib(device: str) -> int:
     raise RuntimeError(_("Could not parse disk size."))
 
 
+def is_seek_bound_source(path: str) -> bool:
+    """
+    True if path lives on a rotational disk or optical media, where
+    copying files in on-disk order and reading them one at a time
+    saves seeks. Unknown devices count as not seek-bound.
+    """
+    try:
+        device = run_command(['findmnt', '-n', '-o', 'SOURCE', '--target', path],
+                             _("Failed to detect source device.")).strip().split('[')[0]
+        # Lists the device followed by every device it sits on
+        output = run_command(['lsblk', '-s', '-n', '-P', '-o', 'ROTA,TYPE', device],
+                             _("Failed to detect source device."))
+    except (RuntimeError, OSError):
+        return False
+    for rota, dev_type in re.findall(r'ROTA="([^"]*)" TYPE="([^"]*)"', output):
+        if rota == '1' or dev_type == 'rom':
+            return True
+    return False
+
+
 def partition_disk(device: str, fs: str, use_gpt: bool) -> None:
     """
     Partition the disk; if fs is not 'fat32', create an EFI partition.
@@ -228,6 +248,47 @@ def partition_disk(device: str, fs: str, use_gpt: bool) -> None:
         )
 
 
+def get_filesystem_type(part: str) -> Optional[str]:
+    """
+    Return the filesystem type reported by blkid for part, or None.
+    """
+    try:
+        return run_command(
+            ['blkid', '-o', 'value', '-s', 'TYPE', part],
+            _("Could not determine filesystem type of ") + part + "."
+        ).strip() or None
+    except RuntimeError:
+        return None
+
+
+def get_partition_table_type(device: str) -> Optional[str]:
+    """
+    Return the partition table type ('dos' or 'gpt') of device, or None.
+    """
+    try:
+        return run_command(
+            ['blkid', '-o', 'value', '-s', 'PTTYPE', device],
+            _("Could not read partition table of ") + device + "."
+        ).strip() or None
+    except RuntimeError:
+        return None
+
+
+def partition_layout_matches(device: str, fs: str, primary: str, efi: Optional[str],
+                             use_gpt: bool) -> bool:
+    """
+    Check whether the device already carries the layout that partition_disk()
+    and format_partitions() would create, so a resumed install can keep it.
+    """
+    if get_partition_table_type(device) != ('gpt' if (efi and use_gpt) else 'dos'):
+        return False
+    if get_filesystem_type(primary) != ('vfat' if fs == 'fat32' else fs):
+        return False
+    if efi and get_filesystem_type(efi) != 'vfat':
+        return False
+    return True
+
+
 def zero_fill_disk(device: str) -> None:
     """
     Overwrite the beginning of the disk with zeros (2MB).
@@ -0,0 +1,959 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MiniOS Installer - I/O Utilities
+Low-level file transfer helpers used when copying MiniOS files.
+
+Copyright (C) 2025 MiniOS Linux
+Author: crims0n <crims0n@minios.dev>
+"""
+
+import os
+import errno
+import shutil
+import stat
+import ctypes
+import ctypes.util
+import fcntl
+import hashlib
+import mmap
+import queue
+import struct
+import threading
+import zlib
+from typing import NamedTuple, Optional, Callable, List, Tuple, Iterator
+
+# Largest amount of data moved by a single transfer call
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+METHOD_COPY_FILE_RANGE = 'copy_file_range'
+METHOD_SENDFILE = 'sendfile'
+METHOD_BUFFERED = 'buffered'
+METHOD_PREFETCH = 'prefetch'
+METHOD_DIRECT = 'direct'
+METHOD_FANOUT = 'fanout'
+METHOD_BATCHED = 'batched'
+METHOD_SPARSE = 'sparse'
+METHOD_DELTA = 'delta'
+METHOD_EXTENTS = 'extents'
+
+# Block size compared by delta updates; the default squashfs block size
+DELTA_BLOCK_SIZE = 128 * 1024
+
+# Offset/length alignment used for O_DIRECT writes (covers 512 and 4K sector devices)
+DIRECT_IO_ALIGNMENT = 4096
+
+# Targets at least this large are flushed and dropped from the page cache
+# once written; smaller files are not worth a separate flush
+CACHE_DROP_MIN_SIZE = 1024 * 1024
+
+# sync_file_range(2) flags from <fcntl.h>
+SYNC_FILE_RANGE_WAIT_BEFORE = 1
+SYNC_FILE_RANGE_WRITE = 2
+SYNC_FILE_RANGE_WAIT_AFTER = 4
+
+# fallocate(2) mode that allocates blocks without changing the file size
+FALLOC_FL_KEEP_SIZE = 1
+
+# Targets at least this large get their space reserved before writing
+PREALLOCATE_MIN_SIZE = 1024 * 1024
+
+# FIEMAP ioctl from <linux/fs.h>: struct fiemap header followed by one
+# struct fiemap_extent, of which only fe_physical is read
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP_FLAG_SYNC = 0x1
+_FIEMAP_HEADER = struct.Struct('=QQIIII')
+_FIEMAP_EXTENT = struct.Struct('=QQQQQIIII')
+
+# How long pipeline threads block before re-checking for shutdown (seconds)
+_PIPELINE_POLL_INTERVAL = 0.1
+
+# errno values meaning "this transfer method can't handle these two files",
+# as opposed to a real I/O error that has to be reported
+_FALLBACK_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EBADF,
+    errno.ETXTBSY,
+}
+
+
+class CopyResult(NamedTuple):
+    """Outcome of a single file copy. Digests are only set for verified copies."""
+    method: str
+    size: int
+    digest: Optional[str] = None
+    target_digest: Optional[str] = None
+
+    @property
+    def verified(self) -> bool:
+        return self.digest is not None and self.digest == self.target_digest
+
+
+class _MethodUnusable(Exception):
+    """Raised by a transfer step when the next method should take over."""
+
+
+def _copy_file_range_step(in_fd: int, out_fd: int, in_offset: int, out_offset: int,
+                          count: int) -> int:
+    try:
+        n = os.copy_file_range(in_fd, out_fd, count, in_offset, out_offset)
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS:
+            raise _MethodUnusable() from e
+        raise
+    # Some filesystems (procfs, older kernels across mounts) report 0 instead
+    # of an error; let the next method decide whether this is really EOF
+    if n == 0:
+        raise _MethodUnusable()
+    return n
+
+
+def _sendfile_step(in_fd: int, out_fd: int, in_offset: int, out_offset: int, count: int) -> int:
+    try:
+        # sendfile() writes at the current position of out_fd
+        os.lseek(out_fd, out_offset, os.SEEK_SET)
+        n = os.sendfile(out_fd, in_fd, in_offset, count)
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS:
+            raise _MethodUnusable() from e
+        raise
+    if n == 0:
+        raise _MethodUnusable()
+    return n
+
+
+def _buffered_step(in_fd: int, out_fd: int, in_offset: int, out_offset: int, count: int) -> int:
+    data = os.pread(in_fd, count, in_offset)
+    if not data:
+        return 0
+    return os.pwrite(out_fd, data, out_offset)
+
+
+class _NoLock:
+    """Stands in for a read lock where the caller did not pass one."""
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NO_LOCK = _NoLock()
+
+
+def _locked_read_step(read_lock):
+    # Read under read_lock, write outside it
+    def step(in_fd: int, out_fd: int, in_offset: int, out_offset: int, count: int) -> int:
+        with read_lock:
+            data = os.pread(in_fd, count, in_offset)
+        if data:
+            write_all(out_fd, data, out_offset)
+        return len(data)
+    return step
+
+
+def _transfer_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append((METHOD_COPY_FILE_RANGE, _copy_file_range_step))
+    if hasattr(os, 'sendfile'):
+        methods.append((METHOD_SENDFILE, _sendfile_step))
+    methods.append((METHOD_BUFFERED, _buffered_step))
+    return methods
+
+
+def transfer(in_fd: int, out_fd: int, size: int, chunk_size: int = COPY_CHUNK_SIZE,
+             progress: Optional[Callable[[int], None]] = None,
+             in_offset: int = 0, out_offset: int = 0,
+             read_lock: Optional[threading.Lock] = None) -> str:
+    """
+    Copy `size` bytes of in_fd starting at in_offset to out_fd starting at
+    out_offset (by default the start of both files). Tries copy_file_range, then sendfile, then a plain read/write loop, so
+    data stays in the kernel whenever the filesystems allow it. A method
+    that gives up halfway hands over at the current offset.
+    progress, if given, is called with the byte count of every chunk
+    written; it may raise to abort the transfer. With read_lock, data
+    goes through user space and only the reads hold the lock.
+    Returns the name of the method that finished the transfer.
+    """
+    done = 0
+    methods = _transfer_methods() if read_lock is None else [(METHOD_BUFFERED, _locked_read_step(read_lock))]
+    for method, step in methods:
+        try:
+            while done < size:
+                n = step(in_fd, out_fd, in_offset + done, out_offset + done,
+                         min(chunk_size, size - done))
+                if n == 0:
+                    # Source got shorter than its stat() size
+                    break
+                done += n
+                if progress:
+                    progress(n)
+            return method
+        except _MethodUnusable:
+            continue
+    return METHOD_BUFFERED
+
+
+def data_extents(fd: int, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Return the (offset, length) data ranges of a sparse file found with
+    SEEK_DATA/SEEK_HOLE, or None if fd has no holes or the filesystem
+    cannot report them.
+    """
+    if os.fstat(fd).st_blocks * 512 >= size:
+        return None
+    extents = []
+    offset = 0
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                # No data after offset, the rest of the file is a hole
+                if e.errno == errno.ENXIO:
+                    break
+                raise
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            extents.append((start, end - start))
+            offset = end
+    except OSError as e:
+        if e.errno in (errno.EINVAL, errno.EOPNOTSUPP):
+            return None
+        raise
+    finally:
+        os.lseek(fd, 0, os.SEEK_SET)
+    if sum(length for _start, length in extents) >= size:
+        return None
+    return extents
+
+
+def sparse_transfer(in_fd: int, out_fd: int, size: int, extents: List[Tuple[int, int]],
+                    chunk_size: int = COPY_CHUNK_SIZE,
+                    progress: Optional[Callable[[int], None]] = None,
+                    read_lock: Optional[threading.Lock] = None) -> str:
+    """
+    Copy only the given data ranges of in_fd, then extend out_fd to size so
+    everything in between stays a hole. Filesystems without holes (vfat)
+    fill the gaps with zeros themselves. progress gets data bytes only.
+    """
+    for start, length in extents:
+        offset = start
+        end = start + length
+        while offset < end:
+            with read_lock or _NO_LOCK:
+                data = os.pread(in_fd, min(chunk_size, end - offset), offset)
+            if not data:
+                break
+            write_all(out_fd, data, offset)
+            offset += len(data)
+            if progress:
+                progress(len(data))
+    os.ftruncate(out_fd, size)
+    return METHOD_SPARSE
+
+
+def write_all(fd: int, data, offset: int) -> None:
+    """
+    pwrite() all of data to fd at offset, continuing after short writes.
+    """
+    view = memoryview(data)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        view = view[n:]
+        offset += n
+
+
+def hashed_transfer(in_fd: int, out_fd: int, size: int, chunk_size: int = COPY_CHUNK_SIZE,
+                    progress: Optional[Callable[[int], None]] = None,
+                    in_offset: int = 0, out_offset: int = 0, digest=None,
+                    read_lock: Optional[threading.Lock] = None) -> str:
+    """
+    Copy like transfer(), but through user-space buffers that are hashed
+    with BLAKE2b on the way. Returns the hex digest of the source data;
+    pass a running hashlib digest to continue it across several calls.
+    """
+    if digest is None:
+        digest = hashlib.blake2b()
+    done = 0
+    while done < size:
+        with read_lock or _NO_LOCK:
+            data = os.pread(in_fd, min(chunk_size, size - done), in_offset + done)
+        if not data:
+            break
+        digest.update(data)
+        write_all(out_fd, data, out_offset + done)
+        done += len(data)
+        if progress:
+            progress(len(data))
+    return digest.hexdigest()
+
+
+def advise(fd: int, advice_name: str, offset: int = 0, length: int = 0) -> None:
+    """
+    posix_fadvise() fd (by default all of it) with os.<advice_name>; the
+    hint is silently skipped where the platform or filesystem doesn't
+    support it.
+    """
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice_name))
+    except (AttributeError, OSError):
+        pass
+
+
+def drop_cache(fd: int) -> None:
+    """
+    Ask the kernel to forget cached pages of fd (clean pages only).
+    """
+    advise(fd, 'POSIX_FADV_DONTNEED')
+
+
+def hash_fd(fd: int, size: int, chunk_size: int = COPY_CHUNK_SIZE) -> str:
+    """
+    Return the BLAKE2b hex digest of the first `size` bytes of fd.
+    """
+    digest = hashlib.blake2b()
+    offset = 0
+    while offset < size:
+        data = os.pread(fd, min(chunk_size, size - offset), offset)
+        if not data:
+            break
+        digest.update(data)
+        offset += len(data)
+    return digest.hexdigest()
+
+
+def _fiemap(path: str, extent_count: int, flags: int = 0) -> Optional[bytearray]:
+    # Run FS_IOC_FIEMAP over the whole file with room for extent_count extents
+    request = bytearray(_FIEMAP_HEADER.size + _FIEMAP_EXTENT.size * extent_count)
+    _FIEMAP_HEADER.pack_into(request, 0, 0, 0xFFFFFFFFFFFFFFFF, flags, 0, extent_count, 0)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, request)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    return request
+
+
+def physical_offset(path: str) -> Optional[int]:
+    """
+    Return the byte offset on the underlying device where the first extent
+    of path starts, using the FIEMAP ioctl. Returns None for files without
+    extents (empty or inline data) and on filesystems without FIEMAP.
+    """
+    request = _fiemap(path, 1)
+    if request is None or not _FIEMAP_HEADER.unpack_from(request, 0)[3]:
+        return None
+    return _FIEMAP_EXTENT.unpack_from(request, _FIEMAP_HEADER.size)[1]
+
+
+def extent_count(path: str) -> Optional[int]:
+    """
+    Return the number of extents path occupies on disk (1 means contiguous),
+    or None on filesystems without FIEMAP.
+    """
+    request = _fiemap(path, 0, FIEMAP_FLAG_SYNC)
+    if request is None:
+        return None
+    return _FIEMAP_HEADER.unpack_from(request, 0)[3]
+
+
+def direct_transfer(in_fd: int, out_fd: int, size: int, chunk_size: int = COPY_CHUNK_SIZE,
+                    progress: Optional[Callable[[int], None]] = None,
+                    hash_data: bool = False,
+                    read_lock: Optional[threading.Lock] = None) -> Optional[str]:
+    """
+    Copy `size` bytes from in_fd to an O_DIRECT out_fd through a single
+    page-aligned buffer. The last block is zero-padded to the alignment
+    and the file truncated back to its real size afterwards.
+    Returns the BLAKE2b digest of the data if hash_data is set.
+    """
+    chunk_size = max(DIRECT_IO_ALIGNMENT, chunk_size - chunk_size % DIRECT_IO_ALIGNMENT)
+    # Anonymous mappings are page aligned, as O_DIRECT requires
+    buf = mmap.mmap(-1, chunk_size)
+    view = memoryview(buf)
+    digest = hashlib.blake2b() if hash_data else None
+    offset = 0
+    while offset < size:
+        want = min(chunk_size, size - offset)
+        with read_lock or _NO_LOCK:
+            n = os.preadv(in_fd, [view[:want]], offset)
+        if n == 0:
+            break
+        if digest:
+            digest.update(view[:n])
+        padded = -(-n // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+        view[n:padded] = bytes(padded - n)
+        try:
+            write_all(out_fd, view[:padded], offset)
+        except OSError as e:
+            # Some filesystems accept O_DIRECT at open() and refuse it on write
+            if e.errno == errno.EINVAL and offset == 0:
+                raise _MethodUnusable() from e
+            raise
+        offset += n
+        if progress:
+            progress(n)
+    if offset % DIRECT_IO_ALIGNMENT:
+        os.ftruncate(out_fd, offset)
+    return digest.hexdigest() if digest else None
+
+
+def _copy_direct(in_fd: int, dst: str, size: int, chunk_size: int,
+                 progress: Optional[Callable[[int], None]], sync: bool,
+                 verify: bool, fadvise: bool, allocate: bool = True,
+                 read_lock: Optional[threading.Lock] = None) -> Optional[CopyResult]:
+    """
+    Copy into dst bypassing the page cache. Returns None when the target
+    filesystem does not support O_DIRECT, so the caller can fall back.
+    """
+    if not hasattr(os, 'O_DIRECT'):
+        return None
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+    except OSError as e:
+        if e.errno == errno.EINVAL:
+            return None
+        raise
+    try:
+        if allocate and size >= PREALLOCATE_MIN_SIZE:
+            preallocate(out_fd, size)
+        digest = direct_transfer(in_fd, out_fd, size, chunk_size, progress, verify, read_lock)
+        if sync or verify:
+            os.fdatasync(out_fd)
+    except _MethodUnusable:
+        return None
+    finally:
+        os.close(out_fd)
+
+    target_digest = None
+    if verify:
+        with open(dst, 'rb') as f:
+            drop_cache(f.fileno())
+            target_digest = hash_fd(f.fileno(), size, chunk_size)
+            if fadvise:
+                drop_cache(f.fileno())
+    return CopyResult(METHOD_DIRECT, size, digest, target_digest)
+
+
+def copy_file(src: str, dst: str, size: Optional[int] = None,
+              chunk_size: int = COPY_CHUNK_SIZE,
+              progress: Optional[Callable[[int], None]] = None,
+              sync: bool = False, verify: bool = False, direct: bool = False,
+              fadvise: bool = True, writeback_window: int = 0,
+              allocate: bool = True, read_lock: Optional[threading.Lock] = None) -> CopyResult:
+    """
+    Copy src to dst (contents and metadata, like shutil.copy2) using the
+    cheapest transfer method available and return a CopyResult. read_lock,
+    if given, is held around reads of src only.
+    """
+    with open(src, 'rb') as fsrc:
+        if size is None:
+            size = os.fstat(fsrc.fileno()).st_size
+        if fadvise:
+            advise(fsrc.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        result = None
+        extents = None if verify else data_extents(fsrc.fileno(), size)
+        if direct and extents is None:
+            result = _copy_direct(fsrc.fileno(), dst, size, chunk_size, progress, sync, verify, fadvise,
+                                  allocate, read_lock)
+        if result is None:
+            digest = None
+            with open(dst, 'w+b' if verify else 'wb') as fdst:
+                if extents is not None:
+                    # Writes jump over holes, which WritebackWindow can't follow
+                    method = sparse_transfer(fsrc.fileno(), fdst.fileno(), size, extents,
+                                             chunk_size, progress, read_lock)
+                else:
+                    if allocate and size >= PREALLOCATE_MIN_SIZE:
+                        preallocate(fdst.fileno(), size)
+                    window = _writeback_window(fdst.fileno(), size, writeback_window, progress)
+                    chunk_cb = window or progress
+                    if verify:
+                        method = METHOD_BUFFERED
+                        digest = hashed_transfer(fsrc.fileno(), fdst.fileno(), size, chunk_size, chunk_cb,
+                                                 read_lock=read_lock)
+                    else:
+                        method = transfer(fsrc.fileno(), fdst.fileno(), size, chunk_size, chunk_cb,
+                                          read_lock=read_lock)
+                    if window:
+                        window.finish()
+                target_digest = _finish_target(fdst.fileno(), size, chunk_size, sync, verify, fadvise)
+            result = CopyResult(method, size, digest, target_digest)
+        if fadvise:
+            drop_cache(fsrc.fileno())
+    shutil.copystat(src, dst)
+    return result
+
+
+def copy_extents(src: str, extents: List[Tuple[int, int]], dst: str, st: os.stat_result,
+                 chunk_size: int = COPY_CHUNK_SIZE,
+                 progress: Optional[Callable[[int], None]] = None,
+                 sync: bool = False, verify: bool = False, fadvise: bool = True,
+                 writeback_window: int = 0, allocate: bool = True,
+                 read_lock: Optional[threading.Lock] = None) -> CopyResult:
+    """
+    Copy a file stored as (offset, length) extents of a larger source
+    file, such as a file inside an ISO image, to dst. Permissions and
+    timestamps are taken from st, as src itself belongs to the container.
+    progress, sync, verify, fadvise, writeback_window, allocate and
+    read_lock work as for copy_file(); source pages are only dropped for the extents
+    that were read. The result's method is METHOD_EXTENTS.
+    """
+    size = st.st_size
+    with open(src, 'rb') as fsrc, open(dst, 'w+b' if verify else 'wb') as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        if allocate and size >= PREALLOCATE_MIN_SIZE:
+            preallocate(out_fd, size)
+        window = _writeback_window(out_fd, size, writeback_window, progress)
+        chunk_cb = window or progress
+        digest = hashlib.blake2b() if verify else None
+        done = 0
+        for offset, length in extents:
+            length = min(length, size - done)
+            if fadvise:
+                advise(in_fd, 'POSIX_FADV_SEQUENTIAL', offset, length)
+            if digest is not None:
+                hashed_transfer(in_fd, out_fd, length, chunk_size, chunk_cb,
+                                in_offset=offset, out_offset=done, digest=digest,
+                                read_lock=read_lock)
+            else:
+                transfer(in_fd, out_fd, length, chunk_size, chunk_cb,
+                         in_offset=offset, out_offset=done, read_lock=read_lock)
+            if fadvise:
+                advise(in_fd, 'POSIX_FADV_DONTNEED', offset, length)
+            done += length
+        if window:
+            window.finish()
+        target_digest = _finish_target(out_fd, size, chunk_size, sync, verify, fadvise)
+    os.chmod(dst, stat.S_IMODE(st.st_mode))
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return CopyResult(METHOD_EXTENTS, size, digest.hexdigest() if digest else None, target_digest)
+
+
+def copy_small_files(files: List[Tuple[str, str, os.stat_result]],
+                     progress: Optional[Callable[[int], None]] = None,
+                     read_lock: Optional[threading.Lock] = None) -> CopyResult:
+    """
+    Copy a batch of small files given as (src, dst, src_stat) with a single
+    read and write each. Permissions and timestamps are then applied to the
+    whole batch from the stat results the caller already has, instead of
+    the per-file stat and extended attribute calls of shutil.copy2().
+    progress is called once per file. Target directories must exist.
+    read_lock, if given, is held while each file is read.
+    """
+    total = 0
+    for src, dst, _st in files:
+        with read_lock or _NO_LOCK, open(src, 'rb') as fsrc:
+            data = fsrc.read()
+        with open(dst, 'wb') as fdst:
+            fdst.write(data)
+        total += len(data)
+        if progress:
+            progress(len(data))
+    for _src, dst, st in files:
+        os.chmod(dst, stat.S_IMODE(st.st_mode))
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return CopyResult(METHOD_BATCHED, total)
+
+
+def _blocks(fd: int, size: int, block_size: int,
+            chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[Tuple[int, memoryview]]:
+    """
+    Yield (offset, data) for the consecutive block_size blocks of the first
+    `size` bytes of fd, reading chunk_size bytes at a time.
+    """
+    chunk_size = max(block_size, chunk_size - chunk_size % block_size)
+    offset = 0
+    while offset < size:
+        data = os.pread(fd, min(chunk_size, size - offset), offset)
+        if not data:
+            break
+        view = memoryview(data)
+        for start in range(0, len(data), block_size):
+            yield offset + start, view[start:start + block_size]
+        offset += len(data)
+
+
+def _strong_checksum(data) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def block_map(fd: int, size: int, block_size: int = DELTA_BLOCK_SIZE,
+              chunk_size: int = COPY_CHUNK_SIZE) -> List[Tuple[int, bytes]]:
+    """
+    Return the rsync-style signature of the first `size` bytes of fd: an
+    Adler-32 weak checksum and a 128-bit BLAKE2b digest for every block.
+    """
+    return [(zlib.adler32(block), _strong_checksum(block))
+            for _offset, block in _blocks(fd, size, block_size, chunk_size)]
+
+
+def delta_update(src: str, dst: str, size: Optional[int] = None,
+                 block_size: int = DELTA_BLOCK_SIZE, chunk_size: int = COPY_CHUNK_SIZE,
+                 progress: Optional[Callable[[int], None]] = None,
+                 sync: bool = False, verify: bool = False, fadvise: bool = True) -> CopyResult:
+    """
+    Bring an existing dst up to date with src in place, writing only the
+    blocks that differ. The block map of dst is computed first, then src
+    is read once: a block is written when its weak checksum, or failing
+    that its strong digest, doesn't match the block at the same offset of
+    dst. dst is finally truncated to the size of src. Blocks are only
+    compared at the same offset, since data that moved has to be rewritten
+    at its new position anyway. progress is called with the number of
+    source bytes processed; sync, verify and fadvise work as for
+    copy_file(). Returns a CopyResult whose size is the number of bytes
+    written.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'r+b') as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        if size is None:
+            size = os.fstat(in_fd).st_size
+        if fadvise:
+            advise(in_fd, 'POSIX_FADV_SEQUENTIAL')
+            advise(out_fd, 'POSIX_FADV_SEQUENTIAL')
+        signatures = block_map(out_fd, min(size, os.fstat(out_fd).st_size), block_size, chunk_size)
+        digest = hashlib.blake2b() if verify else None
+        written = 0
+        for offset, block in _blocks(in_fd, size, block_size, chunk_size):
+            if digest is not None:
+                digest.update(block)
+            index = offset // block_size
+            if (index >= len(signatures) or zlib.adler32(block) != signatures[index][0]
+                    or _strong_checksum(block) != signatures[index][1]):
+                write_all(out_fd, block, offset)
+                written += len(block)
+            if progress:
+                progress(len(block))
+        os.ftruncate(out_fd, size)
+        target_digest = _finish_target(out_fd, size, chunk_size, sync, verify, fadvise)
+        if fadvise:
+            drop_cache(in_fd)
+    shutil.copystat(src, dst)
+    return CopyResult(METHOD_DELTA, written, digest.hexdigest() if digest else None, target_digest)
+
+
+def fanout_copy(src: str, dsts: List[str], size: Optional[int] = None,
+                chunk_size: int = COPY_CHUNK_SIZE,
+                progress: Optional[Callable[[int, int], None]] = None,
+                pool=None, fadvise: bool = True) -> List[Optional[OSError]]:
+    """
+    Copy src to every path in dsts, reading each chunk of the source once
+    and writing it to all targets in parallel on pool (an Executor with a
+    thread per target; targets are written one after another without it).
+    A target whose open, write or flush fails is dropped while the others
+    carry on. progress(target_index, nbytes) is called for each target
+    after every chunk. Returns, per target, None or the error it failed with.
+    Source read errors and exceptions raised by progress are propagated.
+    """
+    errors: List[Optional[OSError]] = [None] * len(dsts)
+    fds: List[Optional[int]] = [None] * len(dsts)
+
+    def live() -> List[int]:
+        return [index for index in range(len(dsts)) if errors[index] is None]
+
+    def write(index: int, data, offset: int) -> Optional[OSError]:
+        try:
+            write_all(fds[index], data, offset)
+        except OSError as e:
+            return e
+        return None
+
+    try:
+        with open(src, 'rb') as fsrc:
+            if size is None:
+                size = os.fstat(fsrc.fileno()).st_size
+            if fadvise:
+                advise(fsrc.fileno(), 'POSIX_FADV_SEQUENTIAL')
+            for index, dst in enumerate(dsts):
+                try:
+                    fds[index] = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                    if size >= PREALLOCATE_MIN_SIZE:
+                        preallocate(fds[index], size)
+                except OSError as e:
+                    errors[index] = e
+
+            buf = memoryview(bytearray(max(1, min(chunk_size, size))))
+            offset = 0
+            while offset < size and live():
+                n = fsrc.readinto(buf[:min(len(buf), size - offset)])
+                if not n:
+                    break
+                targets = live()
+                run = pool.map if pool is not None else map
+                results = list(run(lambda index: write(index, buf[:n], offset), targets))
+                for index, error in zip(targets, results):
+                    if error is not None:
+                        errors[index] = error
+                    elif progress:
+                        progress(index, n)
+                offset += n
+            if fadvise:
+                drop_cache(fsrc.fileno())
+
+        for index in live():
+            try:
+                _finish_target(fds[index], size, chunk_size, False, False, fadvise)
+            except OSError as e:
+                errors[index] = e
+    finally:
+        for fd in fds:
+            if fd is not None:
+                os.close(fd)
+
+    for index in live():
+        try:
+            shutil.copystat(src, dsts[index])
+        except OSError as e:
+            errors[index] = e
+    return errors
+
+
+def _finish_target(fd: int, size: int, chunk_size: int, sync: bool, verify: bool,
+                   fadvise: bool) -> Optional[str]:
+    """
+    Flush a freshly written target if requested; for verified copies also
+    read it back from the device and return its digest. With fadvise,
+    large targets are written back and then dropped from the page cache
+    (DONTNEED only releases clean pages).
+    """
+    flush = sync or verify or (fadvise and size >= CACHE_DROP_MIN_SIZE)
+    if flush:
+        os.fdatasync(fd)
+    target_digest = None
+    if verify:
+        drop_cache(fd)
+        target_digest = hash_fd(fd, size, chunk_size)
+    if fadvise and flush:
+        drop_cache(fd)
+    return target_digest
+
+
+def _libc_function(name: str, argtypes: list):
+    # Linux syscalls the os module does not wrap; None if libc lacks them
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+    return func
+
+
+_sync_file_range = _libc_function('sync_file_range',
+                                  [ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_uint])
+_fallocate = _libc_function('fallocate64', [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64])
+
+
+def preallocate(fd: int, size: int) -> bool:
+    """
+    Reserve `size` bytes of disk space for fd in as few extents as the
+    filesystem can manage, without changing the file size
+    (fallocate(2) with FALLOC_FL_KEEP_SIZE). Returns False where the
+    filesystem or libc does not support it.
+    """
+    if _fallocate is None or size <= 0:
+        return False
+    if _fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, size) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+        return False
+    raise OSError(err, os.strerror(err))
+
+
+def sync_file_range(fd: int, offset: int, nbytes: int, flags: int) -> None:
+    """
+    Call sync_file_range(2) through libc (Python has no binding). Without
+    it, waiting requests degrade to fdatasync() and start-only requests
+    are skipped.
+    """
+    if _sync_file_range is not None:
+        if _sync_file_range(fd, offset, nbytes, flags) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ESPIPE, errno.ENOSYS):
+            raise OSError(err, os.strerror(err))
+    if flags & SYNC_FILE_RANGE_WAIT_AFTER:
+        os.fdatasync(fd)
+
+
+class WritebackWindow:
+    """
+    Progress callback wrapper that keeps at most `window` bytes of a target
+    file dirty in the page cache. Writeback of every chunk is started as
+    soon as it is written, and the writer waits for data older than the
+    window to reach the device. The wrapped progress callback is only told
+    about bytes that have been written back, so progress tracks durable
+    data and nothing piles up for the final unmount.
+    Chunks must be reported in file order, as all copy loops here do.
+    """
+
+    def __init__(self, fd: int, window: int, progress: Optional[Callable[[int], None]] = None):
+        self.fd = fd
+        self.window = window
+        self.progress = progress
+        self.written = 0
+        self.durable = 0
+
+    def __call__(self, nbytes: int) -> None:
+        sync_file_range(self.fd, self.written, nbytes, SYNC_FILE_RANGE_WRITE)
+        self.written += nbytes
+        if self.written - self.durable > self.window:
+            self._wait(self.written - self.window)
+
+    def finish(self) -> None:
+        """
+        Wait for the rest of the file to be written back.
+        """
+        if self.written > self.durable:
+            self._wait(self.written)
+
+    def _wait(self, upto: int) -> None:
+        sync_file_range(self.fd, self.durable, upto - self.durable,
+                        SYNC_FILE_RANGE_WAIT_BEFORE | SYNC_FILE_RANGE_WRITE | SYNC_FILE_RANGE_WAIT_AFTER)
+        done, self.durable = upto - self.durable, upto
+        if self.progress:
+            self.progress(done)
+
+
+def _writeback_window(fd: int, size: int, window: int,
+                      progress: Optional[Callable[[int], None]]) -> Optional[WritebackWindow]:
+    # Files that fit in the window never need to wait mid-copy
+    if window and size > window:
+        return WritebackWindow(fd, window, progress)
+    return None
+
+
+class PipelineClosed(Exception):
+    """Raised to a writer waiting for data when the PrefetchReader was closed."""
+
+
+class PrefetchReader:
+    """
+    Reads a list of files, in order, on a background thread into a bounded
+    pool of reusable buffers, so the source device keeps reading upcoming
+    files while writers drain earlier ones to the target. At most
+    `memory` bytes (rounded to whole buffers, minimum two) are in flight.
+    Sources are read with sequential read-ahead and dropped from the page
+    cache once fully read. If lock is given it is held around every read,
+    so other threads reading the same device can take turns with it.
+    """
+
+    def __init__(self, files: List[Tuple[str, int]], memory: int,
+                 chunk_size: int = COPY_CHUNK_SIZE, lock: Optional[threading.Lock] = None):
+        self.files = files
+        self.chunk_size = chunk_size
+        self._lock = lock if lock is not None else threading.Lock()
+        self._free = queue.Queue()
+        for _unused in range(max(2, memory // chunk_size)):
+            self._free.put(bytearray(chunk_size))
+        self._ready = [queue.Queue() for _unused in files]
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='minios-prefetch', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop reading and wake up any writer still waiting for data.
+        """
+        self._closed.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        for ready in self._ready:
+            ready.put(PipelineClosed())
+
+    def _take_buffer(self) -> Optional[bytearray]:
+        while not self._closed.is_set():
+            try:
+                return self._free.get(timeout=_PIPELINE_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _run(self) -> None:
+        for index, (path, size) in enumerate(self.files):
+            ready = self._ready[index]
+            try:
+                with open(path, 'rb', buffering=0) as f:
+                    advise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+                    offset = 0
+                    while offset < size:
+                        buf = self._take_buffer()
+                        if buf is None:
+                            return
+                        with self._lock:
+                            n = f.readinto(memoryview(buf)[:min(self.chunk_size, size - offset)])
+                        if not n:
+                            self._free.put(buf)
+                            break
+                        ready.put((offset, buf, n))
+                        offset += n
+                    drop_cache(f.fileno())
+                ready.put(None)
+            except OSError as e:
+                # Handed to the writer of this file, which raises it
+                ready.put(e)
+
+    def chunks(self, index: int) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Yield (offset, data) for file number index as the reader produces
+        them. Each buffer goes back to the pool once the consumer asks for
+        the next chunk, so data must be used before then.
+        """
+        ready = self._ready[index]
+        while True:
+            item = ready.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            offset, buf, n = item
+            try:
+                yield offset, memoryview(buf)[:n]
+            finally:
+                self._free.put(buf)
+
+
+def copy_prefetched(reader: PrefetchReader, index: int, src: str, dst: str,
+                    progress: Optional[Callable[[int], None]] = None,
+                    sync: bool = False, verify: bool = False,
+                    fadvise: bool = True, writeback_window: int = 0,
+                    allocate: bool = True) -> CopyResult:
+    """
+    Write file number index of reader to dst, then copy metadata from src.
+    Behaves like copy_file() otherwise, including verification, page
+    cache handling of the target, bounded writeback and preallocation.
+    """
+    digest = hashlib.blake2b() if verify else None
+    size = 0
+    with open(dst, 'w+b' if verify else 'wb') as fdst:
+        if allocate and reader.files[index][1] >= PREALLOCATE_MIN_SIZE:
+            preallocate(fdst.fileno(), reader.files[index][1])
+        window = _writeback_window(fdst.fileno(), reader.files[index][1], writeback_window, progress)
+        chunk_cb = window or progress
+        for offset, data in reader.chunks(index):
+            if digest:
+                digest.update(data)
+            write_all(fdst.fileno(), data, offset)
+            size += len(data)
+            if chunk_cb:
+                chunk_cb(len(data))
+        if window:
+            window.finish()
+        target_digest = _finish_target(fdst.fileno(), size, reader.chunk_size, sync, verify, fadvise)
+    shutil.copystat(src, dst)
+    return CopyResult(METHOD_PREFETCH, size, digest.hexdigest() if digest else None, target_digest)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MiniOS Installer - ISO Utilities
+Read-only access to ISO9660 images without mounting them.
+
+Copyright (C) 2025 MiniOS Linux
+Author: crims0n <crims0n@minios.dev>
+"""
+
+import os
+import calendar
+import gettext
+import struct
+from typing import NamedTuple, Optional, List, Tuple, Iterator
+
+# Set up gettext for localization
+gettext.bindtextdomain('minios-installer', '/usr/share/locale')
+gettext.textdomain('minios-installer')
+_ = gettext.gettext
+
+# Volume descriptors start at sector 16 of the image
+SECTOR_SIZE = 2048
+DESCRIPTOR_START = 16 * SECTOR_SIZE
+
+ISO_MAGIC = b'CD001'
+VD_PRIMARY = 1
+VD_SUPPLEMENTARY = 2
+VD_TERMINATOR = 255
+
+# Escape sequences marking a supplementary descriptor as Joliet (UCS-2 levels 1-3)
+JOLIET_ESCAPES = (b'%/@', b'%/C', b'%/E')
+
+# Directory record file flags
+FLAG_DIRECTORY = 0x02
+FLAG_MULTI_EXTENT = 0x80
+
+# Fixed part of a directory record: length, extended attribute length,
+# extent LBA (both-endian), data length (both-endian), recording date,
+# flags, unit size, gap size, volume sequence (both-endian), name length
+_RECORD = struct.Struct('<BB I4x I4x 7s BBB 4x B')
+
+
+class IsoEntry(NamedTuple):
+    """
+    A file or directory in an ISO image: path relative to the listed
+    directory, data size, POSIX mode, modification time and the
+    (byte offset, length) extents holding its data in the image.
+    """
+    path: str
+    size: int
+    mode: int
+    mtime: int
+    extents: List[Tuple[int, int]]
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.mode & 0o040000)
+
+    def stat(self) -> os.stat_result:
+        """
+        Return a stat result describing the entry, as if it were a regular file.
+        """
+        ns = self.mtime * 10**9
+        blocks = (self.size + 511) // 512
+        return os.stat_result((self.mode, self.extents[0][0] if self.extents else 0, 0, 1, 0, 0,
+                               self.size, self.mtime, self.mtime, self.mtime,
+                               float(self.mtime), float(self.mtime), float(self.mtime),
+                               ns, ns, ns, SECTOR_SIZE, blocks))
+
+
+def is_iso_image(path: str) -> bool:
+    """
+    True if path is a file carrying an ISO9660 volume descriptor.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(DESCRIPTOR_START + 1)
+            return f.read(5) == ISO_MAGIC
+    except (OSError, IOError):
+        return False
+
+
+def _record_time(raw: bytes) -> int:
+    # Years since 1900, month, day, hour, minute, second, GMT offset in 15 minute steps
+    year, month, day, hour, minute, second, offset = struct.unpack('<6Bb', raw)
+    if not month or not day:
+        return 0
+    return calendar.timegm((1900 + year, month, day, hour, minute, second)) - offset * 15 * 60
+
+
+class _Record(NamedTuple):
+    name: str
+    lba: int
+    size: int
+    flags: int
+    mtime: int
+    mode: Optional[int]
+
+
+class IsoImage:
+    """
+    Minimal ISO9660 reader that lists directories straight from the image
+    file, without loop devices, mounting or root privileges. Names come
+    from Rock Ridge when the image has it (as mount would show them), else
+    from the Joliet tree, else from the plain ISO9660 records.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        try:
+            self._read_descriptors()
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    def __enter__(self) -> 'IsoImage':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read(self, offset: int, size: int) -> bytes:
+        data = os.pread(self._fd, size, offset)
+        if len(data) < size:
+            raise RuntimeError(_("ISO image is truncated: ") + self.path)
+        return data
+
+    def _read_descriptors(self) -> None:
+        primary = joliet = None
+        offset = DESCRIPTOR_START
+        while True:
+            vd = self._read(offset, SECTOR_SIZE)
+            if vd[1:6] != ISO_MAGIC:
+                raise RuntimeError(_("Not an ISO9660 image: ") + self.path)
+            if vd[0] == VD_TERMINATOR:
+                break
+            if vd[0] == VD_PRIMARY and primary is None:
+                primary = vd
+            elif vd[0] == VD_SUPPLEMENTARY and any(esc in vd[88:120] for esc in JOLIET_ESCAPES):
+                joliet = vd
+            offset += SECTOR_SIZE
+        if primary is None:
+            raise RuntimeError(_("Not an ISO9660 image: ") + self.path)
+
+        self.block_size = struct.unpack_from('<H', primary, 128)[0]
+        self.joliet = False
+        self.rock_ridge = False
+        self._root = self._parse_record(primary[156:190], False, False)
+        # Rock Ridge images announce SUSP in the root's "." record
+        first = next(self._raw_records(self._root), None)
+        if first is not None and _system_use(first)[:2] == b'SP':
+            self.rock_ridge = True
+        elif joliet is not None:
+            self.joliet = True
+            self._root = self._parse_record(joliet[156:190], True, False)
+
+    def _raw_records(self, directory: _Record) -> Iterator[bytes]:
+        data = self._read(directory.lba * self.block_size, directory.size)
+        pos = 0
+        while pos < len(data):
+            length = data[pos]
+            if length == 0:
+                # Records never cross a sector; the rest of this one is padding
+                pos = (pos // SECTOR_SIZE + 1) * SECTOR_SIZE
+                continue
+            yield data[pos:pos + length]
+            pos += length
+
+    def _parse_record(self, raw: bytes, joliet: bool, rock_ridge: bool) -> _Record:
+        (_length, _ext, lba, size, date, flags, _unit, _gap,
+         name_len) = _RECORD.unpack_from(raw)
+        ident = raw[33:33 + name_len]
+        mode = None
+        if ident in (b'\0', b'\1'):
+            name = '.' if ident == b'\0' else '..'
+        elif joliet:
+            name = ident.decode('utf-16-be', errors='replace')
+        else:
+            name = ident.decode('ascii', errors='replace')
+        if ident not in (b'\0', b'\1'):
+            # Drop the ";1" version, which Joliet names often carry as well
+            name = name.split(';')[0]
+            # and the "." of ISO9660 names without extension
+            if not joliet and name.endswith('.'):
+                name = name[:-1]
+        if rock_ridge:
+            rr_name, mode = _rock_ridge(_system_use(raw))
+            if rr_name is not None:
+                name = rr_name
+        return _Record(name, lba, size, flags, _record_time(date), mode)
+
+    def _records(self, directory: _Record) -> Iterator[_Record]:
+        for raw in self._raw_records(directory):
+            record = self._parse_record(raw, self.joliet, self.rock_ridge)
+            if record.name not in ('.', '..'):
+                yield record
+
+    def _find(self, path: str) -> _Record:
+        directory = self._root
+        for part in [p for p in path.split('/') if p]:
+            for record in self._records(directory):
+                if record.flags & FLAG_DIRECTORY and record.name == part:
+                    directory = record
+                    break
+            else:
+                raise FileNotFoundError(path)
+        return directory
+
+    def isdir(self, path: str) -> bool:
+        try:
+            self._find(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def walk(self, path: str = '') -> List[IsoEntry]:
+        """
+        Return every file below the directory at path (relative to the
+        image root), directories first visited first, like SourceManifest.scan().
+        """
+        entries = []
+        stack = [('', self._find(path))]
+        while stack:
+            rel_dir, directory = stack.pop()
+            subdirs = []
+            current = None
+            for record in self._records(directory):
+                rel = rel_dir + '/' + record.name if rel_dir else record.name
+                if record.flags & FLAG_DIRECTORY:
+                    subdirs.append((rel, record))
+                    continue
+                extent = (record.lba * self.block_size, record.size)
+                if current is not None and current.path == rel:
+                    # Next part of a multi-extent file
+                    current.extents.append(extent)
+                    current = current._replace(size=current.size + record.size)
+                    entries[-1] = current
+                else:
+                    mode = record.mode if record.mode is not None else 0o100644
+                    current = IsoEntry(rel, record.size, mode, record.mtime, [extent])
+                    entries.append(current)
+                if not record.flags & FLAG_MULTI_EXTENT:
+                    current = None
+            stack.extend(reversed(subdirs))
+        return entries
+
+
+def _system_use(raw: bytes) -> bytes:
+    # The system use area follows the name, padded to an even offset
+    name_len = raw[32]
+    start = 33 + name_len + (0 if name_len % 2 else 1)
+    return raw[start:raw[0]]
+
+
+def _rock_ridge(area: bytes) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Return the Rock Ridge name (NM) and POSIX mode (PX) from a system use
+    area; continuation areas (CE) are not followed.
+    """
+    name = None
+    mode = None
+    pos = 0
+    while pos + 4 <= len(area):
+        signature, length = area[pos:pos + 2], area[pos + 2]
+        if length < 4:
+            break
+        if signature == b'NM' and not area[pos + 4] & 0x06:
+            # Flags 0x02/0x04 mean "." and ".."; 0x01 continues in the next NM
+            name = (name or '') + area[pos + 5:pos + length].decode('utf-8', errors='replace')
+        elif signature == b'PX':
+            mode = struct.unpack_from('<I', area, pos + 4)[0]
+        pos += length
+    return name, mode
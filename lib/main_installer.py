@@ -30,9 +30,11 @@ sys.path.insert(0, '/usr/lib/minios-installer')
 from disk_utils import find_available_disks, get_disk_size_mib, start_disk_monitoring, stop_disk_monitoring, pause_disk_monitoring, resume_disk_monitoring
 from mount_utils import mount_partition, unmount_partitions, force_unmount_device
 from format_utils import format_partitions, check_filesystem_support, detect_filesystem_tools
-from copy_utils import copy_minios_files, copy_efi_files, find_minios_source
+from copy_utils import copy_minios_files, copy_minios_files_fanout, update_minios_files, copy_efi_files, find_minios_source, has_copy_journal, remove_copy_journal, is_copy_to_ram, io_defaults_for_transport, CopyRules, DEFAULT_PREFETCH_MEMORY, CopyStats, format_copy_stats
 from bootloader_utils import install_bootloader
-from disk_utils import partition_disk, zero_fill_disk
+from module_utils import find_live_changes
+from disk_utils import partition_disk, zero_fill_disk, partition_layout_matches, get_filesystem_type, get_partition_table_type, is_seek_bound_source
+from iso_utils import is_iso_image
 
 gi.require_version('Gtk', '3.0')
 gi.require_version('Gio', '2.0')
@@ -85,12 +87,22 @@ class InstallerWindow(Gtk.ApplicationWindow):
         self.set_position(Gtk.WindowPosition.CENTER)
         self.set_icon_name(ICON_WINDOW)
 
+        self.source              = application.source  # MiniOS source given on the command line
         self.selected_device     = None
         self.selected_filesystem = None
         self.use_gpt             = False
         self.create_efi          = False
         self.boot_config_type    = self._get_default_boot_config()  # "multilang" or language code like "ru_RU"
+        self.install_mode        = "install"  # "install", "resume" or "update"
+        self.verify_copy         = False
+        self.current_kernel_only = False
+        self.pack_changes        = False  # Keep the live session's changes as a module
+        self.multi_target        = False  # Install the same system to several disks
+        self.selected_devices    = []
+        self.target_mounts       = {}     # Data partition mount point → device, for multi-disk installs
+        self.target_bars         = {}
         self.cancel_requested    = False
+        self.last_progress_message = None
 
         self.p1 = None
         self.m1 = None
@@ -292,8 +304,10 @@ class InstallerWindow(Gtk.ApplicationWindow):
         vb_disk = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
         vb_disk.pack_start(Gtk.Label(label=_("Select Target Disk:"), xalign=0), False, False, 0)
 
-        self.disk_list = Gtk.ListBox(selection_mode=Gtk.SelectionMode.SINGLE)
+        self.disk_list = Gtk.ListBox(selection_mode=Gtk.SelectionMode.MULTIPLE if self.multi_target
+                                     else Gtk.SelectionMode.SINGLE)
         self.disk_list.connect("row-selected", self._on_disk_selected)
+        self.disk_list.connect("selected-rows-changed", self._on_disk_rows_changed)
 
         self._refresh_disk_list()
 
@@ -303,6 +317,14 @@ class InstallerWindow(Gtk.ApplicationWindow):
         sw.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
         sw.add(self.disk_list)
         vb_disk.pack_start(sw, True, True, 0)
+
+        self.chk_multi = Gtk.CheckButton(label=_("Install to several disks at once"))
+        self.chk_multi.set_active(self.multi_target)
+        self.chk_multi.set_tooltip_text(
+            _("Select several disks; the MiniOS files are read once and written to all of them. "
+              "A disk that fails does not stop the others."))
+        self.chk_multi.connect("toggled", self._on_multi_toggled)
+        vb_disk.pack_start(self.chk_multi, False, False, 0)
         hb.pack_start(vb_disk, True, True, 0)
 
         # Filesystem combo and information
@@ -387,6 +409,51 @@ class InstallerWindow(Gtk.ApplicationWindow):
         boot_config_box.pack_start(self.language_combo, False, False, 0)
         
         vb_fs.pack_start(boot_config_box, False, False, 6)
+
+        # Installation mode selection
+        mode_label = Gtk.Label(label=_("Installation Mode:"))
+        mode_label.set_halign(Gtk.Align.START)
+        mode_label.set_margin_top(12)
+        vb_fs.pack_start(mode_label, False, False, 0)
+
+        self.mode_combo = Gtk.ComboBoxText()
+        self.mode_combo.append("install", _("Full installation"))
+        self.mode_combo.append("resume", _("Resume interrupted installation"))
+        self.mode_combo.append("update", _("Update existing installation"))
+        if not self.mode_combo.set_active_id(self.install_mode):
+            self.mode_combo.set_active(0)
+        self.mode_combo.set_tooltip_text(
+            _("Resume keeps the existing partitions if they match the selected filesystem "
+              "and copies only files that were not completely written by the previous attempt.\n"
+              "Update keeps all data on an existing MiniOS disk and copies only changed modules "
+              "and boot files."))
+        self.mode_combo.connect("changed", self._on_mode_changed)
+        self.mode_combo.set_sensitive(not self.multi_target)
+        self.combo_fs.set_sensitive(self.install_mode != "update")
+        vb_fs.pack_start(self.mode_combo, False, False, 6)
+
+        self.chk_verify = Gtk.CheckButton(label=_("Verify copied files"))
+        self.chk_verify.set_active(self.verify_copy)
+        self.chk_verify.set_tooltip_text(
+            _("Checksum every file while copying and read it back from the target disk."))
+        self.chk_verify.connect("toggled", self._on_verify_toggled)
+        vb_fs.pack_start(self.chk_verify, False, False, 0)
+
+        self.chk_current_kernel = Gtk.CheckButton(label=_("Install only the running kernel"))
+        self.chk_current_kernel.set_active(self.current_kernel_only)
+        self.chk_current_kernel.set_tooltip_text(
+            _("Skip kernel and initramfs images in boot/ other than the ones this live system was started with."))
+        self.chk_current_kernel.connect("toggled", self._on_current_kernel_toggled)
+        vb_fs.pack_start(self.chk_current_kernel, False, False, 0)
+
+        self.chk_pack_changes = Gtk.CheckButton(label=_("Keep changes made in this live session"))
+        self.chk_pack_changes.set_active(self.pack_changes)
+        self.chk_pack_changes.set_tooltip_text(
+            _("Pack the files changed in this live session into a compressed module on the target disk."))
+        self.live_changes = find_live_changes()
+        self._update_pack_changes_sensitive()
+        self.chk_pack_changes.connect("toggled", self._on_pack_changes_toggled)
+        vb_fs.pack_start(self.chk_pack_changes, False, False, 0)
         
         hb.pack_start(vb_fs, True, True, 0)
 
@@ -437,13 +504,30 @@ class InstallerWindow(Gtk.ApplicationWindow):
                         desc.append(f"SN: {serial}")
                     self.selected_disk_info = {
                         'device': dev_name,
-                        'desc': " — " + ", ".join(desc) if desc else ""
+                        'desc': " — " + ", ".join(desc) if desc else "",
+                        'transport': dev.get('transport', '')
                     }
                     break
         else:
             self.selected_disk_info = None
         self._update_install_sensitive()
 
+    def _on_disk_rows_changed(self, listbox):
+        self.selected_devices = [row.device for row in listbox.get_selected_rows()
+                                 if getattr(row, 'device', None)]
+        self._update_install_sensitive()
+
+    def _on_multi_toggled(self, check):
+        self.multi_target = check.get_active()
+        self.disk_list.set_selection_mode(Gtk.SelectionMode.MULTIPLE if self.multi_target
+                                          else Gtk.SelectionMode.SINGLE)
+        # Several disks are always installed from scratch
+        if self.multi_target:
+            self.mode_combo.set_active_id("install")
+        self.mode_combo.set_sensitive(not self.multi_target)
+        self._update_pack_changes_sensitive()
+        self._update_install_sensitive()
+
     def _on_fs_selected(self, combo):
         text = combo.get_active_text()
         self.selected_filesystem = text or None
@@ -456,13 +540,46 @@ class InstallerWindow(Gtk.ApplicationWindow):
         if lang_code is not None:
             self.boot_config_type = lang_code
 
+    def _on_mode_changed(self, combo):
+        """Handle installation mode selection change."""
+        mode = combo.get_active_id()
+        if mode is not None:
+            self.install_mode = mode
+            # Updates keep the existing filesystem
+            self.combo_fs.set_sensitive(mode != "update")
+            self._update_pack_changes_sensitive()
+            self._update_install_sensitive()
+
+    def _on_verify_toggled(self, check):
+        self.verify_copy = check.get_active()
+
+    def _on_current_kernel_toggled(self, check):
+        self.current_kernel_only = check.get_active()
+
+    def _on_pack_changes_toggled(self, check):
+        self.pack_changes = check.get_active()
+
+    def _update_pack_changes_sensitive(self):
+        # Live changes are only packed by single-disk fresh or resumed installs
+        if hasattr(self, 'chk_pack_changes'):
+            self.chk_pack_changes.set_sensitive(self.live_changes is not None and not self.multi_target
+                                                and self.install_mode != "update")
 
     def _update_install_sensitive(self):
         if hasattr(self, 'btn_install'):
-            ok = bool(self.selected_device and self.selected_filesystem)
+            if self.multi_target:
+                ok = bool(self.selected_devices and self.selected_filesystem)
+            else:
+                ok = bool(self.selected_device and (self.selected_filesystem or self.install_mode == "update"))
             self.btn_install.set_sensitive(ok)
 
     def _on_install_clicked(self, button):
+        # Updates don't erase anything, no need for the warning
+        if self.install_mode == "update":
+            self._on_confirm_install(button)
+            return
+        if self.multi_target:
+            self.selected_disk_info = {'device': ", ".join(self.selected_devices), 'desc': ""}
         # Show confirmation warning before proceeding
         self._show_erase_warning()
 
@@ -597,11 +714,18 @@ class InstallerWindow(Gtk.ApplicationWindow):
     def _on_confirm_install(self, button):
         pause_disk_monitoring()
         self._build_progress_ui()
-        threading.Thread(target=self._run_install_sequence, daemon=True).start()
+        if self.multi_target:
+            target = self._run_fanout_sequence
+        elif self.install_mode == "update":
+            target = self._run_update_sequence
+        else:
+            target = self._run_install_sequence
+        threading.Thread(target=target, daemon=True).start()
 
     def _build_progress_ui(self):
         for child in self.main_vbox.get_children():
             self.main_vbox.remove(child)
+        self.last_progress_message = None
 
         self.lbl_status = Gtk.Label(label=_("Preparing to install..."), xalign=0)
         self.lbl_status.set_line_wrap(True)
@@ -612,6 +736,17 @@ class InstallerWindow(Gtk.ApplicationWindow):
         self.progress.set_fraction(0.0)
         self.main_vbox.pack_start(self.progress, False, False, 0)
 
+        # One progress bar per disk for multi-disk installs
+        self.target_bars = {}
+        if self.multi_target:
+            for dev in self.selected_devices:
+                row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+                row.pack_start(Gtk.Label(label=dev, xalign=0), False, False, 0)
+                bar = Gtk.ProgressBar(show_text=True)
+                row.pack_start(bar, True, True, 0)
+                self.main_vbox.pack_start(row, False, False, 0)
+                self.target_bars[dev] = bar
+
         # Toggle log view button
         self.btn_toggle = Gtk.ToggleButton(label=_("Show Log"))
         self.btn_toggle.connect("toggled", self._on_toggle_log)
@@ -670,11 +805,36 @@ class InstallerWindow(Gtk.ApplicationWindow):
         self.btn_cancel.connect("clicked", lambda b: self._build_selection_ui())
         self.btn_cancel.set_sensitive(True)
 
-    def _report_progress(self, percent: int, message: str):
+    def _report_progress(self, percent: float, message: str, stats: Optional[CopyStats] = None):
         fraction = percent / 100.0
         GLib.idle_add(self.progress.set_fraction, fraction)
-        GLib.idle_add(self.lbl_status.set_text, message)
-        GLib.idle_add(self._append_log, message)
+        status = message
+        if stats is not None:
+            status += "\n" + format_copy_stats(stats)
+        GLib.idle_add(self.lbl_status.set_text, status)
+        # Byte-level updates while a file is copied repeat the same message;
+        # only log it once
+        if message != self.last_progress_message:
+            self.last_progress_message = message
+            GLib.idle_add(self._append_log, message)
+
+    def _report_target_progress(self, target: str, percent: float, message: str,
+                                stats: Optional[CopyStats] = None):
+        bar = self.target_bars.get(self.target_mounts.get(target))
+        if bar is not None:
+            GLib.idle_add(bar.set_fraction, percent / 100.0)
+            GLib.idle_add(bar.set_text, format_copy_stats(stats) if stats is not None else "")
+        # Live disks are written in lockstep, so any of them stands for the overall progress
+        self._report_progress(percent, message, stats)
+
+    def _fail_target(self, failed: dict, dev: str, message: str, error: Exception):
+        import traceback
+        failed[dev] = error
+        GLib.idle_add(self._append_log, _("Error at step: ") + f"{dev}: {message}")
+        GLib.idle_add(self._append_log, traceback.format_exc())
+        bar = self.target_bars.get(dev)
+        if bar is not None:
+            GLib.idle_add(bar.set_text, _("Failed: ") + str(error))
 
     def _append_log(self, message: str):
         timestamp = GLib.DateTime.new_now_local().format("%Y-%m-%d %H:%M:%S")
@@ -687,16 +847,38 @@ class InstallerWindow(Gtk.ApplicationWindow):
         # Always schedule _append_log on the GTK main loop
         GLib.idle_add(self._append_log, message)
 
+    def _partition_names(self, dev: str):
+        if dev.startswith("/dev/nvme") or dev.startswith("/dev/mmcblk"):
+            # For NVMe and MMC devices, use partition names like nvme0n1p1
+            return f"{dev}p1", f"{dev}p2"
+        return f"{dev}1", f"{dev}2"
+
+    def _has_interrupted_install(self, p1, p2, m1, m2):
+        """
+        Mount the data partition and check it for the copy journal an
+        interrupted installation leaves behind. Partitions that merely
+        have the right layout but hold someone else's data must not be
+        installed over without formatting.
+        """
+        try:
+            unmount_partitions(p1, p2, m1, m2)
+            mount_partition(p1, m1)
+        except Exception:
+            return False
+        try:
+            return has_copy_journal(m1)
+        finally:
+            try:
+                unmount_partitions(p1, p2, m1, m2)
+            except Exception:
+                pass
+
     def _run_install_sequence(self):
         try:
             dev = self.selected_device
             fs  = self.selected_filesystem
             use_gpt = self.use_gpt
-            if dev.startswith("/dev/nvme") or dev.startswith("/dev/mmcblk"):
-                # For NVMe and MMC devices, use partition names like nvme0n1p1
-                p1, p2 = f"{dev}p1", f"{dev}p2"
-            else:
-                p1, p2 = f"{dev}1", f"{dev}2"
+            p1, p2 = self._partition_names(dev)
             m1 = f"/mnt/install/{os.path.basename(p1)}"
             m2 = f"/mnt/install/{os.path.basename(p2)}" if self.create_efi else None
 
@@ -706,11 +888,30 @@ class InstallerWindow(Gtk.ApplicationWindow):
             config_override = self.temp_config_path if (self.temp_config_path and os.path.exists(self.temp_config_path)) else None
             self.config_path = config_override or '/etc/live/config.conf'
 
+            # A resumed install keeps the partitions of the previous attempt
+            # when they already have the requested layout and the data
+            # partition carries that attempt's copy journal
+            resume = False
+            if self.install_mode == "resume":
+                if not partition_layout_matches(dev, fs, p1, p2 if self.create_efi else None, use_gpt):
+                    self._log_async(_("Existing partitions do not match, performing a full installation."))
+                elif not self._has_interrupted_install(p1, p2, m1, m2):
+                    self._log_async(_("No interrupted installation found on the disk, "
+                                      "performing a full installation."))
+                else:
+                    resume = True
+                    self._log_async(_("Existing partitions match, resuming installation."))
+
             steps = [
                 ( 0,  _("Unmounting disk..."),       lambda: unmount_partitions(p1, p2, m1, m2)),
-                ( 2,  _("Erasing disk..."),          lambda: zero_fill_disk(dev)),
-                ( 4,  _("Partitioning disk..."),     lambda: partition_disk(dev, fs, use_gpt)),
-                ( 8,  _("Formatting partitions..."), lambda: format_partitions(p1, fs, p2 if self.create_efi else None)),
+            ]
+            if not resume:
+                steps += [
+                    ( 2,  _("Erasing disk..."),          lambda: zero_fill_disk(dev)),
+                    ( 4,  _("Partitioning disk..."),     lambda: partition_disk(dev, fs, use_gpt)),
+                    ( 8,  _("Formatting partitions..."), lambda: format_partitions(p1, fs, p2 if self.create_efi else None)),
+                ]
+            steps += [
                 (15,  _("Mounting partition..."),    lambda: mount_partition(p1, m1)),
             ]
 
@@ -746,19 +947,36 @@ class InstallerWindow(Gtk.ApplicationWindow):
 
             if not self.cancel_requested:
                 self._report_progress(18, _("Copying files..."))
-                src = find_minios_source()
+                src = find_minios_source(self.source)
                 if not src:
                     if not self.cancel_requested:
                         GLib.idle_add(self._show_error, _("Cannot find MiniOS image."))
                     return
+                # Keep a copy-to-RAM live system's page cache out of the copy
+                direct_io = is_copy_to_ram()
+                if direct_io:
+                    self._log_async(_("Live system runs from RAM, writing files with direct I/O."))
+                # Read the source ahead while the workers write; a copy-to-RAM
+                # source has no device to overlap, and its writes go direct
+                prefetch_memory = 0 if direct_io else DEFAULT_PREFETCH_MEMORY
+                # Copying in on-disk order only pays off where the source seeks
+                order_by_layout = not direct_io and (is_iso_image(src) or is_seek_bound_source(src))
+                if order_by_layout:
+                    self._log_async(_("Source is a hard disk, optical disc or ISO image, "
+                                      "reading it in on-disk order."))
+                rules = CopyRules(current_kernel_only=True) if self.current_kernel_only else None
+                # Start from the target's transport defaults and tune while copying
+                transport = (self.selected_disk_info or {}).get('transport', '')
+                chunk_size, workers = io_defaults_for_transport(transport)
                 try:
-                    copy_minios_files(src, m1, self._report_progress, self._log_async, config_override, self.boot_config_type)
-                    if not self.create_efi:
-                        self._report_progress(50, _("Copying EFI files to root..."))
-                        copy_efi_files(src, m1, self._log_async)
-                    elif self.create_efi:
-                        self._report_progress(50, _("Copying EFI files to ESP..."))
-                        copy_efi_files(src, m2, self._log_async)
+                    copy_minios_files(src, m1, self._report_progress, self._log_async, config_override,
+                                      self.boot_config_type, workers=workers, resume=resume,
+                                      verify=self.verify_copy, direct_io=direct_io,
+                                      prefetch_memory=prefetch_memory,
+                                      order_by_layout=order_by_layout, rules=rules,
+                                      efi_dst=m2 if self.create_efi else m1,
+                                      chunk_size=chunk_size, autotune=True,
+                                      pack_changes=self.pack_changes)
                 except Exception as e:
                     if self.cancel_requested:
                         return
@@ -791,6 +1009,7 @@ class InstallerWindow(Gtk.ApplicationWindow):
             if not self.cancel_requested:
                 self._report_progress(98, _("Unmounting disk..."))
                 try:
+                    remove_copy_journal(m1)
                     unmount_partitions(p1, p2, m1, m2)
                 except Exception as e:
                     if self.cancel_requested:
@@ -807,6 +1026,216 @@ class InstallerWindow(Gtk.ApplicationWindow):
         finally:
             resume_disk_monitoring()
 
+    def _run_fanout_sequence(self):
+        """
+        Install MiniOS to every selected disk: prepare the disks one by one,
+        copy the files to all of them from a single read of the source, then
+        set up the bootloaders. A disk that fails at any step is left out of
+        the remaining steps while the others are completed.
+        """
+        try:
+            fs = self.selected_filesystem
+            config_override = self.temp_config_path if (self.temp_config_path and os.path.exists(self.temp_config_path)) else None
+            self.config_path = config_override or '/etc/live/config.conf'
+
+            disks = []
+            for dev in self.selected_devices:
+                p1, p2 = self._partition_names(dev)
+                m1 = f"/mnt/install/{os.path.basename(p1)}"
+                m2 = f"/mnt/install/{os.path.basename(p2)}" if self.create_efi else None
+                try:
+                    use_gpt = get_disk_size_mib(dev) > 2_097_152
+                except Exception:
+                    use_gpt = False
+                disks.append((dev, p1, p2, m1, m2, use_gpt))
+            self.target_mounts = {m1: dev for dev, p1, p2, m1, m2, use_gpt in disks}
+            failed = {}
+
+            def live_disks():
+                return [disk for disk in disks if disk[0] not in failed]
+
+            steps = [
+                ( 0, _("Unmounting disk..."),       lambda dev, p1, p2, m1, m2, gpt: unmount_partitions(p1, p2, m1, m2)),
+                ( 2, _("Erasing disk..."),          lambda dev, p1, p2, m1, m2, gpt: zero_fill_disk(dev)),
+                ( 4, _("Partitioning disk..."),     lambda dev, p1, p2, m1, m2, gpt: partition_disk(dev, fs, gpt)),
+                ( 8, _("Formatting partitions..."), lambda dev, p1, p2, m1, m2, gpt: format_partitions(p1, fs, p2 if self.create_efi else None)),
+                (15, _("Mounting partition..."),    lambda dev, p1, p2, m1, m2, gpt: mount_partition(p1, m1)),
+            ]
+            if self.create_efi:
+                steps.append((17, _("Mounting EFI partition..."), lambda dev, p1, p2, m1, m2, gpt: mount_partition(p2, m2)))
+
+            for percent, message, func in steps:
+                for disk in live_disks():
+                    if self.cancel_requested:
+                        return
+                    self._report_progress(percent, f"{disk[0]}: {message}")
+                    try:
+                        func(*disk)
+                    except Exception as e:
+                        if self.cancel_requested:
+                            return
+                        self._fail_target(failed, disk[0], message, e)
+
+            if not live_disks():
+                GLib.idle_add(self._show_error, _("Installation failed on every selected disk."))
+                return
+
+            if not self.cancel_requested:
+                self._report_progress(18, _("Copying files..."))
+                src = find_minios_source(self.source)
+                if not src:
+                    if not self.cancel_requested:
+                        GLib.idle_add(self._show_error, _("Cannot find MiniOS image."))
+                    return
+                rules = CopyRules(current_kernel_only=True) if self.current_kernel_only else None
+                # Copying in on-disk order only pays off where the source seeks
+                order_by_layout = is_iso_image(src) or is_seek_bound_source(src)
+                if order_by_layout:
+                    self._log_async(_("Source is a hard disk, optical disc or ISO image, "
+                                      "reading it in on-disk order."))
+                targets = live_disks()
+                try:
+                    copy_failed = copy_minios_files_fanout(
+                        src, [m1 for dev, p1, p2, m1, m2, gpt in targets], self._report_target_progress,
+                        self._log_async, config_override, self.boot_config_type, rules,
+                        efi_dsts=[m2 or m1 for dev, p1, p2, m1, m2, gpt in targets],
+                        order_by_layout=order_by_layout)
+                except Exception as e:
+                    if self.cancel_requested:
+                        return
+                    import traceback
+                    tb = traceback.format_exc()
+                    GLib.idle_add(self._append_log, _("Error during file copy:"))
+                    GLib.idle_add(self._append_log, tb)
+                    GLib.idle_add(self._show_error, _("Installation failed: ") + str(e))
+                    return
+                for target, error in copy_failed.items():
+                    failed[self.target_mounts[target]] = error
+                    bar = self.target_bars.get(self.target_mounts[target])
+                    if bar is not None:
+                        GLib.idle_add(bar.set_text, _("Failed: ") + str(error))
+
+            if fs != 'exfat':
+                for dev, p1, p2, m1, m2, gpt in live_disks():
+                    if self.cancel_requested:
+                        return
+                    if gpt:
+                        continue
+                    self._report_progress(96, f"{dev}: " + _("Setting up bootloader..."))
+                    try:
+                        install_bootloader(dev, p1, p2 if self.create_efi else None,
+                                           self._report_progress, self._log_async)
+                    except Exception as e:
+                        if self.cancel_requested:
+                            return
+                        self._fail_target(failed, dev, _("Setting up bootloader..."), e)
+
+            if not self.cancel_requested:
+                # Unmount every disk, including the failed ones
+                for dev, p1, p2, m1, m2, gpt in disks:
+                    self._report_progress(98, f"{dev}: " + _("Unmounting disk..."))
+                    try:
+                        unmount_partitions(p1, p2, m1, m2)
+                    except Exception as e:
+                        if dev not in failed:
+                            self._fail_target(failed, dev, _("Unmounting disk..."), e)
+
+                for dev, p1, p2, m1, m2, gpt in live_disks():
+                    bar = self.target_bars.get(dev)
+                    if bar is not None:
+                        GLib.idle_add(bar.set_fraction, 1.0)
+                        GLib.idle_add(bar.set_text, _("Done"))
+                for dev, error in failed.items():
+                    self._log_async(_("Installation failed on {dev}: {error}").format(dev=dev, error=error))
+                self._report_progress(100, _("Installation complete on {ok} of {total} disks.").format(
+                    ok=len(live_disks()), total=len(disks)))
+                GLib.idle_add(self._setup_restart_button)
+        finally:
+            resume_disk_monitoring()
+
+    def _run_update_sequence(self):
+        """
+        Update an existing MiniOS installation in place: mount its partitions,
+        copy changed files only, refresh EFI files and the bootloader.
+        """
+        try:
+            dev = self.selected_device
+            p1, p2 = self._partition_names(dev)
+            has_efi = get_filesystem_type(p2) == 'vfat'
+            m1 = f"/mnt/install/{os.path.basename(p1)}"
+            m2 = f"/mnt/install/{os.path.basename(p2)}" if has_efi else None
+
+            self.p1 = p1
+            self.m1 = m1
+
+            steps = [
+                ( 0,  _("Unmounting disk..."),       lambda: unmount_partitions(p1, p2, m1, m2)),
+                ( 5,  _("Mounting partition..."),    lambda: mount_partition(p1, m1)),
+            ]
+            if has_efi:
+                steps.append((10, _("Mounting EFI partition..."), lambda: mount_partition(p2, m2)))
+
+            for percent, message, func in steps:
+                if self.cancel_requested:
+                    return
+                self._report_progress(percent, message)
+                try:
+                    func()
+                except Exception as e:
+                    if self.cancel_requested:
+                        return
+                    import traceback
+                    tb = traceback.format_exc()
+                    GLib.idle_add(self._append_log, _("Error at step: ") + message)
+                    GLib.idle_add(self._append_log, tb)
+                    GLib.idle_add(self._show_error, _("Update failed: ") + str(e))
+                    return
+
+            if not self.cancel_requested:
+                self._report_progress(18, _("Updating files..."))
+                src = find_minios_source(self.source)
+                if not src:
+                    if not self.cancel_requested:
+                        GLib.idle_add(self._show_error, _("Cannot find MiniOS image."))
+                    return
+                try:
+                    update_minios_files(src, m1, self._report_progress, self._log_async,
+                                        self.boot_config_type, verify=self.verify_copy)
+                    self._report_progress(96, _("Copying EFI files..."))
+                    copy_efi_files(src, m2 or m1, self._log_async)
+                    # ldlinux.sys must match the updated SYSLINUX modules;
+                    # exFAT installs have no extlinux, as on install
+                    if get_partition_table_type(dev) == 'dos' and get_filesystem_type(p1) != 'exfat':
+                        install_bootloader(dev, p1, p2 if has_efi else None,
+                                           self._report_progress, self._log_async)
+                except Exception as e:
+                    if self.cancel_requested:
+                        return
+                    import traceback
+                    tb = traceback.format_exc()
+                    GLib.idle_add(self._append_log, _("Error during update:"))
+                    GLib.idle_add(self._append_log, tb)
+                    GLib.idle_add(self._show_error, _("Update failed: ") + str(e))
+                    return
+
+            if not self.cancel_requested:
+                self._report_progress(98, _("Unmounting disk..."))
+                try:
+                    unmount_partitions(p1, p2, m1, m2)
+                except Exception as e:
+                    if self.cancel_requested:
+                        return
+                    import traceback
+                    tb = traceback.format_exc()
+                    GLib.idle_add(self._append_log, _("Error during unmount:"))
+                    GLib.idle_add(self._append_log, tb)
+                    GLib.idle_add(self._show_error, _("Update failed: ") + str(e))
+                    return
+                self._report_progress(100, _("Update complete!"))
+                GLib.idle_add(self._setup_restart_button)
+        finally:
+            resume_disk_monitoring()
+
     def _show_error(self, message: str):
         dlg = Gtk.MessageDialog(
             transient_for=self,
@@ -868,8 +1297,9 @@ class InstallerWindow(Gtk.ApplicationWindow):
 # ──────────────────────────────────────────────────────────────────────────────
 
 class MiniOSInstallerApp(Gtk.Application):
-    def __init__(self):
+    def __init__(self, source: Optional[str] = None):
         super().__init__(application_id=APPLICATION_ID)
+        self.source = source
         self.window = None
 
     def do_activate(self):
@@ -895,9 +1325,11 @@ class MiniOSInstallerApp(Gtk.Application):
 
 
 def main():
+    # An optional argument names the MiniOS source (directory, archive, ISO image or mirror URL)
+    source = sys.argv[1] if len(sys.argv) > 1 else None
     try:
-        app = MiniOSInstallerApp()
-        return app.run(sys.argv)
+        app = MiniOSInstallerApp(source)
+        return app.run(sys.argv[:1])
     except KeyboardInterrupt:
         return 130
 
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MiniOS Installer - Mirror Utilities
+Installing MiniOS from an HTTP mirror with a local download cache.
+
+Copyright (C) 2025 MiniOS Linux
+Author: crims0n <crims0n@minios.dev>
+"""
+
+import os
+import gettext
+import json
+import posixpath
+import re
+import threading
+import urllib.error
+import urllib.request
+from typing import NamedTuple, Optional, Callable, List, Tuple
+from io_utils import (copy_file, drop_cache, hash_fd, preallocate, write_all, CopyResult,
+                      COPY_CHUNK_SIZE, PREALLOCATE_MIN_SIZE)
+
+# Set up gettext for localization
+gettext.bindtextdomain('minios-installer', '/usr/share/locale')
+gettext.textdomain('minios-installer')
+_ = gettext.gettext
+
+# File list published in the root of a mirrored MiniOS tree
+MIRROR_MANIFEST = 'manifest.json'
+
+# Verified downloads, stored by BLAKE2b digest; the environment variable
+# overrides the location, e.g. to keep the cache on a persistent disk
+DEFAULT_CACHE_DIR = '/var/cache/minios-installer/mirror'
+CACHE_DIR_ENV = 'MINIOS_INSTALLER_MIRROR_CACHE'
+
+# Most bytes kept in the cache; the least recently used files go first
+DEFAULT_CACHE_LIMIT = 4 * 1024 * 1024 * 1024
+
+# Filesystems held in RAM, where a cache would only eat memory
+VOLATILE_FILESYSTEMS = ('tmpfs', 'ramfs', 'overlay', 'aufs')
+
+# Files at least this large are fetched as RANGE_PARTS parallel range requests
+RANGE_MIN_SIZE = 16 * 1024 * 1024
+RANGE_PARTS = 4
+
+# Amount of data read from a response at a time
+HTTP_CHUNK_SIZE = 1024 * 1024
+HTTP_TIMEOUT = 30
+
+# BLAKE2b digest as create_manifest() writes it
+DIGEST_PATTERN = re.compile(r'[0-9a-f]{128}')
+
+METHOD_DOWNLOAD = 'download'
+METHOD_CACHED = 'cache'
+
+
+def is_volatile_path(path: str) -> bool:
+    """
+    True if path (or, if it does not exist yet, its nearest existing
+    parent) is on a filesystem kept in RAM, such as a live system's overlay.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    fs_type = None
+    longest = -1
+    try:
+        with open('/proc/self/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+                if inside and len(mount_point) > longest:
+                    fs_type, longest = fields[2], len(mount_point)
+    except (IOError, OSError):
+        return False
+    return fs_type in VOLATILE_FILESYSTEMS
+
+
+def is_mirror_url(source: str) -> bool:
+    """
+    True if source is an HTTP(S) URL.
+    """
+    return source.startswith(('http://', 'https://'))
+
+
+class MirrorFile(NamedTuple):
+    """A file listed in a mirror manifest; path is relative to the MiniOS tree."""
+    path: str
+    size: int
+    blake2b: str
+    mode: int
+    mtime: int
+
+    def stat(self) -> os.stat_result:
+        """
+        Return a stat result describing the file as the manifest lists it.
+        """
+        ns = self.mtime * 10**9
+        blocks = (self.size + 511) // 512
+        return os.stat_result((self.mode, 0, 0, 1, 0, 0, self.size,
+                               self.mtime, self.mtime, self.mtime,
+                               float(self.mtime), float(self.mtime), float(self.mtime),
+                               ns, ns, ns, 4096, blocks))
+
+
+def create_manifest(src: str) -> dict:
+    """
+    Build the mirror manifest for the MiniOS tree at src, for publishing
+    as src/manifest.json.
+    """
+    files = []
+    for root, dirs, names in os.walk(src):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, src)
+            if rel == MIRROR_MANIFEST or not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                digest = hash_fd(f.fileno(), st.st_size)
+            files.append({'path': rel, 'size': st.st_size, 'blake2b': digest,
+                          'mode': st.st_mode & 0o7777, 'mtime': int(st.st_mtime)})
+    return {'files': files}
+
+
+class MirrorSource:
+    """
+    A MiniOS tree served over HTTP together with a manifest that lists
+    every file with its size and BLAKE2b digest. Files are written to the
+    target while they download, large ones as parallel range requests,
+    and also to a content-addressed cache in cache_dir (CACHE_DIR_ENV or
+    DEFAULT_CACHE_DIR by default) once their digest checks out. Files
+    already in the cache are copied from there, so a repeated install from
+    the same mirror only fetches the manifest. The cache holds at most
+    cache_limit bytes and is not used at all on RAM-backed storage.
+    """
+
+    def __init__(self, url: str, cache_dir: Optional[str] = None,
+                 cache_limit: int = DEFAULT_CACHE_LIMIT):
+        self.url = url.rstrip('/') + '/'
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.cache_limit = cache_limit
+        self.caching = cache_limit > 0 and not is_volatile_path(self.cache_dir)
+        self.downloaded = 0
+        self.cached = 0
+        self._lock = threading.Lock()
+        try:
+            with urllib.request.urlopen(self.url + MIRROR_MANIFEST, timeout=HTTP_TIMEOUT) as r:
+                manifest = json.loads(r.read().decode('utf-8'))
+            self.files = [MirrorFile(_manifest_path(f['path']), int(f['size']),
+                                     _manifest_digest(f['blake2b']),
+                                     0o100000 | int(f.get('mode', 0o644)), int(f.get('mtime', 0)))
+                          for f in manifest['files']]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise RuntimeError(_("Cannot read the mirror manifest at {url}: {error}").format(
+                url=self.url + MIRROR_MANIFEST, error=e))
+        self._by_url = {self.file_url(f): f for f in self.files}
+
+    def file_url(self, f: MirrorFile) -> str:
+        return self.url + urllib.request.pathname2url(f.path).lstrip('/')
+
+    def cache_path(self, f: MirrorFile) -> str:
+        return os.path.join(self.cache_dir, f.blake2b[:2], f.blake2b)
+
+    def is_cached(self, f: MirrorFile) -> bool:
+        if not self.caching:
+            return False
+        try:
+            return os.path.getsize(self.cache_path(f)) == f.size
+        except OSError:
+            return False
+
+    def copy(self, url: str, dst: str, chunk_size: int = COPY_CHUNK_SIZE,
+             progress: Optional[Callable[[int], None]] = None,
+             sync: bool = False, verify: bool = False, writeback_window: int = 0) -> CopyResult:
+        """
+        Write the file at url (as returned by file_url()) to dst, from the
+        cache if it is there, else from the mirror. Arguments work as for
+        copy_file(). Downloads are checked against the manifest digest
+        and raise RuntimeError on a mismatch.
+        """
+        f = self._by_url[url]
+        if self.is_cached(f):
+            result = copy_file(self.cache_path(f), dst, size=f.size, chunk_size=chunk_size,
+                               progress=progress, sync=sync, verify=verify,
+                               writeback_window=writeback_window)
+            # Mark it recently used for _make_room()
+            os.utime(self.cache_path(f))
+            self._apply_stat(f, dst)
+            with self._lock:
+                self.cached += 1
+            return result._replace(method=METHOD_CACHED)
+        return self._download(f, url, dst, progress, sync, verify)
+
+    def _apply_stat(self, f: MirrorFile, dst: str) -> None:
+        os.chmod(dst, f.mode & 0o7777)
+        os.utime(dst, (f.mtime, f.mtime))
+
+    def _download(self, f: MirrorFile, url: str, dst: str,
+                  progress: Optional[Callable[[int], None]], sync: bool, verify: bool) -> CopyResult:
+        cache = self.caching and f.size <= self.cache_limit
+        blob = self.cache_path(f)
+        part = f"{blob}.{os.getpid()}.{threading.get_ident()}.part"
+        if cache:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            self._make_room(f.size)
+        try:
+            with open(dst, 'w+b') as fdst, open(part if cache else os.devnull, 'w+b') as fcache:
+                fds = (fdst.fileno(), fcache.fileno()) if cache else (fdst.fileno(),)
+                if f.size >= PREALLOCATE_MIN_SIZE:
+                    preallocate(fdst.fileno(), f.size)
+                self._fetch(url, f.size, fds, progress)
+                digest = hash_fd(fds[-1], f.size)
+                if digest != f.blake2b:
+                    raise RuntimeError(_("Checksum mismatch in download: ") + url)
+                target_digest = None
+                if sync or verify:
+                    os.fdatasync(fdst.fileno())
+                if verify:
+                    drop_cache(fdst.fileno())
+                    target_digest = hash_fd(fdst.fileno(), f.size)
+            if cache:
+                os.replace(part, blob)
+        finally:
+            if cache and os.path.exists(part):
+                os.remove(part)
+        self._apply_stat(f, dst)
+        with self._lock:
+            self.downloaded += f.size
+        return CopyResult(METHOD_DOWNLOAD, f.size, digest, target_digest)
+
+    def _make_room(self, size: int) -> None:
+        """
+        Delete the least recently used cache files until size more bytes
+        fit within cache_limit.
+        """
+        with self._lock:
+            blobs = []
+            for root, _dirs, names in os.walk(self.cache_dir):
+                for name in names:
+                    if name.endswith('.part'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    blobs.append((st.st_mtime, st.st_size, path))
+            total = sum(blob_size for _mtime, blob_size, _path in blobs)
+            for _mtime, blob_size, path in sorted(blobs):
+                if total + size <= self.cache_limit:
+                    break
+                try:
+                    os.remove(path)
+                    total -= blob_size
+                except OSError:
+                    pass
+
+    def _fetch(self, url: str, size: int, fds: Tuple[int, ...],
+               progress: Optional[Callable[[int], None]]) -> None:
+        """
+        Download url into every fd of fds at matching offsets, with up to
+        RANGE_PARTS parallel range requests. Servers that ignore ranges
+        send the whole file in reply to the first request.
+        """
+        if size < RANGE_MIN_SIZE:
+            ranges = [(0, size)]
+        else:
+            step = -(-size // RANGE_PARTS)
+            ranges = [(start, min(start + step, size)) for start in range(0, size, step)]
+
+        first = self._request(url, *ranges[0]) if len(ranges) > 1 else self._request(url)
+        if first.status != 206:
+            ranges = [(0, size)]
+        errors: List[BaseException] = []
+
+        def fetch_part(start: int, end: int, response=None) -> None:
+            try:
+                if response is None:
+                    response = self._request(url, start, end)
+                    if response.status != 206:
+                        raise RuntimeError(_("Mirror ignored a range request: ") + url)
+                with response:
+                    offset = start
+                    while offset < end:
+                        data = response.read(min(HTTP_CHUNK_SIZE, end - offset))
+                        if not data:
+                            raise RuntimeError(_("Download ended early: ") + url)
+                        for fd in fds:
+                            write_all(fd, data, offset)
+                        offset += len(data)
+                        if progress:
+                            progress(len(data))
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=fetch_part, args=part, name='minios-mirror', daemon=True)
+                   for part in ranges[1:]]
+        for thread in threads:
+            thread.start()
+        fetch_part(*ranges[0], response=first)
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _request(self, url: str, start: Optional[int] = None, end: Optional[int] = None):
+        headers = {}
+        if start is not None:
+            headers['Range'] = f"bytes={start}-{end - 1}"
+        try:
+            return urllib.request.urlopen(urllib.request.Request(url, headers=headers),
+                                          timeout=HTTP_TIMEOUT)
+        except (urllib.error.URLError, OSError) as e:
+            raise RuntimeError(_("Download failed: {url}: {error}").format(url=url, error=e))
+
+
+def _manifest_path(path: str) -> str:
+    """
+    Return a manifest file path normalised, like _archive_source_rel()
+    does for archives. Absolute paths and paths containing '..' would
+    land outside the target and raise ValueError.
+    """
+    if not isinstance(path, str) or path.startswith('/') or '..' in path.split('/'):
+        raise ValueError(f"unsafe path {path!r}")
+    rel = posixpath.normpath(path)
+    if rel in ('', '.'):
+        raise ValueError(f"unsafe path {path!r}")
+    return rel
+
+
+def _manifest_digest(digest: str) -> str:
+    """
+    Return a manifest digest, which names files in the cache, or raise
+    ValueError if it is not a hex BLAKE2b digest.
+    """
+    if not isinstance(digest, str) or not DIGEST_PATTERN.fullmatch(digest):
+        raise ValueError(f"invalid digest {digest!r}")
+    return digest
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MiniOS Installer - Module Utilities
+Building MiniOS .sb (SquashFS) modules.
+
+Copyright (C) 2025 MiniOS Linux
+Author: crims0n <crims0n@minios.dev>
+"""
+
+import os
+import re
+import shutil
+import gettext
+import struct
+import subprocess
+import threading
+from collections import deque
+from typing import Optional, Callable, Iterable, Tuple
+
+# Set up gettext for localization
+gettext.bindtextdomain('minios-installer', '/usr/share/locale')
+gettext.textdomain('minios-installer')
+_ = gettext.gettext
+
+# Writable layer of the running live system, for livekit and live-boot
+LIVE_CHANGES_DIRS = (
+    '/run/initramfs/memory/changes',
+    '/run/live/overlay/rw',
+    '/lib/live/mount/overlay/rw',
+)
+
+# Paths in the live changes that are not worth keeping on the installed system
+LIVE_CHANGES_EXCLUDE = (
+    'tmp',
+    'var/tmp',
+    'var/cache/apt/archives/*.deb',
+    'var/lib/apt/lists/*',
+    'var/cache/minios-installer',
+    '.wh..wh.*',
+)
+
+SQUASHFS_MAGIC = b'hsqs'
+
+# Compressor ids in the SquashFS superblock, by mksquashfs -comp name
+SQUASHFS_COMPRESSORS = {1: 'gzip', 2: 'lzma', 3: 'lzo', 4: 'xz', 5: 'lz4', 6: 'zstd'}
+
+DEFAULT_COMPRESSION = 'zstd'
+
+# First mksquashfs release with the -percentage progress output
+PERCENTAGE_MIN_VERSION = (4, 6)
+
+# How often a running mksquashfs is checked for cancellation (seconds)
+CANCEL_POLL_INTERVAL = 0.2
+
+# Lines of mksquashfs output kept for the error message of a failed run
+ERROR_LINES = 20
+
+
+def find_live_changes() -> Optional[str]:
+    """
+    Return the directory holding the changes made in the running live
+    session, or None if there is none or it is empty.
+    """
+    for candidate in LIVE_CHANGES_DIRS:
+        try:
+            if os.path.isdir(candidate) and os.listdir(candidate):
+                return candidate
+        except OSError:
+            continue
+    return None
+
+
+def squashfs_compression(path: str) -> Optional[str]:
+    """
+    Return the mksquashfs -comp name of the compressor used by the module
+    at path, or None if it is not a SquashFS image.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(22)
+    except OSError:
+        return None
+    if len(header) < 22 or header[:4] != SQUASHFS_MAGIC:
+        return None
+    return SQUASHFS_COMPRESSORS.get(struct.unpack_from('<H', header, 20)[0])
+
+
+def mksquashfs_version() -> Optional[Tuple[int, ...]]:
+    """
+    Return the installed mksquashfs version as a tuple of numbers, or
+    None if it cannot be determined.
+    """
+    try:
+        output = subprocess.run(['mksquashfs', '-version'], stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, universal_newlines=True,
+                                timeout=10).stdout
+    except (subprocess.SubprocessError, OSError):
+        return None
+    match = re.search(r'version\s+(\d+(?:\.\d+)*)', output)
+    return tuple(int(part) for part in match.group(1).split('.')) if match else None
+
+
+def pack_directory(src: str, dst: str, compression: str = DEFAULT_COMPRESSION,
+                   exclude: Iterable[str] = (),
+                   progress: Optional[Callable[[int], None]] = None,
+                   canceled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Pack the directory src into the SquashFS module dst with mksquashfs.
+    The image is written straight to dst.part on the target and renamed
+    into place once complete, so the target sees one sequential write
+    and never a partial module. exclude holds wildcard paths relative to
+    src. progress is called with the percentage done as mksquashfs
+    reports it (squashfs-tools 4.6 and later; older versions pack
+    without progress). canceled is polled every CANCEL_POLL_INTERVAL
+    seconds and stops the packing when it returns True. Returns the size of the module in bytes.
+    """
+    if shutil.which('mksquashfs') is None:
+        raise RuntimeError(_("mksquashfs is required to pack {path}.").format(path=src))
+    part = dst + '.part'
+    command = ['mksquashfs', src, part, '-noappend', '-comp', compression]
+    version = mksquashfs_version()
+    command.append('-percentage' if version and version >= PERCENTAGE_MIN_VERSION else '-no-progress')
+    if exclude:
+        command += ['-wildcards', '-e'] + list(exclude)
+
+    # Warnings share the pipe with the progress, so a chatty run cannot
+    # fill an unread stderr pipe and stall
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            universal_newlines=True)
+    output = deque(maxlen=ERROR_LINES)
+    done = threading.Event()
+    stopped = threading.Event()
+
+    def watch() -> None:
+        while not done.wait(CANCEL_POLL_INTERVAL):
+            if canceled():
+                stopped.set()
+                proc.kill()
+                return
+
+    watcher = threading.Thread(target=watch, name='minios-mksquashfs', daemon=True)
+    if canceled:
+        watcher.start()
+    try:
+        for line in proc.stdout:
+            line = line.strip()
+            if line.isdigit():
+                if progress:
+                    progress(int(line))
+            elif line:
+                output.append(line)
+        proc.wait()
+        if stopped.is_set():
+            raise RuntimeError(_("Installation canceled by user."))
+        if proc.returncode != 0:
+            raise RuntimeError(_("Failed to pack {path}: {error}").format(
+                path=src, error='\n'.join(output)))
+        os.replace(part, dst)
+    finally:
+        done.set()
+        if watcher.is_alive():
+            watcher.join()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        proc.stdout.close()
+        if os.path.exists(part):
+            os.remove(part)
+    return os.path.getsize(dst)
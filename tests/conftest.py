@@ -6,7 +6,9 @@ Pytest fixtures for minios-installer tests.
 
 import sys
 import os
+import re
 import pytest
+from http.server import SimpleHTTPRequestHandler
 from unittest.mock import MagicMock, patch
 
 # Add lib directory to path for imports
@@ -81,3 +83,167 @@ def sample_proc_mounts():
 /dev/sda2 /boot/efi vfat rw,relatime,fmask=0077,dmask=0077 0 0
 /dev/sdb1 /mnt/backup ext4 rw,relatime 0 0
 tmpfs /tmp tmpfs rw,nosuid,nodev 0 0'''
+
+
+def _iso_record(name, lba, size, flags, system_use=b''):
+    """One ISO9660 directory record."""
+    import struct
+    pad = b'' if len(name) % 2 else b'\0'
+    length = 33 + len(name) + len(pad) + len(system_use)
+    length += length % 2
+    record = (struct.pack('<BBI', length, 0, lba) + struct.pack('>I', lba) +
+              struct.pack('<I', size) + struct.pack('>I', size) +
+              bytes([125, 6, 15, 12, 30, 0, 0]) + bytes([flags, 0, 0]) +
+              struct.pack('<H', 1) + struct.pack('>H', 1) + bytes([len(name)]) +
+              name + pad + system_use)
+    return record.ljust(length, b'\0')
+
+
+def _make_iso(path, files, joliet=False, rock_ridge=False, multi_extent=()):
+    """
+    Write a small ISO9660 image holding files ({"dir/name": bytes}), with
+    optional Joliet and Rock Ridge names. Files listed in multi_extent are
+    stored as two extents. Every directory must fit in one sector.
+    """
+    import struct
+    sector = 2048
+    dirs = {''}
+    for name in files:
+        parts = name.split('/')
+        for i in range(1, len(parts)):
+            dirs.add('/'.join(parts[:i]))
+    children = {d: [] for d in dirs}
+    for d in dirs:
+        if d:
+            children[d.rsplit('/', 1)[0] if '/' in d else ''].append(d)
+    for name in files:
+        children[name.rsplit('/', 1)[0] if '/' in name else ''].append(name)
+
+    trees = ['iso'] + (['joliet'] if joliet else [])
+    next_lba = 16 + len(trees) + 1
+    dir_lba = {}
+    for tree in trees:
+        for d in sorted(dirs):
+            dir_lba[tree, d] = next_lba
+            next_lba += 1
+    file_lba = {}
+    for name in sorted(files):
+        file_lba[name] = next_lba
+        next_lba += max(1, -(-len(files[name]) // sector))
+
+    def ident(tree, rel, is_dir):
+        base = rel.rsplit('/', 1)[-1]
+        if tree == 'joliet':
+            # Versioned like genisoimage writes them
+            return base.encode('utf-16-be') if is_dir else (base + ';1').encode('utf-16-be')
+        short = base.upper().replace('-', '_').encode()
+        return short if is_dir else short + b';1'
+
+    def rr(rel, mode):
+        name = rel.rsplit('/', 1)[-1].encode()
+        return (b'NM' + bytes([5 + len(name), 1, 0]) + name +
+                b'PX' + bytes([36, 1]) + struct.pack('<I', mode) + struct.pack('>I', mode) + bytes(24))
+
+    def directory(tree, d):
+        use_rr = rock_ridge and tree == 'iso'
+        parent = d.rsplit('/', 1)[0] if '/' in d else ''
+        data = _iso_record(b'\0', dir_lba[tree, d], sector, 2,
+                           b'SP' + bytes([7, 1, 0xBE, 0xEF, 0]) if use_rr and not d else b'')
+        data += _iso_record(b'\1', dir_lba[tree, parent], sector, 2)
+        for rel in sorted(children[d]):
+            is_dir = rel in dirs
+            su = rr(rel, 0o040755 if is_dir else 0o100755 if rel.endswith('.sh') else 0o100644) \
+                if use_rr else b''
+            if is_dir:
+                data += _iso_record(ident(tree, rel, True), dir_lba[tree, rel], sector, 2, su)
+            elif rel in multi_extent:
+                size = len(files[rel])
+                data += _iso_record(ident(tree, rel, False), file_lba[rel], sector, 0x80, su)
+                data += _iso_record(ident(tree, rel, False), file_lba[rel] + 1, size - sector, 0, su)
+            else:
+                data += _iso_record(ident(tree, rel, False), file_lba[rel], len(files[rel]), 0, su)
+        assert len(data) <= sector
+        return data.ljust(sector, b'\0')
+
+    image = bytearray(next_lba * sector)
+
+    def descriptor(kind, tree):
+        vd = bytearray(sector)
+        vd[0] = kind
+        vd[1:7] = b'CD001\1'
+        if kind != 255:
+            vd[80:88] = struct.pack('<I', next_lba) + struct.pack('>I', next_lba)
+            vd[128:132] = struct.pack('<H', sector) + struct.pack('>H', sector)
+            vd[156:190] = _iso_record(b'\0', dir_lba[tree, ''], sector, 2)
+        if kind == 2:
+            vd[88:91] = b'%/E'
+        return vd
+
+    image[16 * sector:17 * sector] = descriptor(1, 'iso')
+    if joliet:
+        image[17 * sector:18 * sector] = descriptor(2, 'joliet')
+    image[(16 + len(trees)) * sector:(17 + len(trees)) * sector] = descriptor(255, None)
+    for (tree, d), lba in dir_lba.items():
+        image[lba * sector:(lba + 1) * sector] = directory(tree, d)
+    for name, lba in file_lba.items():
+        image[lba * sector:lba * sector + len(files[name])] = files[name]
+    path.write_bytes(bytes(image))
+    return path
+
+
+@pytest.fixture
+def make_iso():
+    """Builder for small ISO9660 images: make_iso(path, files, joliet=, rock_ridge=)."""
+    return _make_iso
+
+
+class _RangeHandler(SimpleHTTPRequestHandler):
+    """Static file handler that honours single Range requests and logs every request."""
+
+    requests = None
+    ranges = True
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get('Range')))
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range') or '')
+        path = self.translate_path(self.path)
+        if not match or not self.ranges or not os.path.isfile(path):
+            return super().do_GET()
+        start, end = int(match.group(1)), int(match.group(2))
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Content-Range', f'bytes {start}-{end}/{os.path.getsize(path)}')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """Serve a MiniOS tree with a manifest; yields (url, tree, requests, handler class)."""
+    import json
+    import threading
+    from functools import partial
+    from http.server import ThreadingHTTPServer
+    from mirror_utils import create_manifest
+
+    tree = tmp_path / "mirror" / "minios"
+    (tree / "boot").mkdir(parents=True)
+    (tree / "boot" / "vmlinuz").write_bytes(b"k" * 5000)
+    (tree / "01-core.sb").write_bytes(os.urandom(3 * 1024 * 1024 + 123))
+    (tree / "manifest.json").write_text(json.dumps(create_manifest(str(tree))))
+    requests = []
+    handler = type('Handler', (_RangeHandler,), {'requests': requests})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=str(tmp_path / "mirror")))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/minios", tree, requests, handler
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for archive_utils module.
+"""
+
+import os
+import shutil
+import tarfile
+import pytest
+
+
+requires_xz = pytest.mark.skipif(shutil.which('xz') is None, reason="xz is not installed")
+
+
+def _make_archive(path, files):
+    """Write a .tar.xz holding files ({name: bytes}) under minios/."""
+    src = path.parent / "tree"
+    for name, data in files.items():
+        (src / "minios" / name).parent.mkdir(parents=True, exist_ok=True)
+        (src / "minios" / name).write_bytes(data)
+    with tarfile.open(path, 'w:xz') as tar:
+        tar.add(src / "minios", arcname="minios")
+    return path
+
+
+class TestDecompressorCommand:
+    """Tests for archive type detection."""
+
+    def test_known_suffixes(self):
+        """zstd and xz archives are recognized by their suffix."""
+        from archive_utils import decompressor_command
+
+        assert decompressor_command("/media/minios.tar.zst")[0] == 'zstd'
+        assert decompressor_command("/media/MINIOS.TXZ")[0] == 'xz'
+        assert decompressor_command("/media/minios.iso") is None
+
+    def test_is_archive_needs_a_file(self, tmp_path):
+        """A directory named like an archive is not an archive."""
+        from archive_utils import is_archive
+
+        (tmp_path / "minios.tar.xz").mkdir()
+        assert not is_archive(str(tmp_path / "minios.tar.xz"))
+
+
+@requires_xz
+class TestArchiveReader:
+    """Tests for streaming archive extraction."""
+
+    def test_members_and_progress(self, tmp_path):
+        """Members arrive in order with their data; progress sums to the compressed size."""
+        from archive_utils import ArchiveReader
+
+        archive = _make_archive(tmp_path / "minios.tar.xz",
+                                {"boot/vmlinuz": b"k" * 5000, "01-core.sb": os.urandom(300000)})
+        reported = []
+
+        contents = {}
+        with ArchiveReader(str(archive), progress=reported.append) as reader:
+            for member, data in reader.members():
+                if data is not None:
+                    contents[member.name] = data.read()
+
+        assert contents["minios/boot/vmlinuz"] == b"k" * 5000
+        assert len(contents["minios/01-core.sb"]) == 300000
+        assert sum(reported) == archive.stat().st_size
+
+    def test_corrupt_archive(self, tmp_path):
+        """A damaged archive raises RuntimeError."""
+        from archive_utils import ArchiveReader
+
+        archive = tmp_path / "minios.tar.xz"
+        archive.write_bytes(b"not an xz stream" * 100)
+
+        with pytest.raises(RuntimeError):
+            with ArchiveReader(str(archive)) as reader:
+                list(reader.members())
+
+    def test_close_early(self, tmp_path):
+        """Leaving the reader before the end stops the decompressor."""
+        from archive_utils import ArchiveReader
+
+        archive = _make_archive(tmp_path / "minios.tar.xz",
+                                {f"modules/{i:02d}.sb": os.urandom(200000) for i in range(20)})
+
+        with ArchiveReader(str(archive)) as reader:
+            next(reader.members())
+        assert reader._proc.returncode is not None
+
+    def test_missing_tool(self, tmp_path):
+        """A missing decompressor is reported by name."""
+        from archive_utils import ArchiveReader
+        from unittest.mock import patch
+
+        archive = _make_archive(tmp_path / "minios.tar.xz", {"a": b"a"})
+
+        with patch('archive_utils.shutil.which', return_value=None):
+            with pytest.raises(RuntimeError, match="xz is required"):
+                ArchiveReader(str(archive))
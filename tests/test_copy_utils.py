@@ -5,6 +5,9 @@ Tests for copy_utils module.
 """
 
 import os
+import shutil
+import pytest
+from unittest.mock import patch
 
 
 class TestSyslinuxConfigProcessing:
@@ -76,3 +79,1067 @@ class TestSyslinuxConfigProcessing:
         assert b"locales=" not in result
         assert b"timezone=" not in result
         assert b"keyboard-layouts=" not in result
+
+
+def _make_source_tree(root):
+    """Create a minimal MiniOS source tree for copy tests."""
+    (root / "boot" / "grub").mkdir(parents=True)
+    (root / "modules").mkdir()
+    (root / "changes").mkdir()
+    (root / "boot" / "vmlinuz").write_bytes(b"k" * 4096)
+    (root / "boot" / "grub" / "grub.cfg").write_text("original\n")
+    (root / "boot" / "grub" / "grub.multilang.cfg").write_text("multilang\n")
+    for i in range(8):
+        (root / "modules" / f"0{i}-module.sb").write_bytes(bytes([i]) * (1024 * (i + 1)))
+    (root / "changes" / "user-file").write_text("live session data\n")
+    return root
+
+
+class _Owner:
+    """Stand-in for InstallerWindow: exposes cancel_requested and a bound progress callback."""
+
+    def __init__(self, cancel_after=None):
+        self.cancel_requested = False
+        self.cancel_after = cancel_after
+        self.progress = []
+        self.stats = []
+
+    def report(self, percent, message, stats=None):
+        self.progress.append((percent, message))
+        self.stats.append(stats)
+        if self.cancel_after is not None and len(self.progress) >= self.cancel_after:
+            self.cancel_requested = True
+
+
+class TestSourceManifest:
+    """Tests for the single-pass SourceManifest."""
+
+    def test_scan_collects_files_and_sizes(self, tmp_path):
+        """Maps files under minios/, skips changes/ and sums sizes once."""
+        from copy_utils import SourceManifest
+
+        src = _make_source_tree(tmp_path / "src")
+        manifest = SourceManifest.scan(str(src))
+
+        rels = {entry.rel for entry in manifest}
+        assert "minios/boot/vmlinuz" in rels
+        assert "minios/modules/00-module.sb" in rels
+        assert not any(rel.startswith("minios/changes") for rel in rels)
+        assert manifest.total_size == sum(entry.size for entry in manifest)
+        assert manifest.total_size == sum(
+            os.path.getsize(os.path.join(root, fn))
+            for root, _dirs, files in os.walk(src) if "changes" not in root
+            for fn in files
+        )
+
+    def test_nested_changes_dir_is_copied(self, tmp_path):
+        """Only the top-level changes/ directory is excluded."""
+        from copy_utils import SourceManifest
+
+        src = _make_source_tree(tmp_path / "src")
+        (src / "boot" / "changes").mkdir()
+        (src / "boot" / "changes" / "keep").write_text("x")
+
+        rels = {entry.rel for entry in SourceManifest.scan(str(src))}
+        assert "minios/boot/changes/keep" in rels
+
+    def test_sort_by_layout(self, tmp_path):
+        """Entries follow physical offsets; unmapped files go first, by inode."""
+        from copy_utils import SourceManifest
+
+        for name in ("a", "b", "c", "d"):
+            (tmp_path / name).write_bytes(b"data")
+        manifest = SourceManifest.scan(str(tmp_path))
+        offsets = {"a": 300, "b": None, "c": 100, "d": None}
+        inode = lambda name: (tmp_path / name).stat().st_ino
+
+        with patch('copy_utils.physical_offset',
+                   side_effect=lambda path: offsets[os.path.basename(path)]):
+            manifest.sort_by_layout()
+
+        unmapped = sorted(["b", "d"], key=inode)
+        assert [os.path.basename(e.path) for e in manifest] == unmapped + ["c", "a"]
+
+    def test_sparse_files_count_allocated_bytes(self, tmp_path):
+        """Sparse files add their allocated size, not their length, to the progress total."""
+        from copy_utils import SourceManifest
+
+        with open(tmp_path / "persistence.img", 'wb') as f:
+            f.truncate(32 * 1024 * 1024)
+            f.write(b"d" * 4096)
+        entry_stat = (tmp_path / "persistence.img").stat()
+        if entry_stat.st_blocks * 512 >= entry_stat.st_size:
+            pytest.skip("filesystem does not support sparse files")
+
+        manifest = SourceManifest.scan(str(tmp_path))
+
+        assert manifest.total_size == 32 * 1024 * 1024
+        assert manifest.total_allocated == entry_stat.st_blocks * 512
+
+    def test_add_extra_file(self, tmp_path):
+        """Extra files are stat-ed once and counted in the total."""
+        from copy_utils import SourceManifest
+
+        extra = tmp_path / "config.conf"
+        extra.write_text("LIVE_HOSTNAME=minios\n")
+        manifest = SourceManifest()
+        manifest.add("minios/config.conf", str(extra))
+
+        assert len(manifest) == 1
+        assert manifest.total_size == extra.stat().st_size
+
+
+class TestCopyMiniosFiles:
+    """Tests for the worker-pool copy in copy_minios_files."""
+
+    def test_parallel_copy_copies_tree(self, tmp_path):
+        """Copies every file except changes/ and applies boot config afterwards."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        owner = _Owner()
+        logs = []
+
+        copy_minios_files(str(src), str(dst), owner.report, logs.append, workers=3)
+
+        for i in range(8):
+            name = f"0{i}-module.sb"
+            assert (dst / "minios" / "modules" / name).read_bytes() == (src / "modules" / name).read_bytes()
+        assert not (dst / "minios" / "changes" / "user-file").exists()
+        assert (dst / "minios" / "changes").is_dir()
+        assert (dst / ".disk" / "info").read_text() == "MiniOS"
+        # Post-step ran after the copy and was not overwritten by it
+        assert (dst / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "multilang\n"
+
+        percents = [p for p, _ in owner.progress]
+        assert percents == sorted(percents)
+        assert percents[-1] <= 96
+
+    def test_prefetch_pipeline_copies_tree(self, tmp_path):
+        """The read-ahead pipeline produces the same tree as direct copies."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        logs = []
+
+        with patch('copy_utils.SMALL_FILE_SIZE', 0):
+            copy_minios_files(str(src), str(dst), _Owner().report, logs.append, workers=2,
+                              prefetch_memory=1)
+
+        for i in range(8):
+            name = f"0{i}-module.sb"
+            assert (dst / "minios" / "modules" / name).read_bytes() == (src / "modules" / name).read_bytes()
+        assert any(line.endswith("(prefetch)") for line in logs)
+
+    def test_writeback_limit_split_between_workers(self, tmp_path):
+        """Every worker gets an equal share of the writeback limit."""
+        from copy_utils import copy_minios_files
+        from io_utils import copy_file
+
+        src = _make_source_tree(tmp_path / "src")
+        windows = set()
+
+        def record(src_path, dst_path, **kwargs):
+            windows.add(kwargs['writeback_window'])
+            return copy_file(src_path, dst_path, **kwargs)
+
+        with patch('copy_utils.SMALL_FILE_SIZE', 0), \
+             patch('copy_utils.copy_file', side_effect=record):
+            copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, lambda m: None,
+                              workers=4, writeback_limit=4096)
+
+        assert windows == {1024}
+
+    def test_layout_order_shares_one_read_lock(self, tmp_path):
+        """Copies in on-disk order share a source read lock but still run in parallel."""
+        import threading
+        import time
+        from copy_utils import copy_minios_files
+        from io_utils import copy_file
+
+        src = _make_source_tree(tmp_path / "src")
+        lock = threading.Lock()
+        locks = set()
+        active = [0]
+        most = [0]
+
+        def record(src_path, dst_path, **kwargs):
+            locks.add(kwargs['read_lock'])
+            with lock:
+                active[0] += 1
+                most[0] = max(most[0], active[0])
+            time.sleep(0.01)
+            try:
+                return copy_file(src_path, dst_path, **kwargs)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        with patch('copy_utils.SMALL_FILE_SIZE', 0), \
+             patch('copy_utils.copy_file', side_effect=record):
+            copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, lambda m: None,
+                              workers=4, order_by_layout=True)
+
+        assert len(locks) == 1 and None not in locks
+        assert most[0] > 1
+
+    def test_layout_order_keeps_small_file_batches(self, tmp_path):
+        """Reading in on-disk order still batches small files."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        logs = []
+
+        copy_minios_files(str(src), str(dst), _Owner().report, logs.append, workers=2,
+                          prefetch_memory=1, order_by_layout=True)
+
+        for i in range(8):
+            name = f"0{i}-module.sb"
+            assert (dst / "minios" / "modules" / name).read_bytes() == (src / "modules" / name).read_bytes()
+        assert any("small files" in line for line in logs)
+
+    def test_efi_files_copied_with_main_tree(self, tmp_path):
+        """EFI files go to the ESP in the same pass and count towards progress."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        (src / "boot" / "EFI" / "BOOT").mkdir(parents=True)
+        (src / "boot" / "EFI" / "BOOT" / "bootx64.efi").write_bytes(b"e" * 2048)
+        dst = tmp_path / "dst"
+        esp = tmp_path / "esp"
+        owner = _Owner()
+
+        copy_minios_files(str(src), str(dst), owner.report, lambda m: None, efi_dst=str(esp))
+
+        assert (esp / "EFI" / "BOOT" / "bootx64.efi").read_bytes() == b"e" * 2048
+        assert not (dst / "EFI").exists()
+        assert owner.stats[-1].copied == owner.stats[-1].total
+        percents = [p for p, _ in owner.progress]
+        assert percents == sorted(percents)
+
+    def test_efi_error_fails_copy(self, tmp_path):
+        """A failing ESP write aborts the whole copy before boot configs are touched."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        (src / "boot" / "EFI").mkdir()
+        (src / "boot" / "EFI" / "grub.cfg").write_text("efi\n")
+        esp = tmp_path / "esp"
+        esp.write_text("not a directory")
+
+        with pytest.raises(OSError):
+            copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, lambda m: None,
+                              efi_dst=str(esp))
+
+        grub_cfg = tmp_path / "dst" / "minios" / "boot" / "grub" / "grub.cfg"
+        assert not grub_cfg.exists() or grub_cfg.read_text() != "multilang\n"
+
+    def test_module_extents_reported(self, tmp_path):
+        """Every installed module gets its extent count logged."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        logs = []
+
+        with patch('copy_utils.extent_count', return_value=1):
+            copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, logs.append)
+
+        assert "Module minios/modules/03-module.sb: 1 extents" in logs
+        assert "8 of 8 modules are contiguous on the target" in logs
+
+    def test_cancel_stops_copy(self, tmp_path):
+        """Raises RuntimeError and leaves no config post-processing when canceled."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        owner = _Owner(cancel_after=1)
+
+        with pytest.raises(RuntimeError, match="canceled"):
+            copy_minios_files(str(src), str(dst), owner.report, lambda m: None, workers=1)
+
+        assert not (dst / "minios" / "boot" / "grub" / "grub.cfg").exists() or \
+            (dst / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "original\n"
+
+    def test_copy_error_is_raised(self, tmp_path):
+        """Propagates the first worker error to the caller."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        owner = _Owner()
+
+        with patch('copy_utils.SMALL_FILE_SIZE', 0), \
+             patch('copy_utils.copy_file', side_effect=OSError("disk full")):
+            with pytest.raises(OSError, match="disk full"):
+                copy_minios_files(str(src), str(tmp_path / "dst"), owner.report, lambda m: None)
+
+
+class TestCopyRules:
+    """Tests for selective installs."""
+
+    def _tree(self, root):
+        src = _make_source_tree(root)
+        (src / "boot" / "vmlinuz").unlink()
+        for version in ("6.1.0-1-amd64", "6.12.0-2-amd64"):
+            (src / "boot" / f"vmlinuz-{version}").write_bytes(b"k" * 100)
+            (src / "boot" / f"initrfs-{version}.img").write_bytes(b"i" * 100)
+        return src
+
+    def test_globs_and_skipped_modules(self, tmp_path):
+        """Excludes, named modules and include overrides decide what is copied."""
+        from copy_utils import CopyRules, SourceManifest
+
+        src = self._tree(tmp_path / "src")
+        rules = CopyRules(include=["modules/01-*"], exclude=["modules/0[0-3]-*"],
+                          skip_modules=["05-module", "06-module.sb"])
+        manifest = rules.apply(SourceManifest.scan(str(src)), lambda m: None)
+
+        modules = sorted(os.path.basename(e.rel) for e in manifest if e.rel.endswith(".sb"))
+        assert modules == ["01-module.sb", "04-module.sb", "07-module.sb"]
+        assert manifest.total_size == sum(e.size for e in manifest)
+
+    def test_current_kernel_only(self, tmp_path):
+        """Only the running kernel and its initramfs are kept."""
+        from copy_utils import CopyRules, SourceManifest
+
+        src = self._tree(tmp_path / "src")
+        with patch('copy_utils.get_boot_files_from_cmdline',
+                   return_value=("vmlinuz-6.12.0-2-amd64", None)):
+            rules = CopyRules(current_kernel_only=True)
+        manifest = rules.apply(SourceManifest.scan(str(src)), lambda m: None)
+
+        boot = sorted(os.path.basename(e.rel) for e in manifest if "/boot/" in e.rel and "grub" not in e.rel)
+        assert boot == ["initrfs-6.12.0-2-amd64.img", "vmlinuz-6.12.0-2-amd64"]
+
+    def test_unknown_kernel_keeps_all(self, tmp_path):
+        """A running kernel missing from the source never leaves the target unbootable."""
+        from copy_utils import CopyRules, SourceManifest
+
+        src = self._tree(tmp_path / "src")
+        logs = []
+        with patch('copy_utils.get_boot_files_from_cmdline', return_value=("vmlinuz-5.10", None)):
+            rules = CopyRules(current_kernel_only=True)
+        manifest = rules.apply(SourceManifest.scan(str(src)), logs.append)
+
+        assert sum("vmlinuz-" in e.rel for e in manifest) == 2
+        assert any("Running kernel not found" in line for line in logs)
+
+    def test_copy_uses_filtered_totals(self, tmp_path):
+        """Progress reaches the end of the copy range with only the selected files."""
+        from copy_utils import copy_minios_files, CopyRules
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        owner = _Owner()
+
+        copy_minios_files(str(src), str(dst), owner.report, lambda m: None,
+                          rules=CopyRules(exclude=["modules/*"]))
+
+        assert not (dst / "minios" / "modules" / "00-module.sb").exists()
+        assert owner.stats[-1].copied == owner.stats[-1].total
+        assert owner.progress[-1][0] == pytest.approx(96)
+
+
+@pytest.mark.skipif(shutil.which('xz') is None, reason="xz is not installed")
+class TestArchiveInstall:
+    """Tests for installing from a compressed archive of the MiniOS tree."""
+
+    def _archive(self, tmp_path):
+        import tarfile
+
+        src = _make_source_tree(tmp_path / "minios")
+        (src / "boot" / "EFI" / "BOOT").mkdir(parents=True)
+        (src / "boot" / "EFI" / "BOOT" / "bootx64.efi").write_bytes(b"efi")
+        archive = tmp_path / "minios.tar.xz"
+        with tarfile.open(archive, 'w:xz') as tar:
+            tar.add(src, arcname="minios")
+        return src, archive
+
+    def test_extracts_onto_target(self, tmp_path):
+        """The tree lands under minios/ without changes/; boot configs are processed."""
+        from copy_utils import copy_minios_files
+
+        src, archive = self._archive(tmp_path)
+        dst = tmp_path / "dst"
+        owner = _Owner()
+        logs = []
+
+        copy_minios_files(str(archive), str(dst), owner.report, logs.append,
+                          efi_dst=str(tmp_path / "esp"))
+
+        for i in range(8):
+            name = f"0{i}-module.sb"
+            assert (dst / "minios" / "modules" / name).read_bytes() == \
+                (src / "modules" / name).read_bytes()
+        assert not (dst / "minios" / "changes" / "user-file").exists()
+        assert (dst / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "multilang\n"
+        assert (tmp_path / "esp" / "EFI" / "BOOT" / "bootx64.efi").read_bytes() == b"efi"
+        assert (dst / ".disk" / "info").read_text() == "MiniOS"
+        assert owner.progress[-1][0] == pytest.approx(96)
+        assert any(line.startswith("Extracted 12 files") for line in logs)
+
+    def test_rules_apply(self, tmp_path):
+        """Copy rules filter archive members like source files."""
+        from copy_utils import copy_minios_files, CopyRules
+
+        _src, archive = self._archive(tmp_path)
+        dst = tmp_path / "dst"
+
+        copy_minios_files(str(archive), str(dst), _Owner().report, lambda m: None,
+                          rules=CopyRules(skip_modules=("03-module",)))
+
+        assert not (dst / "minios" / "modules" / "03-module.sb").exists()
+        assert (dst / "minios" / "modules" / "04-module.sb").exists()
+
+    def test_cancel(self, tmp_path):
+        """Cancellation stops the extraction."""
+        from copy_utils import copy_minios_files
+
+        _src, archive = self._archive(tmp_path)
+        owner = _Owner(cancel_after=1)
+
+        with pytest.raises(RuntimeError, match="canceled"):
+            copy_minios_files(str(archive), str(tmp_path / "dst"), owner.report, lambda m: None)
+
+    def test_find_source(self, tmp_path):
+        """An archive or a directory given on the command line is used as the source."""
+        from copy_utils import find_minios_source
+
+        src, archive = self._archive(tmp_path)
+
+        assert find_minios_source(str(archive)) == str(archive)
+        assert find_minios_source(str(tmp_path)) == str(tmp_path / "minios")
+        assert find_minios_source(str(src)) == str(src)
+        assert find_minios_source(str(tmp_path / "dst")) is None
+
+
+class TestIsoInstall:
+    """Tests for installing straight from an ISO image."""
+
+    def _image(self, tmp_path, make_iso):
+        files = {"minios/" + str(path.relative_to(tmp_path / "tree")): path.read_bytes()
+                 for path in _make_source_tree(tmp_path / "tree").rglob("*") if path.is_file()}
+        files["minios/boot/EFI/BOOT/bootx64.efi"] = b"efi"
+        return files, make_iso(tmp_path / "minios.iso", files, joliet=True, rock_ridge=True)
+
+    def test_copies_tree_in_image_order(self, tmp_path, make_iso):
+        """Files are read from the image by offset; changes/ is skipped, EFI files are copied."""
+        from copy_utils import copy_minios_files, find_minios_source
+        import io_utils
+
+        files, image = self._image(tmp_path, make_iso)
+        dst = tmp_path / "dst"
+        offsets = []
+        real_copy = io_utils.copy_extents
+
+        def tracking_copy(src, extents, *args, **kwargs):
+            offsets.append(extents[0][0])
+            return real_copy(src, extents, *args, **kwargs)
+
+        assert find_minios_source(str(image)) == str(image)
+        with patch('copy_utils.copy_extents', side_effect=tracking_copy):
+            copy_minios_files(str(image), str(dst), _Owner().report, lambda m: None, workers=1,
+                              efi_dst=str(tmp_path / "esp"))
+
+        for name, data in files.items():
+            if "/changes/" not in name and not name.endswith("grub.cfg"):
+                assert (dst / name).read_bytes() == data
+        assert not (dst / "minios" / "changes" / "user-file").exists()
+        assert (tmp_path / "esp" / "EFI" / "BOOT" / "bootx64.efi").read_bytes() == b"efi"
+        assert (dst / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "multilang\n"
+        assert offsets[1:] == sorted(offsets[1:])
+
+    def test_verify(self, tmp_path, make_iso):
+        """Files read from an image can be verified."""
+        from copy_utils import copy_minios_files
+
+        _files, image = self._image(tmp_path, make_iso)
+        logs = []
+
+        copy_minios_files(str(image), str(tmp_path / "dst"), _Owner().report, logs.append,
+                          verify=True)
+
+        assert any(line.endswith(" verified, 0 mismatched") for line in logs)
+
+
+class TestMirrorInstall:
+    """Tests for installing from an HTTP mirror."""
+
+    def test_second_install_uses_cache(self, mirror, tmp_path):
+        """The first install downloads every file; the next one only reads the manifest."""
+        from copy_utils import copy_minios_files, find_minios_source
+
+        url, tree, requests, _handler = mirror
+        assert find_minios_source(url) == url
+
+        for run in ("first", "second"):
+            logs = []
+            dst = tmp_path / run
+            with patch('mirror_utils.DEFAULT_CACHE_DIR', str(tmp_path / "cache")):
+                copy_minios_files(url, str(dst), _Owner().report, logs.append)
+            assert (dst / "minios" / "01-core.sb").read_bytes() == (tree / "01-core.sb").read_bytes()
+            assert (dst / "minios" / "boot" / "vmlinuz").read_bytes() == b"k" * 5000
+            assert not (dst / "minios" / "manifest.json").exists()
+
+        assert any(line.startswith("Mirror: 2 files from the local cache, 0 MiB") for line in logs)
+        assert [path for path, _r in requests].count("/minios/manifest.json") == 2
+        assert len(requests) == 4
+
+
+class TestPackLiveChanges:
+    """Tests for keeping the live session's changes as a module."""
+
+    def test_changes_packed_into_module(self, tmp_path):
+        """The changes are packed into modules/ with the installed modules' compressor."""
+        from copy_utils import copy_minios_files, LIVE_CHANGES_MODULE
+
+        src = _make_source_tree(tmp_path / "src")
+        (src / "modules" / "00-module.sb").write_bytes(b"hsqs" + b"\0" * 16 + b"\x04\0" + b"\0" * 74)
+        live = tmp_path / "live-changes"
+        (live / "etc").mkdir(parents=True)
+        dst = tmp_path / "dst"
+        owner = _Owner()
+        logs = []
+        packed = []
+
+        def fake_pack(changes, module, compression, exclude, progress, canceled):
+            packed.append((changes, module, compression))
+            assert 'var/cache/minios-installer' in exclude
+            progress(100)
+            with open(module, 'wb') as f:
+                f.write(b"module")
+            return 6
+
+        with patch('copy_utils.find_live_changes', return_value=str(live)), \
+             patch('copy_utils.pack_directory', side_effect=fake_pack):
+            copy_minios_files(str(src), str(dst), owner.report, logs.append, pack_changes=True)
+
+        assert packed == [(str(live), str(dst / LIVE_CHANGES_MODULE), 'xz')]
+        assert (dst / LIVE_CHANGES_MODULE).read_bytes() == b"module"
+        assert not (dst / "minios" / "changes" / "user-file").exists()
+        assert owner.progress[-1][1] == "Packing live session changes... 100%"
+        assert any(line.startswith("Packed live session changes into") for line in logs)
+
+    def test_nothing_to_pack(self, tmp_path):
+        """Without live changes the install goes on without a module."""
+        from copy_utils import copy_minios_files, LIVE_CHANGES_MODULE
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        logs = []
+
+        with patch('copy_utils.find_live_changes', return_value=None), \
+             patch('copy_utils.pack_directory') as pack:
+            copy_minios_files(str(src), str(dst), _Owner().report, logs.append, pack_changes=True)
+
+        pack.assert_not_called()
+        assert not (dst / LIVE_CHANGES_MODULE).exists()
+        assert "No live session changes to pack." in logs
+
+
+class TestFanoutInstall:
+    """Tests for installing to several targets from one source read."""
+
+    def test_all_targets_installed(self, tmp_path):
+        """Every target gets the tree, boot configs and its own progress."""
+        from copy_utils import copy_minios_files_fanout
+
+        src = _make_source_tree(tmp_path / "src")
+        dsts = [tmp_path / "dst1", tmp_path / "dst2"]
+        reports = {}
+
+        class Owner:
+            cancel_requested = False
+
+            def report(self, dst, percent, message, stats=None):
+                reports.setdefault(dst, []).append(percent)
+
+        failed = copy_minios_files_fanout(str(src), [str(d) for d in dsts], Owner().report,
+                                          lambda m: None)
+
+        assert failed == {}
+        for dst in dsts:
+            assert (dst / "minios" / "modules" / "07-module.sb").read_bytes() == \
+                (src / "modules" / "07-module.sb").read_bytes()
+            assert (dst / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "multilang\n"
+            assert reports[str(dst)][-1] == pytest.approx(96)
+
+    def test_failed_target_is_isolated(self, tmp_path):
+        """One broken target is reported while the other is completed."""
+        from copy_utils import copy_minios_files_fanout
+
+        src = _make_source_tree(tmp_path / "src")
+        good = tmp_path / "good"
+        bad = tmp_path / "bad"
+        bad.write_text("not a directory")
+        logs = []
+
+        failed = copy_minios_files_fanout(str(src), [str(good), str(bad)],
+                                          lambda *args: None, logs.append)
+
+        assert list(failed) == [str(bad)]
+        assert (good / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "multilang\n"
+        assert any("failed" in line for line in logs)
+
+    @pytest.mark.parametrize("order_by_layout", [False, True])
+    def test_layout_order_from_caller(self, tmp_path, order_by_layout):
+        """The source is only sorted by on-disk layout when the caller asks for it."""
+        from copy_utils import copy_minios_files_fanout, SourceManifest
+
+        src = _make_source_tree(tmp_path / "src")
+
+        with patch.object(SourceManifest, 'sort_by_layout', autospec=True) as sort_by_layout:
+            copy_minios_files_fanout(str(src), [str(tmp_path / "dst")], lambda *args: None,
+                                     lambda m: None, order_by_layout=order_by_layout)
+
+        assert sort_by_layout.called == order_by_layout
+
+    def test_every_target_failed(self, tmp_path):
+        """Raises when no target is left."""
+        from copy_utils import copy_minios_files_fanout
+
+        src = _make_source_tree(tmp_path / "src")
+        bad = tmp_path / "bad"
+        bad.write_text("x")
+
+        with pytest.raises(RuntimeError):
+            copy_minios_files_fanout(str(src), [str(bad)], lambda *args: None, lambda m: None)
+
+
+class TestSmallFiles:
+    """Tests for the batched small-file path."""
+
+    def test_small_files_batched(self, tmp_path):
+        """Small files are copied in batches with metadata and one log line per batch."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        (src / "boot" / "grub" / "fonts").mkdir()
+        for i in range(70):
+            (src / "boot" / "grub" / "fonts" / f"font{i}.pf2").write_bytes(b"f" * i)
+        os.chmod(src / "boot" / "grub" / "fonts" / "font3.pf2", 0o600)
+        os.utime(src / "boot" / "grub" / "fonts" / "font5.pf2", ns=(10**18, 10**18))
+        dst = tmp_path / "dst"
+        logs = []
+
+        with patch('copy_utils.copy_file') as mock_copy:
+            copy_minios_files(str(src), str(dst), _Owner().report, logs.append)
+
+        mock_copy.assert_not_called()
+        fonts = dst / "minios" / "boot" / "grub" / "fonts"
+        assert (fonts / "font69.pf2").read_bytes() == b"f" * 69
+        assert (fonts / "font3.pf2").stat().st_mode & 0o777 == 0o600
+        assert (fonts / "font5.pf2").stat().st_mtime_ns == 10**18
+        assert not any(line.startswith("Copied file:") for line in logs)
+        assert sum("small files" in line for line in logs) >= 2
+
+    def test_verify_uses_per_file_path(self, tmp_path):
+        """Verified installs checksum small files individually."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        logs = []
+
+        copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, logs.append, verify=True)
+
+        assert not any("small files" in line for line in logs)
+
+
+class TestCopyJournal:
+    """Tests for resumable installs via the on-target copy journal."""
+
+    def test_resume_copies_only_missing_files(self, tmp_path):
+        """Journaled files with matching size are skipped on resume."""
+        from copy_utils import copy_minios_files, JOURNAL_NAME
+        import copy_utils
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        with patch('copy_utils.JOURNAL_MIN_SIZE', 0), patch('copy_utils.SMALL_FILE_SIZE', 0):
+            copy_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+            assert (dst / JOURNAL_NAME).exists()
+
+            # Simulate a file cut short by an interrupted attempt
+            (dst / "minios" / "modules" / "03-module.sb").write_bytes(b"short")
+
+            copied = []
+            real_copy = copy_utils.copy_file
+
+            def tracking_copy(path, dest, **kwargs):
+                copied.append(os.path.relpath(dest, dst))
+                return real_copy(path, dest, **kwargs)
+
+            with patch('copy_utils.copy_file', side_effect=tracking_copy):
+                copy_minios_files(str(src), str(dst), _Owner().report, lambda m: None, resume=True)
+
+        assert "minios/modules/03-module.sb" in copied
+        assert "minios/modules/04-module.sb" not in copied
+        assert (dst / "minios" / "modules" / "03-module.sb").read_bytes() == \
+            (src / "modules" / "03-module.sb").read_bytes()
+
+    def test_small_files_are_not_journaled(self, tmp_path):
+        """Files below JOURNAL_MIN_SIZE are never recorded."""
+        from copy_utils import copy_minios_files, CopyJournal
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        copy_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+
+        journal = CopyJournal(str(dst))
+        journal.load()
+        assert journal.done == {}
+
+    def test_load_ignores_torn_line(self, tmp_path):
+        """A partially written last record does not break loading."""
+        from copy_utils import CopyJournal, JOURNAL_NAME
+
+        (tmp_path / JOURNAL_NAME).write_text(
+            '{"rel": "minios/01-core.sb", "size": 10, "mtime": 5}\n{"rel": "minios/02-x'
+        )
+        journal = CopyJournal(str(tmp_path))
+        journal.load()
+        assert journal.done == {"minios/01-core.sb": (10, 5)}
+
+    def test_remove_copy_journal(self, tmp_path):
+        """The journal is deleted after a successful install; missing is fine."""
+        from copy_utils import has_copy_journal, remove_copy_journal, JOURNAL_NAME
+
+        (tmp_path / JOURNAL_NAME).write_text("")
+        assert has_copy_journal(str(tmp_path))
+        remove_copy_journal(str(tmp_path))
+        assert not (tmp_path / JOURNAL_NAME).exists()
+        assert not has_copy_journal(str(tmp_path))
+        remove_copy_journal(str(tmp_path))
+
+
+class TestUpdateMiniosFiles:
+    """Tests for the incremental update mode."""
+
+    def _installed(self, tmp_path):
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        dst = tmp_path / "dst"
+        copy_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+        return src, dst
+
+    def _tracking(self, dst):
+        """Patch copy_file and delta_update to record the files they write."""
+        import copy_utils
+        from contextlib import ExitStack
+        copied = []
+        patches = ExitStack()
+        for name in ('copy_file', 'delta_update'):
+            def tracking_copy(path, dest, real_copy=getattr(copy_utils, name), **kwargs):
+                copied.append(os.path.relpath(dest, dst))
+                return real_copy(path, dest, **kwargs)
+            patches.enter_context(patch('copy_utils.' + name, side_effect=tracking_copy))
+        return copied, patches
+
+    def test_copies_only_changed_files(self, tmp_path):
+        """Unchanged modules are not rewritten; changed ones are."""
+        from copy_utils import update_minios_files
+
+        src, dst = self._installed(tmp_path)
+        (src / "modules" / "02-module.sb").write_bytes(b"new build" * 100)
+
+        copied, patches = self._tracking(dst)
+        with patch('copy_utils.SMALL_FILE_SIZE', 0), patches:
+            update_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+
+        assert "minios/modules/02-module.sb" in copied
+        assert "minios/modules/01-module.sb" not in copied
+        assert (dst / "minios" / "modules" / "02-module.sb").read_bytes() == b"new build" * 100
+        assert (dst / "minios" / "boot" / "grub" / "grub.cfg").read_text() == "multilang\n"
+
+    def test_installed_config_kept(self, tmp_path):
+        """A config.conf in the source never replaces the installed one."""
+        from copy_utils import update_minios_files
+
+        src, dst = self._installed(tmp_path)
+        (src / "config.conf").write_text("SOURCE=1\n")
+        (dst / "minios" / "config.conf").write_text("USER_SETTING=1\n")
+
+        update_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+
+        assert (dst / "minios" / "config.conf").read_text() == "USER_SETTING=1\n"
+
+    def test_compare_hash_catches_same_size_change(self, tmp_path):
+        """With compare_hash, content changes with identical size and mtime are found."""
+        from copy_utils import update_minios_files
+
+        src, dst = self._installed(tmp_path)
+        target = dst / "minios" / "modules" / "05-module.sb"
+        st = target.stat()
+        target.write_bytes(b"\xff" * st.st_size)
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        copied, patches = self._tracking(dst)
+        with patch('copy_utils.SMALL_FILE_SIZE', 0), patches:
+            update_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+            assert "minios/modules/05-module.sb" not in copied
+            update_minios_files(str(src), str(dst), _Owner().report, lambda m: None, compare_hash=True)
+        assert "minios/modules/05-module.sb" in copied
+
+    def test_changed_module_is_updated_in_place(self, tmp_path):
+        """A module already on the target only gets its changed blocks rewritten."""
+        from copy_utils import update_minios_files
+
+        src, dst = self._installed(tmp_path)
+        module = src / "modules" / "02-module.sb"
+        data = bytearray(os.urandom(512 * 1024))
+        module.write_bytes(data)
+        update_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+
+        data[300 * 1024] ^= 0xFF
+        mtime = module.stat().st_mtime_ns
+        module.write_bytes(data)
+        os.utime(module, ns=(mtime, mtime + 10 * 10**9))
+        logs = []
+        update_minios_files(str(src), str(dst), _Owner().report, logs.append)
+
+        assert (dst / "minios" / "modules" / "02-module.sb").read_bytes() == data
+        assert any(line.endswith("02-module.sb (128 of 512 KiB rewritten)") for line in logs)
+
+    def test_removes_stale_system_files_only(self, tmp_path):
+        """Old kernels and system modules go; user data and config stay."""
+        from copy_utils import update_minios_files
+
+        src, dst = self._installed(tmp_path)
+        (dst / "minios" / "03-old.sb").write_bytes(b"old")
+        (dst / "minios" / "boot" / "vmlinuz-5.10").write_bytes(b"old kernel")
+        (dst / "minios" / "boot" / "syslinux").mkdir(parents=True)
+        (dst / "minios" / "boot" / "syslinux" / "ldlinux.sys").write_bytes(b"loader")
+        (dst / "minios" / "modules" / "99-user.sb").write_bytes(b"user")
+        (dst / "minios" / "config.conf").write_text("USER=1\n")
+
+        update_minios_files(str(src), str(dst), _Owner().report, lambda m: None)
+
+        assert not (dst / "minios" / "03-old.sb").exists()
+        assert not (dst / "minios" / "boot" / "vmlinuz-5.10").exists()
+        assert (dst / "minios" / "boot" / "syslinux" / "ldlinux.sys").exists()
+        assert (dst / "minios" / "modules" / "99-user.sb").exists()
+        assert (dst / "minios" / "config.conf").read_text() == "USER=1\n"
+
+    def test_requires_existing_installation(self, tmp_path):
+        """Refuses to update a disk without a minios/ directory."""
+        from copy_utils import update_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        with pytest.raises(RuntimeError, match="No MiniOS installation"):
+            update_minios_files(str(src), str(tmp_path / "empty"), _Owner().report, lambda m: None)
+
+
+class TestVerification:
+    """Tests for the post-install verification report."""
+
+    def test_verify_logs_report(self, tmp_path):
+        """A clean copy logs a report without mismatches."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        logs = []
+        copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, logs.append, verify=True)
+
+        assert any("0 mismatched" in line for line in logs)
+
+    def test_mismatch_fails_install(self, tmp_path):
+        """Mismatched files are listed and abort the copy."""
+        from copy_utils import copy_minios_files
+
+        src = _make_source_tree(tmp_path / "src")
+        logs = []
+        with patch('io_utils.hash_fd', return_value="bad"):
+            with pytest.raises(RuntimeError, match="Verification failed"):
+                copy_minios_files(str(src), str(tmp_path / "dst"), _Owner().report, logs.append,
+                                  verify=True)
+
+        assert any(line.endswith("minios/boot/vmlinuz") and "mismatch" in line for line in logs)
+
+
+class TestCopyProgress:
+    """Tests for byte-level copy progress reporting."""
+
+    def test_updates_are_rate_limited(self):
+        """Chunk updates are forwarded at most once per interval."""
+        from copy_utils import _CopyProgress
+
+        calls = []
+        with patch('copy_utils.time.monotonic', side_effect=[100.0, 100.0, 101.0, 102.0, 111.0]):
+            tracker = _CopyProgress(1000, lambda p, m, s: calls.append((p, m)), interval=10)
+            tracker.start_file("minios/01-core.sb")
+            tracker.advance(100)
+            tracker.advance(100)
+            tracker.advance(100)
+
+        assert len(calls) == 2
+        assert calls[-1][0] == pytest.approx(18 + 78 * 0.3)
+        assert calls[-1][1].endswith("minios/01-core.sb")
+
+    def test_throughput_and_eta(self):
+        """Throughput is averaged over the window; skipped bytes only count towards the ETA."""
+        from copy_utils import _CopyProgress
+
+        stats = []
+        with patch('copy_utils.time.monotonic', side_effect=[0.0, 1.0, 2.0, 10.0]):
+            tracker = _CopyProgress(10000, lambda p, m, s: stats.append(s), interval=0, window=5)
+            tracker.skip(4000)
+            tracker.advance(1000)
+            tracker.advance(1000)
+            tracker.advance(2000)
+
+        assert stats[0].rate == pytest.approx(1000)
+        assert stats[1].rate == pytest.approx(1000)
+        # The samples before t=5 have left the window
+        assert stats[2].rate == pytest.approx(2000 / 8)
+        assert stats[2].copied == 8000
+        assert stats[2].eta == pytest.approx(2000 / (2000 / 8))
+
+    def test_format_copy_stats(self):
+        """Formats MB/s and a h:mm:ss or m:ss ETA."""
+        from copy_utils import CopyStats, format_copy_stats
+
+        assert format_copy_stats(CopyStats(0, 100)) == "measuring speed..."
+        assert format_copy_stats(CopyStats(0, 100, 38.25e6, 245)) == "38.2 MB/s, 4:05 remaining"
+        assert format_copy_stats(CopyStats(0, 100, 4e6, 3725)) == "4.0 MB/s, 1:02:05 remaining"
+
+    def test_progress_moves_within_a_file(self, tmp_path):
+        """A single large file produces several increasing progress updates."""
+        from copy_utils import _copy_entries, SourceManifest
+
+        big = tmp_path / "01-core.sb"
+        big.write_bytes(b"\0" * (64 * 1024))
+        manifest = SourceManifest()
+        manifest.add("minios/01-core.sb", str(big))
+        owner = _Owner()
+
+        with patch('copy_utils.PROGRESS_INTERVAL', 0), \
+             patch('copy_utils.SMALL_FILE_SIZE', 0):
+            _copy_entries(manifest, str(tmp_path / "dst"), owner.report, lambda m: None, owner, 1,
+                          chunk_size=8192)
+
+        percents = [p for p, _ in owner.progress]
+        assert len(set(percents)) > 4
+        assert percents[-1] == pytest.approx(96)
+
+
+class TestIOTuner:
+    """Tests for the runtime chunk size and worker count tuning."""
+
+    def test_transport_defaults(self):
+        """Known transports have their own defaults, unknown ones get the generic ones."""
+        from copy_utils import io_defaults_for_transport, DEFAULT_COPY_WORKERS
+        from io_utils import COPY_CHUNK_SIZE
+
+        assert io_defaults_for_transport('nvme') == (16 * 1024 * 1024, 8)
+        assert io_defaults_for_transport('mmc')[1] == 1
+        assert io_defaults_for_transport('') == (COPY_CHUNK_SIZE, DEFAULT_COPY_WORKERS)
+
+    def test_keeps_changes_that_pay_off(self):
+        """More workers are kept while they help; chunk changes without gain are reverted."""
+        from copy_utils import _IOTuner
+
+        logs = []
+        tuner = _IOTuner(4 * 1024 * 1024, 2, 8, logs.append, period=2)
+        copied = 0
+        tuner.update(0, copied)
+        # Baseline at 100 B/s, then 150 B/s for every setting after it
+        for now, rate in ((2, 100), (4, 150), (6, 150), (8, 150), (10, 150)):
+            copied += rate * 2
+            tuner.update(now, copied)
+            assert tuner.workers <= 8
+
+        assert tuner.settled
+        assert tuner.workers == 4
+        assert tuner.chunk_size == 4 * 1024 * 1024
+        assert logs == ["I/O settings: 4096 KiB chunks, 4 files at a time"]
+
+    def test_waits_for_a_full_period(self):
+        """Settings only change after a whole measuring period."""
+        from copy_utils import _IOTuner
+
+        tuner = _IOTuner(1024 * 1024, 1, 4, lambda m: None, period=2)
+        tuner.update(0, 0)
+        tuner.update(1, 1000)
+        assert (tuner.workers, tuner.chunk_size) == (1, 1024 * 1024)
+        tuner.update(2, 2000)
+        assert tuner.workers == 2
+
+    def test_autotuned_copy(self, tmp_path):
+        """An autotuned copy copies every file and logs the settings it ended with."""
+        from copy_utils import _copy_entries, _build_manifest
+
+        src = tmp_path / "src"
+        _make_source_tree(src)
+        dst = tmp_path / "dst"
+        dst.mkdir()
+        owner = _Owner()
+        logs = []
+
+        manifest = _build_manifest(str(src), lambda m: None, None)
+        _copy_entries(manifest, str(dst), owner.report, logs.append, owner, 2, autotune=True)
+
+        for entry in manifest:
+            assert (dst / entry.rel).exists()
+        assert any(line.startswith("I/O settings:") for line in logs)
+
+    def test_autotune_with_prefetch_does_not_stall(self, tmp_path):
+        """Copies gated by the tuner start in prefetch order, so the reader never waits on a blocked file."""
+        import random
+        import threading
+        import time
+        from copy_utils import _copy_entries, SourceManifest
+        from io_utils import copy_prefetched
+
+        src = tmp_path / "src"
+        src.mkdir()
+        for i in range(40):
+            (src / f"{i:02d}.sb").write_bytes(bytes([i]) * (64 * 1024))
+        dst = tmp_path / "dst"
+        dst.mkdir()
+        manifest = SourceManifest.scan(str(src))
+        owner = _Owner()
+
+        def slow_target(*args, **kwargs):
+            time.sleep(random.uniform(0, 0.01))
+            return copy_prefetched(*args, **kwargs)
+
+        def copy():
+            _copy_entries(manifest, str(dst), owner.report, lambda m: None, owner, 2,
+                          prefetch_memory=1, autotune=True)
+
+        with patch('copy_utils.SMALL_FILE_SIZE', 0), \
+             patch('copy_utils.copy_prefetched', side_effect=slow_target):
+            thread = threading.Thread(target=copy, daemon=True)
+            thread.start()
+            thread.join(timeout=20)
+            stalled = thread.is_alive()
+            owner.cancel_requested = True
+            thread.join(timeout=5)
+
+        assert not stalled
+        for entry in manifest:
+            assert (dst / entry.rel).read_bytes() == open(entry.path, 'rb').read()
+
+
+class TestIsCopyToRam:
+    """Tests for copy-to-RAM detection."""
+
+    def test_toram_flag(self):
+        """Detects the toram boot option."""
+        from copy_utils import is_copy_to_ram
+        from unittest.mock import mock_open
+
+        with patch('builtins.open', mock_open(read_data="BOOT_IMAGE=/minios/boot/vmlinuz toram quiet")):
+            assert is_copy_to_ram()
+
+    def test_no_toram_flag(self):
+        """Normal live boots are not copy-to-RAM."""
+        from copy_utils import is_copy_to_ram
+        from unittest.mock import mock_open
+
+        with patch('builtins.open', mock_open(read_data="BOOT_IMAGE=/minios/boot/vmlinuz toramfs=1")):
+            assert not is_copy_to_ram()
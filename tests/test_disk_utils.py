@@ -256,6 +256,43 @@ NAME="sda" SIZE="500G" MODEL="SSD" SERIAL="1" ROTA="0" TRAN="sata"'''
             assert disks[0]['name'] == 'sda'
 
 
+class TestIsSeekBoundSource:
+    """Tests for is_seek_bound_source function."""
+
+    @staticmethod
+    def _devices(lsblk_output):
+        def mock_run(cmd, msg):
+            if cmd[0] == 'findmnt':
+                return '/dev/sr0[/minios]\n'
+            assert cmd[-1] == '/dev/sr0'
+            return lsblk_output
+        return mock_run
+
+    def test_optical_source(self):
+        """Optical media is seek-bound even without the rotational flag."""
+        from disk_utils import is_seek_bound_source
+
+        with patch('disk_utils.run_command', side_effect=self._devices('ROTA="0" TYPE="rom"\n')):
+            assert is_seek_bound_source('/run/initramfs/memory/data/minios')
+
+    def test_rotational_parent(self):
+        """A partition on a hard disk is seek-bound."""
+        from disk_utils import is_seek_bound_source
+
+        output = 'ROTA="0" TYPE="part"\nROTA="1" TYPE="disk"\n'
+        with patch('disk_utils.run_command', side_effect=self._devices(output)):
+            assert is_seek_bound_source('/media/minios')
+
+    def test_solid_state_or_unknown(self):
+        """SSDs and undetectable sources are not seek-bound."""
+        from disk_utils import is_seek_bound_source
+
+        with patch('disk_utils.run_command', side_effect=self._devices('ROTA="0" TYPE="disk"\n')):
+            assert not is_seek_bound_source('/media/minios')
+        with patch('disk_utils.run_command', side_effect=RuntimeError("fail")):
+            assert not is_seek_bound_source('/media/minios')
+
+
 class TestPartitionDisk:
     """Tests for partition_disk function."""
 
@@ -304,6 +341,49 @@ class TestPartitionDisk:
             assert call_count[0] >= 4
 
 
+class TestPartitionLayoutMatches:
+    """Tests for partition_layout_matches function."""
+
+    @staticmethod
+    def _blkid(values):
+        def mock_run(cmd, msg):
+            return values[(cmd[-2], cmd[-1])] + '\n'
+        return mock_run
+
+    def test_matching_efi_layout(self):
+        """Matches an msdos ext4 + vfat ESP layout."""
+        from disk_utils import partition_layout_matches
+
+        values = {('PTTYPE', '/dev/sdb'): 'dos', ('TYPE', '/dev/sdb1'): 'ext4',
+                  ('TYPE', '/dev/sdb2'): 'vfat'}
+        with patch('disk_utils.run_command', side_effect=self._blkid(values)):
+            assert partition_layout_matches('/dev/sdb', 'ext4', '/dev/sdb1', '/dev/sdb2', False)
+
+    def test_fat32_maps_to_vfat(self):
+        """fat32 installs are recognised by their vfat filesystem."""
+        from disk_utils import partition_layout_matches
+
+        values = {('PTTYPE', '/dev/sdb'): 'dos', ('TYPE', '/dev/sdb1'): 'vfat'}
+        with patch('disk_utils.run_command', side_effect=self._blkid(values)):
+            assert partition_layout_matches('/dev/sdb', 'fat32', '/dev/sdb1', None, False)
+
+    def test_wrong_filesystem(self):
+        """A different filesystem on the primary partition does not match."""
+        from disk_utils import partition_layout_matches
+
+        values = {('PTTYPE', '/dev/sdb'): 'gpt', ('TYPE', '/dev/sdb1'): 'btrfs',
+                  ('TYPE', '/dev/sdb2'): 'vfat'}
+        with patch('disk_utils.run_command', side_effect=self._blkid(values)):
+            assert not partition_layout_matches('/dev/sdb', 'ext4', '/dev/sdb1', '/dev/sdb2', True)
+
+    def test_blkid_failure(self):
+        """Unreadable devices never match."""
+        from disk_utils import partition_layout_matches
+
+        with patch('disk_utils.run_command', side_effect=RuntimeError("fail")):
+            assert not partition_layout_matches('/dev/sdb', 'ext4', '/dev/sdb1', None, False)
+
+
 class TestDiskMonitor:
     """Tests for DiskMonitor class."""
 
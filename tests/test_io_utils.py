@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for io_utils module.
+"""
+
+import os
+import errno
+import pytest
+from unittest.mock import patch
+
+
+def _write(path, size):
+    data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+    path.write_bytes(data)
+    return data
+
+
+class TestCopyFile:
+    """Tests for copy_file and its transfer method fallbacks."""
+
+    def test_copies_content_and_metadata(self, tmp_path):
+        """Copies bytes and preserves mtime like shutil.copy2."""
+        from io_utils import copy_file
+
+        src = tmp_path / "01-core.sb"
+        data = _write(src, 100_000)
+        os.utime(src, (1_600_000_000, 1_600_000_000))
+        dst = tmp_path / "out.sb"
+
+        result = copy_file(str(src), str(dst), chunk_size=4096)
+
+        assert dst.read_bytes() == data
+        assert result.size == len(data)
+        assert int(os.stat(dst).st_mtime) == 1_600_000_000
+
+    def test_read_lock_covers_reads_only(self, tmp_path):
+        """With a read lock every source read holds it and the data goes through user space."""
+        import threading
+        from io_utils import copy_file, METHOD_BUFFERED
+
+        class CountingLock:
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.taken = 0
+
+            def __enter__(self):
+                self.lock.acquire()
+                self.taken += 1
+
+            def __exit__(self, *exc_info):
+                self.lock.release()
+
+        src = tmp_path / "a"
+        data = _write(src, 40_000)
+        dst = tmp_path / "b"
+        read_lock = CountingLock()
+
+        result = copy_file(str(src), str(dst), chunk_size=8192, read_lock=read_lock)
+
+        assert result.method == METHOD_BUFFERED
+        assert dst.read_bytes() == data
+        assert read_lock.taken == 5
+
+    def test_falls_back_to_sendfile(self, tmp_path):
+        """Uses sendfile when copy_file_range is rejected with EXDEV."""
+        from io_utils import copy_file, METHOD_SENDFILE
+
+        src = tmp_path / "a"
+        data = _write(src, 50_000)
+        dst = tmp_path / "b"
+
+        with patch('io_utils.os.copy_file_range', side_effect=OSError(errno.EXDEV, "cross-device")):
+            result = copy_file(str(src), str(dst), chunk_size=8192)
+
+        assert result.method == METHOD_SENDFILE
+        assert dst.read_bytes() == data
+
+    def test_falls_back_to_buffered(self, tmp_path):
+        """Uses the read/write loop when neither kernel method is usable."""
+        from io_utils import copy_file, METHOD_BUFFERED
+
+        src = tmp_path / "a"
+        data = _write(src, 30_000)
+        dst = tmp_path / "b"
+
+        with patch('io_utils.os.copy_file_range', side_effect=OSError(errno.ENOSYS, "nope")), \
+             patch('io_utils.os.sendfile', side_effect=OSError(errno.EINVAL, "nope")):
+            result = copy_file(str(src), str(dst), chunk_size=4096)
+
+        assert result.method == METHOD_BUFFERED
+        assert dst.read_bytes() == data
+
+    def test_fallback_resumes_at_current_offset(self, tmp_path):
+        """A method failing halfway hands over without losing or duplicating data."""
+        from io_utils import copy_file, METHOD_SENDFILE
+
+        src = tmp_path / "a"
+        data = _write(src, 40_000)
+        dst = tmp_path / "b"
+        real = os.copy_file_range
+        calls = []
+
+        def flaky(in_fd, out_fd, count, offset_src, offset_dst):
+            calls.append(offset_src)
+            if len(calls) > 2:
+                raise OSError(errno.EXDEV, "cross-device")
+            return real(in_fd, out_fd, count, offset_src, offset_dst)
+
+        with patch('io_utils.os.copy_file_range', side_effect=flaky):
+            result = copy_file(str(src), str(dst), chunk_size=4096)
+
+        assert result.method == METHOD_SENDFILE
+        assert dst.read_bytes() == data
+
+    def test_real_io_error_is_raised(self, tmp_path):
+        """Errors that are not method limitations propagate."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _write(src, 1000)
+
+        with patch('io_utils.os.copy_file_range', side_effect=OSError(errno.ENOSPC, "full")):
+            with pytest.raises(OSError) as exc:
+                copy_file(str(src), str(tmp_path / "b"))
+        assert exc.value.errno == errno.ENOSPC
+
+
+class TestVerifiedCopy:
+    """Tests for copy_file with inline checksums."""
+
+    def test_verify_reports_matching_digests(self, tmp_path):
+        """Source and read-back digests match for a good copy."""
+        import hashlib
+        from io_utils import copy_file, METHOD_BUFFERED
+
+        src = tmp_path / "a"
+        data = _write(src, 70_000)
+        dst = tmp_path / "b"
+        seen = []
+
+        result = copy_file(str(src), str(dst), chunk_size=8192, verify=True, progress=seen.append)
+
+        assert result.method == METHOD_BUFFERED
+        assert result.verified
+        assert result.digest == hashlib.blake2b(data).hexdigest()
+        assert sum(seen) == len(data)
+        assert dst.read_bytes() == data
+
+    def test_verify_detects_corruption(self, tmp_path):
+        """A target that reads back differently is reported as not verified."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _write(src, 10_000)
+
+        with patch('io_utils.hash_fd', return_value="0" * 128):
+            result = copy_file(str(src), str(tmp_path / "b"), verify=True)
+
+        assert not result.verified
+
+    def test_unverified_copy_has_no_digest(self, tmp_path):
+        """Digests are only computed on request."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _write(src, 1000)
+        result = copy_file(str(src), str(tmp_path / "b"))
+        assert result.digest is None
+        assert not result.verified
+
+
+class TestPrefetchPipeline:
+    """Tests for the read-ahead reader/writer pipeline."""
+
+    def test_copies_several_files_with_two_buffers(self, tmp_path):
+        """Files larger than the whole buffer pool come through intact."""
+        from io_utils import PrefetchReader, copy_prefetched, METHOD_PREFETCH
+
+        sources = []
+        for i, size in enumerate((50_000, 0, 12_345, 4096)):
+            path = tmp_path / f"src{i}"
+            sources.append((path, _write(path, size)))
+
+        reader = PrefetchReader([(str(p), len(d)) for p, d in sources], memory=8192, chunk_size=4096)
+        reader.start()
+        try:
+            for index, (path, data) in enumerate(sources):
+                dst = tmp_path / f"dst{index}"
+                result = copy_prefetched(reader, index, str(path), str(dst), verify=True)
+                assert result.method == METHOD_PREFETCH
+                assert result.verified
+                assert dst.read_bytes() == data
+        finally:
+            reader.close()
+
+    def test_memory_cap_limits_buffers(self):
+        """The number of buffers follows the memory cap, with a minimum of two."""
+        from io_utils import PrefetchReader
+
+        assert PrefetchReader([], memory=64 * 1024, chunk_size=4096)._free.qsize() == 16
+        assert PrefetchReader([], memory=0, chunk_size=4096)._free.qsize() == 2
+
+    def test_read_error_reaches_writer(self, tmp_path):
+        """A source that can't be opened fails the matching write."""
+        from io_utils import PrefetchReader, copy_prefetched
+
+        reader = PrefetchReader([(str(tmp_path / "missing"), 10)], memory=8192, chunk_size=4096)
+        reader.start()
+        try:
+            with pytest.raises(FileNotFoundError):
+                copy_prefetched(reader, 0, str(tmp_path / "missing"), str(tmp_path / "out"))
+        finally:
+            reader.close()
+
+    def test_close_wakes_waiting_writer(self, tmp_path):
+        """Closing the reader releases writers blocked on data."""
+        from io_utils import PrefetchReader, PipelineClosed
+
+        reader = PrefetchReader([(str(tmp_path / "never-read"), 10)], memory=8192)
+        reader.close()
+        with pytest.raises(PipelineClosed):
+            list(reader.chunks(0))
+
+
+class TestPhysicalOffset:
+    """Tests for the FIEMAP lookup used to order copies."""
+
+    def test_empty_file_has_no_offset(self, tmp_path):
+        """Files without extents report no position."""
+        from io_utils import physical_offset
+
+        (tmp_path / "a").write_bytes(b"")
+
+        assert physical_offset(str(tmp_path / "a")) is None
+
+    def test_unsupported_filesystem(self, tmp_path):
+        """A failing ioctl means no position rather than an error."""
+        from io_utils import physical_offset
+
+        _write(tmp_path / "a", 1000)
+
+        with patch('io_utils.fcntl.ioctl', side_effect=OSError(errno.EOPNOTSUPP, "no fiemap")):
+            assert physical_offset(str(tmp_path / "a")) is None
+
+
+class TestPreallocation:
+    """Tests for reserving target space before writing."""
+
+    def test_large_target_preallocated(self, tmp_path):
+        """Large targets are reserved at their final size before the copy."""
+        from io_utils import copy_file, PREALLOCATE_MIN_SIZE
+
+        src = tmp_path / "a"
+        data = _write(src, PREALLOCATE_MIN_SIZE)
+
+        with patch('io_utils.preallocate', return_value=True) as mock_alloc:
+            copy_file(str(src), str(tmp_path / "b"))
+
+        assert mock_alloc.call_args[0][1] == PREALLOCATE_MIN_SIZE
+        assert (tmp_path / "b").read_bytes() == data
+
+    def test_small_target_not_preallocated(self, tmp_path):
+        """Small files and allocate=False skip preallocation."""
+        from io_utils import copy_file, PREALLOCATE_MIN_SIZE
+
+        _write(tmp_path / "a", 1000)
+        _write(tmp_path / "c", PREALLOCATE_MIN_SIZE)
+
+        with patch('io_utils.preallocate') as mock_alloc:
+            copy_file(str(tmp_path / "a"), str(tmp_path / "b"))
+            copy_file(str(tmp_path / "c"), str(tmp_path / "d"), allocate=False)
+
+        mock_alloc.assert_not_called()
+
+    def test_preallocate_keeps_size(self, tmp_path):
+        """Reserved space does not change the visible file size."""
+        from io_utils import preallocate
+
+        with open(tmp_path / "a", 'wb') as f:
+            if not preallocate(f.fileno(), 1024 * 1024):
+                pytest.skip("fallocate not supported here")
+            assert os.fstat(f.fileno()).st_size == 0
+
+    def test_extent_count_unsupported(self, tmp_path):
+        """Filesystems without FIEMAP report no extent count."""
+        from io_utils import extent_count
+
+        _write(tmp_path / "a", 1000)
+
+        with patch('io_utils.fcntl.ioctl', side_effect=OSError(errno.ENOTTY, "no fiemap")):
+            assert extent_count(str(tmp_path / "a")) is None
+
+
+class TestDirectIO:
+    """Tests for the O_DIRECT write path."""
+
+    def test_direct_transfer_pads_and_truncates(self, tmp_path):
+        """Unaligned sizes are written padded and truncated to the real size."""
+        from io_utils import direct_transfer
+
+        src = tmp_path / "a"
+        data = _write(src, 10_001)
+        dst = tmp_path / "b"
+        seen = []
+
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            digest = direct_transfer(fsrc.fileno(), fdst.fileno(), len(data), 8192,
+                                     seen.append, hash_data=True)
+
+        assert dst.read_bytes() == data
+        assert sum(seen) == len(data)
+        assert digest is not None
+
+    def test_copy_file_direct(self, tmp_path):
+        """direct=True produces an identical file whatever the filesystem supports."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        data = _write(src, 100_000)
+        dst = tmp_path / "b"
+
+        result = copy_file(str(src), str(dst), direct=True, verify=True)
+
+        assert dst.read_bytes() == data
+        assert result.verified
+
+    def test_falls_back_when_o_direct_rejected(self, tmp_path):
+        """Filesystems refusing O_DIRECT get the regular copy path."""
+        from io_utils import copy_file, METHOD_DIRECT
+
+        src = tmp_path / "a"
+        data = _write(src, 5000)
+        dst = tmp_path / "b"
+        real_open = os.open
+
+        def no_direct(path, flags, *args):
+            if flags & getattr(os, 'O_DIRECT', 0):
+                raise OSError(errno.EINVAL, "O_DIRECT not supported")
+            return real_open(path, flags, *args)
+
+        with patch('io_utils.os.open', side_effect=no_direct):
+            result = copy_file(str(src), str(dst), direct=True)
+
+        assert result.method != METHOD_DIRECT
+        assert dst.read_bytes() == data
+
+
+class TestFadvise:
+    """Tests for page cache hints around copies."""
+
+    def test_large_file_hints(self, tmp_path):
+        """Sources get SEQUENTIAL then DONTNEED; large targets are flushed and dropped."""
+        from io_utils import copy_file, CACHE_DROP_MIN_SIZE
+
+        src = tmp_path / "a"
+        _write(src, CACHE_DROP_MIN_SIZE)
+        calls = []
+
+        def record(fd, offset, length, advice):
+            calls.append((os.readlink(f"/proc/self/fd/{fd}"), advice))
+
+        with patch('io_utils.os.posix_fadvise', side_effect=record), \
+             patch('io_utils.os.fdatasync') as mock_sync:
+            copy_file(str(src), str(tmp_path / "b"))
+
+        src_advice = [a for path, a in calls if path.endswith("/a")]
+        dst_advice = [a for path, a in calls if path.endswith("/b")]
+        assert src_advice == [os.POSIX_FADV_SEQUENTIAL, os.POSIX_FADV_DONTNEED]
+        assert dst_advice == [os.POSIX_FADV_DONTNEED]
+        mock_sync.assert_called_once()
+
+    def test_small_target_not_flushed(self, tmp_path):
+        """Small targets stay in the page cache and are not synced individually."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _write(src, 1000)
+
+        with patch('io_utils.os.fdatasync') as mock_sync:
+            copy_file(str(src), str(tmp_path / "b"))
+
+        mock_sync.assert_not_called()
+
+    def test_fadvise_disabled(self, tmp_path):
+        """fadvise=False leaves the page cache alone."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _write(src, 1000)
+
+        with patch('io_utils.os.posix_fadvise') as mock_fadvise:
+            copy_file(str(src), str(tmp_path / "b"), fadvise=False)
+
+        mock_fadvise.assert_not_called()
+
+
+class TestWriteback:
+    """Tests for bounded writeback of copy targets."""
+
+    def test_window_bounds_dirty_data(self, tmp_path):
+        """Data older than the window is waited for and only then reported."""
+        from io_utils import WritebackWindow, SYNC_FILE_RANGE_WAIT_AFTER
+
+        calls = []
+        reported = []
+        with patch('io_utils.sync_file_range', side_effect=lambda *args: calls.append(args)):
+            window = WritebackWindow(3, 100, reported.append)
+            for _i in range(5):
+                window(40)
+            window.finish()
+
+        waits = [(offset, nbytes) for _fd, offset, nbytes, flags in calls
+                 if flags & SYNC_FILE_RANGE_WAIT_AFTER]
+        assert waits == [(0, 20), (20, 40), (60, 40), (100, 100)]
+        assert reported == [20, 40, 40, 100]
+
+    def test_copy_file_reports_written_back_bytes(self, tmp_path):
+        """Windowed copies are correct and report every byte exactly once."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        data = _write(src, 100000)
+        reported = []
+
+        copy_file(str(src), str(tmp_path / "b"), chunk_size=8192,
+                  progress=reported.append, writeback_window=16384)
+
+        assert (tmp_path / "b").read_bytes() == data
+        assert sum(reported) == len(data)
+
+    def test_small_files_not_windowed(self, tmp_path):
+        """Files that fit in the window never wait mid-copy."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _write(src, 1000)
+
+        with patch('io_utils.sync_file_range') as mock_sfr:
+            copy_file(str(src), str(tmp_path / "b"), writeback_window=16384)
+
+        mock_sfr.assert_not_called()
+
+    def test_fallback_without_libc_support(self, tmp_path):
+        """Without sync_file_range, waits fall back to fdatasync."""
+        from io_utils import sync_file_range, SYNC_FILE_RANGE_WRITE, SYNC_FILE_RANGE_WAIT_AFTER
+
+        with open(tmp_path / "a", 'wb') as f, \
+             patch('io_utils._sync_file_range', None), \
+             patch('io_utils.os.fdatasync') as mock_sync:
+            sync_file_range(f.fileno(), 0, 10, SYNC_FILE_RANGE_WRITE)
+            mock_sync.assert_not_called()
+            sync_file_range(f.fileno(), 0, 10, SYNC_FILE_RANGE_WRITE | SYNC_FILE_RANGE_WAIT_AFTER)
+            mock_sync.assert_called_once()
+
+
+class TestFanoutCopy:
+    """Tests for copying one source to several targets."""
+
+    def test_copies_to_every_target(self, tmp_path):
+        """Each target gets the full file and its own progress."""
+        from io_utils import fanout_copy
+        from concurrent.futures import ThreadPoolExecutor
+
+        src = tmp_path / "a"
+        data = _write(src, 100000)
+        dsts = [str(tmp_path / f"t{i}") for i in range(3)]
+        progress = {}
+
+        with ThreadPoolExecutor(3) as pool:
+            errors = fanout_copy(str(src), dsts, chunk_size=8192, pool=pool,
+                                 progress=lambda i, n: progress.__setitem__(i, progress.get(i, 0) + n))
+
+        assert errors == [None, None, None]
+        for dst in dsts:
+            assert open(dst, 'rb').read() == data
+        assert progress == {0: len(data), 1: len(data), 2: len(data)}
+
+    def test_failed_target_does_not_stop_others(self, tmp_path):
+        """A target that fails mid-copy is dropped; the rest complete."""
+        from io_utils import fanout_copy
+        import io_utils
+
+        src = tmp_path / "a"
+        data = _write(src, 100000)
+        dsts = [str(tmp_path / "good"), str(tmp_path / "bad")]
+        real_write = io_utils.write_all
+        bad_fds = []
+
+        def flaky_write(fd, chunk, offset):
+            if os.readlink(f"/proc/self/fd/{fd}").endswith("/bad") and offset >= 16384:
+                bad_fds.append(fd)
+                raise OSError(errno.EIO, "I/O error")
+            real_write(fd, chunk, offset)
+
+        with patch('io_utils.write_all', side_effect=flaky_write):
+            errors = fanout_copy(str(src), dsts, chunk_size=8192)
+
+        assert errors[0] is None
+        assert errors[1].errno == errno.EIO
+        assert len(bad_fds) == 1
+        assert (tmp_path / "good").read_bytes() == data
+
+    def test_unopenable_target(self, tmp_path):
+        """Targets that cannot be created are reported, not raised."""
+        from io_utils import fanout_copy
+
+        src = tmp_path / "a"
+        _write(src, 1000)
+
+        errors = fanout_copy(str(src), [str(tmp_path / "missing" / "b"), str(tmp_path / "c")])
+
+        assert isinstance(errors[0], FileNotFoundError)
+        assert errors[1] is None
+
+
+def _make_sparse(path, size, data_at):
+    """Create a sparse file of `size` bytes with 4 KiB of data at each offset in data_at."""
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        for offset in data_at:
+            f.seek(offset)
+            f.write(b"d" * 4096)
+    if os.stat(path).st_blocks * 512 >= size:
+        pytest.skip("filesystem does not support sparse files")
+
+
+class TestSparseCopy:
+    """Tests for hole-preserving copies."""
+
+    def test_holes_are_kept(self, tmp_path):
+        """Only data extents are copied and reported; the target stays sparse."""
+        from io_utils import copy_file, METHOD_SPARSE
+
+        src = tmp_path / "persistence.img"
+        _make_sparse(src, 64 * 1024 * 1024, [0, 8 * 1024 * 1024, 64 * 1024 * 1024 - 4096])
+        reported = []
+
+        result = copy_file(str(src), str(tmp_path / "b"), progress=reported.append)
+
+        assert result.method == METHOD_SPARSE
+        assert (tmp_path / "b").read_bytes() == src.read_bytes()
+        assert os.stat(tmp_path / "b").st_blocks * 512 < 1024 * 1024
+        assert sum(reported) == 3 * 4096
+
+    def test_trailing_hole(self, tmp_path):
+        """A hole at the end of the file still gives the full size."""
+        from io_utils import copy_file
+
+        src = tmp_path / "a"
+        _make_sparse(src, 16 * 1024 * 1024, [0])
+
+        copy_file(str(src), str(tmp_path / "b"))
+
+        assert os.path.getsize(tmp_path / "b") == 16 * 1024 * 1024
+        assert (tmp_path / "b").read_bytes() == src.read_bytes()
+
+    def test_dense_file_has_no_extents(self, tmp_path):
+        """Fully allocated files take the normal copy path."""
+        from io_utils import data_extents
+
+        _write(tmp_path / "a", 100000)
+
+        with open(tmp_path / "a", 'rb') as f:
+            assert data_extents(f.fileno(), 100000) is None
+
+
+class TestDeltaUpdate:
+    """Tests for in-place block-delta updates."""
+
+    def test_only_changed_blocks_are_written(self, tmp_path):
+        """One changed block costs one block write; the result matches the source."""
+        from io_utils import delta_update, METHOD_DELTA
+
+        data = bytearray(os.urandom(1024 * 1024))
+        (tmp_path / "b").write_bytes(data)
+        data[200 * 1024] ^= 0xFF
+        (tmp_path / "a").write_bytes(data)
+        reported = []
+
+        result = delta_update(str(tmp_path / "a"), str(tmp_path / "b"), block_size=64 * 1024,
+                              progress=reported.append)
+
+        assert result.method == METHOD_DELTA
+        assert result.size == 64 * 1024
+        assert sum(reported) == len(data)
+        assert (tmp_path / "b").read_bytes() == data
+        assert os.stat(tmp_path / "b").st_mtime_ns == os.stat(tmp_path / "a").st_mtime_ns
+
+    def test_size_changes(self, tmp_path):
+        """Targets grow or shrink to the size of the source."""
+        from io_utils import delta_update
+
+        data = os.urandom(300 * 1024)
+        for old in (data[:100 * 1024], data + b"tail"):
+            (tmp_path / "b").write_bytes(old)
+            (tmp_path / "a").write_bytes(data)
+            delta_update(str(tmp_path / "a"), str(tmp_path / "b"), block_size=64 * 1024)
+            assert (tmp_path / "b").read_bytes() == data
+
+    def test_verify(self, tmp_path):
+        """Verified updates digest the whole source and the updated target."""
+        from io_utils import delta_update
+
+        _write(tmp_path / "a", 200000)
+        _write(tmp_path / "b", 150000)
+
+        result = delta_update(str(tmp_path / "a"), str(tmp_path / "b"), verify=True)
+
+        assert result.verified
+
+    def test_block_map(self, tmp_path):
+        """Every block, including a short last one, gets its own signature."""
+        from io_utils import block_map
+
+        (tmp_path / "a").write_bytes(b"x" * 4096 + b"y" * 4096 + b"x" * 100)
+
+        with open(tmp_path / "a", 'rb') as f:
+            signatures = block_map(f.fileno(), 8292, block_size=4096, chunk_size=4096)
+
+        assert len(signatures) == 3
+        assert signatures[0] != signatures[1]
+        assert signatures[0] != signatures[2]
+
+
+class TestCopyExtents:
+    """Tests for copying files stored as extents of a container file."""
+
+    def test_extents_are_joined(self, tmp_path):
+        """Extents are copied back to back; metadata comes from the given stat."""
+        from io_utils import copy_extents, METHOD_EXTENTS
+
+        container = _write(tmp_path / "image", 100000)
+        st = os.stat_result((0o100600, 0, 0, 1, 0, 0, 30000, 0, 1234, 0,
+                             0.0, 1234.0, 0.0, 0, 1234 * 10**9, 0, 4096, 59))
+        reported = []
+
+        result = copy_extents(str(tmp_path / "image"), [(4096, 20000), (60000, 10000)],
+                              str(tmp_path / "b"), st, chunk_size=8192, progress=reported.append)
+
+        assert result.method == METHOD_EXTENTS
+        assert (tmp_path / "b").read_bytes() == container[4096:24096] + container[60000:70000]
+        assert sum(reported) == 30000
+        assert os.stat(tmp_path / "b").st_mtime == 1234
+        assert os.stat(tmp_path / "b").st_mode & 0o777 == 0o600
+
+    def test_verify(self, tmp_path):
+        """Verified extent copies digest the extents and the target."""
+        from io_utils import copy_extents
+
+        _write(tmp_path / "image", 50000)
+        st = os.stat_result((0o100644, 0, 0, 1, 0, 0, 8000, 0, 0, 0,
+                             0.0, 0.0, 0.0, 0, 0, 0, 4096, 16))
+
+        result = copy_extents(str(tmp_path / "image"), [(2048, 8000)], str(tmp_path / "b"), st,
+                              verify=True)
+
+        assert result.verified
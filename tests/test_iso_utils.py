@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for iso_utils module.
+"""
+
+import os
+import pytest
+
+
+FILES = {
+    "minios/boot/vmlinuz": b"k" * 5000,
+    "minios/boot/grub/grub.cfg": b"menuentry\n",
+    "minios/01-core-amd64.sb": os.urandom(9000),
+    "minios/scripts/setup.sh": b"#!/bin/sh\n",
+    "readme.txt": b"hello\n",
+}
+
+
+class TestIsoImage:
+    """Tests for listing ISO9660 images without mounting them."""
+
+    @pytest.mark.parametrize("names", [{"joliet": True}, {"rock_ridge": True},
+                                       {"joliet": True, "rock_ridge": True}])
+    def test_walk_long_names(self, tmp_path, make_iso, names):
+        """Joliet and Rock Ridge images list the original file names and extents."""
+        from iso_utils import IsoImage
+
+        image = make_iso(tmp_path / "minios.iso", FILES, **names)
+
+        with IsoImage(str(image)) as iso:
+            entries = {entry.path: entry for entry in iso.walk("minios")}
+
+        assert set(entries) == {"boot/vmlinuz", "boot/grub/grub.cfg", "01-core-amd64.sb",
+                                "scripts/setup.sh"}
+        data = image.read_bytes()
+        for path, entry in entries.items():
+            offset, length = entry.extents[0]
+            assert data[offset:offset + length] == FILES["minios/" + path]
+            assert entry.size == len(FILES["minios/" + path])
+        assert entries["boot/vmlinuz"].mtime == 1749990600  # 2025-06-15 12:30 UTC
+
+    def test_plain_iso9660_names(self, tmp_path, make_iso):
+        """Without extensions the ISO9660 names are used without their version."""
+        from iso_utils import IsoImage
+
+        image = make_iso(tmp_path / "minios.iso", FILES)
+
+        with IsoImage(str(image)) as iso:
+            assert sorted(entry.path for entry in iso.walk("MINIOS/BOOT")) == \
+                ["GRUB/GRUB.CFG", "VMLINUZ"]
+
+    def test_rock_ridge_mode(self, tmp_path, make_iso):
+        """Rock Ridge permissions are reported in the entry's mode."""
+        from iso_utils import IsoImage
+
+        image = make_iso(tmp_path / "minios.iso", FILES, rock_ridge=True)
+
+        with IsoImage(str(image)) as iso:
+            entries = {entry.path: entry for entry in iso.walk("minios/scripts")}
+        assert entries["setup.sh"].stat().st_mode == 0o100755
+
+    def test_multi_extent_file(self, tmp_path, make_iso):
+        """A file recorded in several parts is one entry with all extents."""
+        from iso_utils import IsoImage
+
+        image = make_iso(tmp_path / "minios.iso", FILES, joliet=True,
+                         multi_extent=("minios/01-core-amd64.sb",))
+
+        with IsoImage(str(image)) as iso:
+            entry = [e for e in iso.walk("minios") if e.path == "01-core-amd64.sb"][0]
+
+        assert entry.size == 9000
+        assert len(entry.extents) == 2
+        data = image.read_bytes()
+        assert b"".join(data[o:o + n] for o, n in entry.extents) == FILES["minios/01-core-amd64.sb"]
+
+    def test_missing_directory(self, tmp_path, make_iso):
+        """Looking up a missing directory raises FileNotFoundError."""
+        from iso_utils import IsoImage
+
+        image = make_iso(tmp_path / "minios.iso", FILES, joliet=True)
+
+        with IsoImage(str(image)) as iso:
+            assert not iso.isdir("efi")
+            with pytest.raises(FileNotFoundError):
+                iso.walk("efi")
+
+    def test_not_an_image(self, tmp_path):
+        """Other files are rejected."""
+        from iso_utils import IsoImage, is_iso_image
+
+        (tmp_path / "a.iso").write_bytes(b"\0" * 40000)
+
+        assert not is_iso_image(str(tmp_path / "a.iso"))
+        assert not is_iso_image(str(tmp_path))
+        with pytest.raises(RuntimeError, match="Not an ISO9660 image"):
+            IsoImage(str(tmp_path / "a.iso"))
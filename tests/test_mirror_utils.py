@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for mirror_utils module.
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+
+
+class TestMirrorSource:
+    """Tests for installing files from an HTTP mirror."""
+
+    def test_manifest(self, mirror, tmp_path):
+        """The manifest lists every file with size and digest."""
+        from mirror_utils import MirrorSource
+
+        url, tree, _requests, _handler = mirror
+        source = MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+
+        files = {f.path: f for f in source.files}
+        assert set(files) == {"boot/vmlinuz", "01-core.sb"}
+        assert files["boot/vmlinuz"].size == 5000
+        assert source.file_url(files["boot/vmlinuz"]) == url + "/boot/vmlinuz"
+
+    def test_ranged_download_then_cache(self, mirror, tmp_path):
+        """Large files arrive as parallel ranges; the second copy comes from the cache."""
+        from mirror_utils import MirrorSource, METHOD_DOWNLOAD, METHOD_CACHED
+
+        url, tree, requests, _handler = mirror
+        reported = []
+        with patch('mirror_utils.RANGE_MIN_SIZE', 1024 * 1024):
+            source = MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+            result = source.copy(url + "/01-core.sb", str(tmp_path / "a"), progress=reported.append,
+                                 verify=True)
+
+        assert result.method == METHOD_DOWNLOAD
+        assert result.verified
+        assert (tmp_path / "a").read_bytes() == (tree / "01-core.sb").read_bytes()
+        assert sum(reported) == (tree / "01-core.sb").stat().st_size
+        assert len([r for path, r in requests if path.endswith("01-core.sb") and r]) == 4
+        assert os.stat(tmp_path / "a").st_mtime == int((tree / "01-core.sb").stat().st_mtime)
+
+        requests.clear()
+        source = MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+        result = source.copy(url + "/01-core.sb", str(tmp_path / "b"))
+
+        assert result.method == METHOD_CACHED
+        assert (tmp_path / "b").read_bytes() == (tree / "01-core.sb").read_bytes()
+        assert [path for path, _r in requests] == ["/minios/manifest.json"]
+
+    def test_server_without_ranges(self, mirror, tmp_path):
+        """A server that ignores Range headers is read in one stream."""
+        from mirror_utils import MirrorSource
+
+        url, tree, requests, handler = mirror
+        handler.ranges = False
+        with patch('mirror_utils.RANGE_MIN_SIZE', 1024 * 1024):
+            source = MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+            source.copy(url + "/01-core.sb", str(tmp_path / "a"))
+
+        assert (tmp_path / "a").read_bytes() == (tree / "01-core.sb").read_bytes()
+        assert len([path for path, _r in requests if path.endswith("01-core.sb")]) == 1
+
+    def test_checksum_mismatch(self, mirror, tmp_path):
+        """A file that changed on the mirror is rejected and not cached."""
+        from mirror_utils import MirrorSource
+
+        url, tree, _requests, _handler = mirror
+        source = MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+        (tree / "boot" / "vmlinuz").write_bytes(b"x" * 5000)
+
+        with pytest.raises(RuntimeError, match="Checksum mismatch"):
+            source.copy(url + "/boot/vmlinuz", str(tmp_path / "a"))
+        assert not any(files for _root, _dirs, files in os.walk(tmp_path / "cache"))
+
+    def test_no_cache_on_volatile_storage(self, mirror, tmp_path):
+        """On RAM-backed storage downloads go to the target only."""
+        from mirror_utils import MirrorSource, METHOD_DOWNLOAD
+
+        url, tree, _requests, _handler = mirror
+        with patch('mirror_utils.is_volatile_path', return_value=True):
+            source = MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+        assert not source.caching
+
+        for name in ("a", "b"):
+            result = source.copy(url + "/01-core.sb", str(tmp_path / name), verify=True)
+            assert result.method == METHOD_DOWNLOAD
+            assert result.verified
+            assert (tmp_path / name).read_bytes() == (tree / "01-core.sb").read_bytes()
+        assert not (tmp_path / "cache").exists()
+
+    def test_cache_limit(self, mirror, tmp_path):
+        """The least recently used files make room, and files over the limit are not cached."""
+        from mirror_utils import MirrorSource
+
+        url, tree, _requests, _handler = mirror
+        core_size = (tree / "01-core.sb").stat().st_size
+        source = MirrorSource(url, cache_dir=str(tmp_path / "cache"), cache_limit=core_size)
+        files = {f.path: f for f in source.files}
+
+        source.copy(url + "/boot/vmlinuz", str(tmp_path / "a"))
+        assert source.is_cached(files["boot/vmlinuz"])
+        source.copy(url + "/01-core.sb", str(tmp_path / "b"))
+        assert source.is_cached(files["01-core.sb"])
+        assert not source.is_cached(files["boot/vmlinuz"])
+
+        source.cache_limit = core_size - 1
+        os.remove(source.cache_path(files["01-core.sb"]))
+        source.copy(url + "/01-core.sb", str(tmp_path / "c"))
+        assert not source.is_cached(files["01-core.sb"])
+        assert (tmp_path / "c").read_bytes() == (tree / "01-core.sb").read_bytes()
+
+    def test_cache_dir_from_environment(self, mirror, tmp_path, monkeypatch):
+        """CACHE_DIR_ENV moves the cache when no directory is given."""
+        from mirror_utils import MirrorSource, CACHE_DIR_ENV
+
+        url, _tree, _requests, _handler = mirror
+        monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "elsewhere"))
+        source = MirrorSource(url)
+        source.copy(url + "/boot/vmlinuz", str(tmp_path / "a"))
+
+        assert source.cache_dir == str(tmp_path / "elsewhere")
+        vmlinuz = next(f for f in source.files if f.path == "boot/vmlinuz")
+        assert os.path.exists(source.cache_path(vmlinuz))
+
+    def test_missing_manifest(self, mirror, tmp_path):
+        """A URL without a manifest is reported."""
+        from mirror_utils import MirrorSource
+
+        url, _tree, _requests, _handler = mirror
+        with pytest.raises(RuntimeError, match="mirror manifest"):
+            MirrorSource(url + "/boot", cache_dir=str(tmp_path / "cache"))
+
+    @pytest.mark.parametrize("field, value", [
+        ("path", "../../../etc/cron.d/evil"),
+        ("path", "boot/../../evil"),
+        ("path", "/etc/x"),
+        ("blake2b", "../../../../etc/passwd"),
+        ("blake2b", "AB" * 64),
+    ])
+    def test_hostile_manifest(self, mirror, tmp_path, field, value):
+        """Paths leaving the tree and malformed digests reject the whole manifest."""
+        import json
+        from mirror_utils import MirrorSource
+
+        url, tree, _requests, _handler = mirror
+        manifest = json.loads((tree / "manifest.json").read_text())
+        manifest["files"][0][field] = value
+        (tree / "manifest.json").write_text(json.dumps(manifest))
+
+        with pytest.raises(RuntimeError, match="Cannot read the mirror manifest"):
+            MirrorSource(url, cache_dir=str(tmp_path / "cache"))
+        assert not (tmp_path / "cache").exists()
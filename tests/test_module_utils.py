@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for module_utils module.
+"""
+
+import os
+import struct
+import pytest
+from unittest.mock import patch
+
+
+def _squashfs_header(compressor):
+    """First bytes of a SquashFS superblock using the given compressor id."""
+    return b'hsqs' + b'\0' * 16 + struct.pack('<H', compressor) + b'\0' * 74
+
+
+@pytest.fixture
+def fake_mksquashfs(tmp_path, monkeypatch):
+    """Put a mksquashfs on PATH that reports progress, records its arguments and writes a stub image."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    args_file = tmp_path / "mksquashfs.args"
+    script = bin_dir / "mksquashfs"
+    script.write_text(
+        "#!/bin/sh\n"
+        "version=${FAKE_MKSQUASHFS_VERSION:-4.6.1}\n"
+        "if [ \"$1\" = -version ]; then echo \"mksquashfs version $version (2023/03/25)\"; exit 0; fi\n"
+        f"printf '%s\\n' \"$@\" > '{args_file}'\n"
+        "percentage=\n"
+        "for arg in \"$@\"; do [ \"$arg\" = -percentage ] && percentage=1; done\n"
+        "case \"$percentage$version\" in 14.[0-5]*) echo 'mksquashfs: invalid option' >&2; exit 1;; esac\n"
+        "[ -n \"$FAKE_MKSQUASHFS_SLEEP\" ] && exec sleep \"$FAKE_MKSQUASHFS_SLEEP\"\n"
+        "[ -n \"$FAKE_MKSQUASHFS_FAIL\" ] && { echo 'mksquashfs: out of space' >&2; exit 1; }\n"
+        "[ -n \"$FAKE_MKSQUASHFS_WARNINGS\" ] && yes 'Failed to read file, skipping' | head -n 20000 >&2\n"
+        "[ -n \"$percentage\" ] && for p in 25 50 75 100; do echo $p; done\n"
+        "printf 'hsqs-image' > \"$2\"\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return args_file
+
+
+class TestSquashfsCompression:
+    """Tests for reading the compressor of a module."""
+
+    def test_reads_compressor_id(self, tmp_path):
+        """The compressor id in the superblock maps to its mksquashfs name."""
+        from module_utils import squashfs_compression
+
+        (tmp_path / "01-core.sb").write_bytes(_squashfs_header(6))
+        (tmp_path / "02-xz.sb").write_bytes(_squashfs_header(4))
+
+        assert squashfs_compression(str(tmp_path / "01-core.sb")) == 'zstd'
+        assert squashfs_compression(str(tmp_path / "02-xz.sb")) == 'xz'
+
+    def test_not_a_module(self, tmp_path):
+        """Other files and missing paths have no compressor."""
+        from module_utils import squashfs_compression
+
+        (tmp_path / "notes.sb").write_bytes(b"plain text file, not squashfs")
+
+        assert squashfs_compression(str(tmp_path / "notes.sb")) is None
+        assert squashfs_compression(str(tmp_path / "missing.sb")) is None
+
+
+class TestFindLiveChanges:
+    """Tests for locating the live session's changes."""
+
+    def test_first_non_empty_directory(self, tmp_path):
+        """Empty and missing candidates are skipped."""
+        from module_utils import find_live_changes
+
+        empty = tmp_path / "empty"
+        empty.mkdir()
+        changes = tmp_path / "changes"
+        (changes / "etc").mkdir(parents=True)
+        candidates = (str(tmp_path / "missing"), str(empty), str(changes))
+
+        with patch('module_utils.LIVE_CHANGES_DIRS', candidates):
+            assert find_live_changes() == str(changes)
+        with patch('module_utils.LIVE_CHANGES_DIRS', candidates[:2]):
+            assert find_live_changes() is None
+
+
+class TestPackDirectory:
+    """Tests for packing a directory into a module."""
+
+    def test_packs_with_progress(self, tmp_path, fake_mksquashfs):
+        """The image lands at dst with no .part left behind, reporting mksquashfs's percentages."""
+        from module_utils import pack_directory
+
+        src = tmp_path / "changes"
+        src.mkdir()
+        dst = tmp_path / "99-live-changes.sb"
+        progress = []
+
+        size = pack_directory(str(src), str(dst), 'xz', ('tmp', 'var/tmp'), progress.append)
+
+        assert dst.read_bytes() == b"hsqs-image"
+        assert size == len(b"hsqs-image")
+        assert not (tmp_path / "99-live-changes.sb.part").exists()
+        assert progress == [25, 50, 75, 100]
+        args = fake_mksquashfs.read_text().split('\n')
+        assert args[:2] == [str(src), str(dst) + ".part"]
+        assert args[args.index('-comp') + 1] == 'xz'
+        assert args[args.index('-e') + 1:args.index('-e') + 3] == ['tmp', 'var/tmp']
+
+    def test_failure_leaves_nothing(self, tmp_path, fake_mksquashfs, monkeypatch):
+        """A failing mksquashfs raises with its error and leaves no module behind."""
+        from module_utils import pack_directory
+
+        monkeypatch.setenv("FAKE_MKSQUASHFS_FAIL", "1")
+        dst = tmp_path / "99-live-changes.sb"
+
+        with pytest.raises(RuntimeError, match="out of space"):
+            pack_directory(str(tmp_path), str(dst))
+        assert not dst.exists()
+        assert not (tmp_path / "99-live-changes.sb.part").exists()
+
+    def test_cancel(self, tmp_path, fake_mksquashfs, monkeypatch):
+        """Canceling stops a running mksquashfs and removes the partial image."""
+        from module_utils import pack_directory
+
+        monkeypatch.setenv("FAKE_MKSQUASHFS_SLEEP", "30")
+        dst = tmp_path / "99-live-changes.sb"
+
+        with pytest.raises(RuntimeError, match="canceled"):
+            pack_directory(str(tmp_path), str(dst), canceled=lambda: True)
+        assert not dst.exists()
+        assert not (tmp_path / "99-live-changes.sb.part").exists()
+
+    def test_older_mksquashfs_without_progress(self, tmp_path, fake_mksquashfs, monkeypatch):
+        """squashfs-tools before 4.6 lacks -percentage and packs without progress."""
+        from module_utils import pack_directory
+
+        monkeypatch.setenv("FAKE_MKSQUASHFS_VERSION", "4.5.1")
+        dst = tmp_path / "99-live-changes.sb"
+        progress = []
+
+        pack_directory(str(tmp_path / "bin"), str(dst), progress=progress.append)
+
+        assert dst.read_bytes() == b"hsqs-image"
+        assert progress == []
+        args = fake_mksquashfs.read_text().split('\n')
+        assert '-no-progress' in args and '-percentage' not in args
+
+    def test_many_warnings(self, tmp_path, fake_mksquashfs, monkeypatch):
+        """Warnings beyond a pipe buffer do not stall packing."""
+        from module_utils import pack_directory
+
+        monkeypatch.setenv("FAKE_MKSQUASHFS_WARNINGS", "1")
+        dst = tmp_path / "99-live-changes.sb"
+        progress = []
+
+        pack_directory(str(tmp_path / "bin"), str(dst), progress=progress.append)
+
+        assert dst.read_bytes() == b"hsqs-image"
+        assert progress == [25, 50, 75, 100]
+
+    def test_requires_mksquashfs(self, tmp_path):
+        """Without mksquashfs installed packing fails with a clear error."""
+        from module_utils import pack_directory
+
+        with patch('module_utils.shutil.which', return_value=None):
+            with pytest.raises(RuntimeError, match="mksquashfs is required"):
+                pack_directory(str(tmp_path), str(tmp_path / "out.sb"))